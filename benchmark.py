@@ -0,0 +1,251 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+HEAVY_MODULES = ["pandas", "numpy", "sqlalchemy", "pyodbc", "pyarrow"]
+
+STARTUP_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+print(json.dumps({{
+    "seconds": time.perf_counter() - started,
+    "loaded": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+CONNECTION_PROBE = """
+import json, time
+from connection_manager import ConnectionManager
+started = time.perf_counter()
+from database_connection import DatabaseConnection
+imported = time.perf_counter()
+db_conn = DatabaseConnection(ConnectionManager().connections[{name!r}])
+constructed = time.perf_counter()
+db_conn.get_all_datasets()
+queried = time.perf_counter()
+print(json.dumps({{
+    "import_seconds": imported - started,
+    "construct_seconds": constructed - imported,
+    "first_query_seconds": queried - constructed,
+}}))
+"""
+
+
+def _run_probe(code: str) -> Dict:
+    """Runs a probe in a fresh interpreter, so every run measures a cold start."""
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "min_ms": round(min(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def benchmark_startup(
+    modules: List[str], repeat: int, connection: Optional[str] = None
+) -> Dict:
+    """
+    Measures cold import time of the app's entry modules and which heavy
+    dependencies each one loads. With a connection name, also measures creating a
+    ``DatabaseConnection`` and running its first query.
+    """
+    report = {"imports": {}}
+    for module in modules:
+        runs = [
+            _run_probe(STARTUP_PROBE.format(module=module, heavy=HEAVY_MODULES))
+            for _ in range(repeat)
+        ]
+        report["imports"][module] = {
+            **_summary([run["seconds"] for run in runs]),
+            "loaded": runs[-1]["loaded"],
+        }
+
+    if connection:
+        runs = [
+            _run_probe(CONNECTION_PROBE.format(name=connection)) for _ in range(repeat)
+        ]
+        report["connection"] = {
+            phase: _summary([run[phase] for run in runs])
+            for phase in ("import_seconds", "construct_seconds", "first_query_seconds")
+        }
+    return report
+
+
+def _measure_storage(db_conn, d_name: str, version_id: int, repeat: int) -> Dict:
+    """Measures the size of a dataset's tables and full scans of one version."""
+    scans = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = sum(
+            batch.num_rows for batch in db_conn.iter_version_batches(d_name, version_id)
+        )
+        scans.append(time.perf_counter() - started)
+    return {
+        "compression": db_conn.get_dataset_compression(d_name),
+        "size_kb": db_conn.get_dataset_size_kb(d_name),
+        "rows": rows,
+        "scan": _summary(scans),
+    }
+
+
+def benchmark_storage(
+    connection: str,
+    d_name: str,
+    compression: str,
+    repeat: int,
+    version_id: Optional[int] = None,
+    online: bool = True,
+    restore: bool = False,
+) -> Dict:
+    """
+    Converts a dataset to another storage format and compares table size and the
+    time of full scans of one version (the latest one by default) before and after.
+    With ``restore`` the dataset is converted back afterwards.
+    """
+    from connection_manager import ConnectionManager
+    from database_connection import DatabaseConnection
+
+    db_conn = DatabaseConnection(ConnectionManager().connections[connection])
+    if version_id is None:
+        versions = [
+            v for v in db_conn.get_all_versions_info(d_name) if not v.get("archived")
+        ]
+        if not versions:
+            raise ValueError(f"Dataset '{d_name}' has no versions stored in the database")
+        version_id = versions[-1]["version_id"]
+
+    before = _measure_storage(db_conn, d_name, version_id, repeat)
+    started = time.perf_counter()
+    if db_conn.set_dataset_compression(d_name, compression, online) is None:
+        raise RuntimeError(f"Converting '{d_name}' to {compression} failed")
+    conversion_seconds = time.perf_counter() - started
+    after = _measure_storage(db_conn, d_name, version_id, repeat)
+    if restore:
+        db_conn.set_dataset_compression(d_name, before["compression"], online)
+
+    return {
+        "dataset": d_name,
+        "version_id": version_id,
+        "conversion_seconds": round(conversion_seconds, 3),
+        "before": before,
+        "after": after,
+        "size_ratio": round(before["size_kb"] / after["size_kb"], 2)
+        if after["size_kb"]
+        else None,
+        "scan_speedup": round(
+            before["scan"]["median_ms"] / after["scan"]["median_ms"], 2
+        )
+        if after["scan"]["median_ms"]
+        else None,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of the dataset manager.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    startup = subparsers.add_parser("startup", help="Cold start and import time")
+    startup.add_argument(
+        "--modules",
+        type=lambda value: value.split(","),
+        default=["main", "dataset_manager", "database_connection"],
+        help="Comma-separated modules to import",
+    )
+    startup.add_argument(
+        "--connection", help="Also time the first query on this connection"
+    )
+
+    storage = subparsers.add_parser(
+        "storage", help="Table size and scan time before/after a storage conversion"
+    )
+    storage.add_argument("--connection", required=True, help="Connection name")
+    storage.add_argument("--dataset", required=True, help="Dataset to convert")
+    storage.add_argument(
+        "--compression",
+        required=True,
+        choices=["none", "row", "page", "columnstore"],
+        help="Target storage format",
+    )
+    storage.add_argument(
+        "--version", type=int, help="Version to scan (default: the latest)"
+    )
+    storage.add_argument(
+        "--offline", action="store_true", help="Convert offline instead of online"
+    )
+    storage.add_argument(
+        "--restore",
+        action="store_true",
+        help="Convert the dataset back to its original format afterwards",
+    )
+
+    for subparser in subparsers.choices.values():
+        subparser.add_argument(
+            "--repeat", type=int, default=5, help="Runs per measurement"
+        )
+        subparser.add_argument(
+            "--history",
+            type=Path,
+            help="Append the result as a JSON line to this file to track changes",
+        )
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.benchmark == "startup":
+        report = benchmark_startup(args.modules, args.repeat, args.connection)
+    elif args.benchmark == "storage":
+        report = benchmark_storage(
+            args.connection,
+            args.dataset,
+            args.compression,
+            args.repeat,
+            args.version,
+            online=not args.offline,
+            restore=args.restore,
+        )
+
+    result = {
+        "benchmark": args.benchmark,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "seconds": round(time.perf_counter() - started, 3),
+        **report,
+    }
+    print(json.dumps(result, indent=2))
+    if args.history:
+        with open(args.history, "a") as f:
+            f.write(json.dumps(result) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, List
+from config import Config
+
+
+class CatalogAggregator:
+    """
+    Builds a global catalog of the datasets of every configured connection.
+
+    Connections are queried concurrently, each on its own ``DatabaseConnection``,
+    and only read the Datasets, Dataset_Versions and Dataset_Columns metadata.
+    Collection waits at most ``timeout_seconds`` in total: connections that fail
+    or have not answered by then are reported with their status and the catalog
+    holds the datasets of the others. Logins are bounded by the same timeout, so
+    an unreachable server does not keep its worker thread for long.
+    """
+
+    def __init__(
+        self,
+        connections: Dict[str, Dict],
+        timeout_seconds: float = Config.CATALOG_TIMEOUT_SECONDS,
+        max_workers: int = Config.CATALOG_WORKERS,
+    ):
+        self.connections = connections
+        self.timeout_seconds = timeout_seconds
+        self.max_workers = max_workers
+
+    def _query(self, name: str, conn_details: Dict) -> List[Dict]:
+        from database_connection import DatabaseConnection
+
+        # Only reads metadata: skip schema creation, and release the connection
+        # even when the query fails
+        db_conn = DatabaseConnection(
+            {**conn_details, "login_timeout": max(1, int(self.timeout_seconds))},
+            create_schema=False,
+        )
+        try:
+            return [
+                {"connection": name, "server": conn_details.get("server"), **dataset}
+                for dataset in db_conn.get_catalog()
+            ]
+        finally:
+            db_conn.close()
+
+    def collect(self) -> Dict:
+        """
+        Queries all connections.
+
+        Returns:
+            Dict: ``datasets`` (catalog entries of the connections that answered,
+                  each with its connection name), ``connections`` (status "ok",
+                  "failed" or "timeout" per connection, with the query time,
+                  dataset count and error), ``partial`` and ``collected_at``
+        """
+        started = time.perf_counter()
+        executor = ThreadPoolExecutor(
+            max(1, min(self.max_workers, len(self.connections))),
+            thread_name_prefix="catalog",
+        )
+        futures = {
+            executor.submit(self._query, name, conn_details): name
+            for name, conn_details in self.connections.items()
+        }
+        done, _ = wait(futures, timeout=self.timeout_seconds)
+        # Do not wait for connections that timed out; their threads finish on
+        # their own once the login or query gives up
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        datasets, statuses = [], {}
+        for future, name in futures.items():
+            if future not in done:
+                statuses[name] = {
+                    "status": "timeout",
+                    "error": f"No answer within {self.timeout_seconds} seconds",
+                }
+                continue
+            try:
+                entries = future.result()
+            except Exception as e:
+                statuses[name] = {"status": "failed", "error": str(e)}
+                continue
+            datasets.extend(entries)
+            statuses[name] = {"status": "ok", "datasets": len(entries)}
+        for status in statuses.values():
+            status.setdefault("datasets", 0)
+            status.setdefault("error", None)
+
+        return {
+            "datasets": sorted(
+                datasets, key=lambda entry: (entry["d_name"].lower(), entry["connection"])
+            ),
+            "connections": statuses,
+            "partial": any(status["status"] != "ok" for status in statuses.values()),
+            "seconds": round(time.perf_counter() - started, 3),
+            "collected_at": datetime.now(),
+        }
+
+    @staticmethod
+    def search(catalog: Dict, text: str) -> List[Dict]:
+        """
+        Filters catalog entries whose dataset name, description, connection or
+        column names contain ``text`` (case-insensitive). Each result lists its
+        ``matched_columns``.
+        """
+        text = text.strip().lower()
+        if not text:
+            return [{**entry, "matched_columns": []} for entry in catalog["datasets"]]
+
+        results = []
+        for entry in catalog["datasets"]:
+            matched_columns = [col for col in entry["columns"] if text in col.lower()]
+            if (
+                matched_columns
+                or text in entry["d_name"].lower()
+                or text in (entry["description"] or "").lower()
+                or text in entry["connection"].lower()
+            ):
+                results.append({**entry, "matched_columns": matched_columns})
+        return results
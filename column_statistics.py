@@ -0,0 +1,219 @@
+import base64
+import datetime
+import decimal
+import json
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count sketch over 64-bit hashes.
+
+    With the default precision of 12 bits the sketch uses 4096 one-byte registers
+    and has a standard error of about 1.6%. Sketches with the same precision can be
+    merged, so chunks of a dataset can be sketched independently.
+    """
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @staticmethod
+    def _bit_length(values: np.ndarray) -> np.ndarray:
+        """Vectorized ``int.bit_length`` for an array of uint64 values."""
+        length = np.zeros(len(values), dtype=np.uint8)
+        for shift in (32, 16, 8, 4, 2, 1):
+            shifted = values >> np.uint64(shift)
+            has_bits = shifted != 0
+            values = np.where(has_bits, shifted, values)
+            length += has_bits.astype(np.uint8) * shift
+        return length + (values != 0).astype(np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray):
+        if len(hashes) == 0:
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        suffix_bits = 64 - self.precision
+        index = (hashes >> np.uint64(suffix_bits)).astype(np.int64)
+        suffix = hashes & np.uint64((1 << suffix_bits) - 1)
+        rank = (suffix_bits - self._bit_length(suffix) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def add(self, series: pd.Series):
+        self.add_hashes(pd.util.hash_array(series.dropna().to_numpy()))
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+
+class ColumnStatistics:
+    """
+    Accumulates per-column statistics of a version while it is being ingested:
+    row count, null count, distinct estimate (HyperLogLog), min/max and the most
+    frequent values. Data can be fed in chunks through ``update``.
+
+    Top values are tracked approximately: only the ``top_k * 10`` most frequent
+    candidates are carried from one chunk to the next.
+    """
+
+    def __init__(self, top_k: int = 10):
+        self.top_k = top_k
+        self.row_count = 0
+        self.columns: Dict[str, Dict] = {}
+
+    @staticmethod
+    def _comparable(series: pd.Series) -> bool:
+        return pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series)
+
+    def update(self, df: pd.DataFrame):
+        self.row_count += len(df)
+        for column_name in df.columns:
+            series = df[column_name]
+            stats = self.columns.setdefault(
+                column_name,
+                {
+                    "null_count": 0,
+                    "sketch": HyperLogLog(),
+                    "min": None,
+                    "max": None,
+                    "counts": pd.Series(dtype="int64"),
+                },
+            )
+
+            values = series.dropna()
+            stats["null_count"] += len(series) - len(values)
+            if values.empty:
+                continue
+
+            stats["sketch"].add(values)
+
+            if self._comparable(values):
+                chunk_min, chunk_max = values.min(), values.max()
+            else:
+                as_text = values.astype(str)
+                chunk_min, chunk_max = as_text.min(), as_text.max()
+            if stats["min"] is None or chunk_min < stats["min"]:
+                stats["min"] = chunk_min
+            if stats["max"] is None or chunk_max > stats["max"]:
+                stats["max"] = chunk_max
+
+            counts = stats["counts"].add(values.value_counts(), fill_value=0)
+            stats["counts"] = counts.nlargest(self.top_k * 10)
+
+    @staticmethod
+    def _encode_value(value):
+        """Makes a column value JSON serializable, tagging types JSON lacks."""
+        if isinstance(value, (pd.Timestamp, np.datetime64, datetime.datetime)):
+            return {"datetime": pd.Timestamp(value).isoformat()}
+        if isinstance(value, datetime.date):
+            return {"date": value.isoformat()}
+        if isinstance(value, decimal.Decimal):
+            return {"decimal": str(value)}
+        if hasattr(value, "item"):
+            value = value.item()
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        return str(value)
+
+    @staticmethod
+    def _decode_value(value):
+        if isinstance(value, dict):
+            if "datetime" in value:
+                return pd.Timestamp(value["datetime"])
+            if "date" in value:
+                return datetime.date.fromisoformat(value["date"])
+            return decimal.Decimal(value["decimal"])
+        return value
+
+    def to_json(self) -> str:
+        """Serializes the accumulated state, e.g. to checkpoint a resumable ingest."""
+        return json.dumps(
+            {
+                "top_k": self.top_k,
+                "row_count": self.row_count,
+                "columns": [
+                    {
+                        "name": column_name,
+                        "null_count": int(stats["null_count"]),
+                        "precision": stats["sketch"].precision,
+                        "registers": base64.b64encode(
+                            stats["sketch"].registers.tobytes()
+                        ).decode(),
+                        "min": self._encode_value(stats["min"]),
+                        "max": self._encode_value(stats["max"]),
+                        "counts": [
+                            [self._encode_value(value), int(count)]
+                            for value, count in stats["counts"].items()
+                        ],
+                    }
+                    for column_name, stats in self.columns.items()
+                ],
+            }
+        )
+
+    @classmethod
+    def from_json(cls, data: str) -> "ColumnStatistics":
+        """Restores statistics serialized with ``to_json``."""
+        state = json.loads(data)
+        statistics = cls(state["top_k"])
+        statistics.row_count = state["row_count"]
+        for column in state["columns"]:
+            sketch = HyperLogLog(column["precision"])
+            sketch.registers = np.frombuffer(
+                base64.b64decode(column["registers"]), dtype=np.uint8
+            ).copy()
+            values = [cls._decode_value(value) for value, _ in column["counts"]]
+            statistics.columns[column["name"]] = {
+                "null_count": column["null_count"],
+                "sketch": sketch,
+                "min": cls._decode_value(column["min"]),
+                "max": cls._decode_value(column["max"]),
+                "counts": pd.Series(
+                    [count for _, count in column["counts"]], index=values, dtype="int64"
+                ),
+            }
+        return statistics
+
+    @staticmethod
+    def _to_text(value) -> Optional[str]:
+        if value is None:
+            return None
+        if hasattr(value, "item"):
+            value = value.item()
+        return str(value)[:255]
+
+    def results(self) -> List[Dict]:
+        """
+        Returns:
+            List[Dict]: One entry per column with row_count, null_count,
+                        distinct_estimate, min_value, max_value and top_values
+                        (a list of [value, count] pairs)
+        """
+        results = []
+        for column_name, stats in self.columns.items():
+            top = stats["counts"].nlargest(self.top_k)
+            results.append(
+                {
+                    "column_name": column_name,
+                    "row_count": self.row_count,
+                    "null_count": int(stats["null_count"]),
+                    "distinct_estimate": stats["sketch"].estimate(),
+                    "min_value": self._to_text(stats["min"]),
+                    "max_value": self._to_text(stats["max"]),
+                    "top_values": [
+                        [self._to_text(value), int(count)] for value, count in top.items()
+                    ],
+                }
+            )
+        return results
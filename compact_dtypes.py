@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+
+class CompactDtypes:
+    """
+    Chooses memory-compact pandas dtypes for a version from the SQL types of the
+    dataset table and the version's column statistics:
+
+        integers: the smallest type holding the column's min/max, nullable
+                  (``Int8`` ... ``Int64``) when the column has NULLs
+        real:     float32 (SQL ``float`` stays float64, downcasting it loses precision)
+        bit:      bool, or nullable ``boolean`` when the column has NULLs
+        strings:  category when few values are distinct, otherwise Arrow-backed
+                  strings (plain ``string`` without pyarrow)
+
+    Chunks are converted as they are read. Category columns are kept as strings
+    until all chunks are combined, so every chunk shares one set of categories.
+    """
+
+    CATEGORY_MAX_DISTINCT_RATIO = 0.5
+    INTEGER_SQL_TYPES = {"tinyint", "smallint", "int", "bigint"}
+    STRING_SQL_TYPES = {"char", "varchar", "nchar", "nvarchar", "text", "ntext"}
+    INTEGER_DTYPES = [np.int8, np.int16, np.int32, np.int64]
+
+    @staticmethod
+    def _string_dtype() -> str:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return "string"
+        return "string[pyarrow]"
+
+    @staticmethod
+    def _parse_int(value: Optional[str]) -> Optional[int]:
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return None
+
+    @classmethod
+    def _integer_dtype(cls, sql_type: str, stats: Optional[Dict]) -> str:
+        low = cls._parse_int(stats and stats["min_value"])
+        high = cls._parse_int(stats and stats["max_value"])
+        dtype = {"tinyint": np.int16, "smallint": np.int16, "int": np.int32}.get(
+            sql_type, np.int64
+        )
+        if low is not None and high is not None:
+            for candidate in cls.INTEGER_DTYPES:
+                info = np.iinfo(candidate)
+                if info.min <= low and high <= info.max:
+                    dtype = candidate
+                    break
+        name = np.dtype(dtype).name
+        return name.capitalize() if stats is None or stats["null_count"] else name
+
+    @classmethod
+    def plan(
+        cls,
+        sql_types: Dict[str, str],
+        statistics: List[Dict],
+        row_count: Optional[int] = None,
+    ) -> Dict[str, str]:
+        """
+        Maps each column to its compact dtype.
+
+        Args:
+            sql_types: SQL type name per column of the dataset table
+            statistics: Column statistics of the version (``get_version_statistics``)
+            row_count: Number of rows of the version, used to decide on categoricals
+
+        Returns:
+            Dict[str, str]: pandas dtype per column; columns without a better dtype
+                            are left out
+        """
+        stats_by_column = {stats["column_name"]: stats for stats in statistics}
+        plan = {}
+        for column_name, sql_type in sql_types.items():
+            sql_type = sql_type.lower()
+            stats = stats_by_column.get(column_name)
+            if sql_type in cls.INTEGER_SQL_TYPES:
+                plan[column_name] = cls._integer_dtype(sql_type, stats)
+            elif sql_type == "real":
+                plan[column_name] = "float32"
+            elif sql_type == "bit":
+                plan[column_name] = "boolean" if stats is None or stats["null_count"] else "bool"
+            elif sql_type in cls.STRING_SQL_TYPES:
+                few_distinct = (
+                    stats is not None
+                    and row_count
+                    and stats["distinct_estimate"]
+                    <= cls.CATEGORY_MAX_DISTINCT_RATIO * (row_count - stats["null_count"])
+                )
+                plan[column_name] = "category" if few_distinct else cls._string_dtype()
+        return plan
+
+    @classmethod
+    def apply(cls, df: pd.DataFrame, plan: Dict[str, str]) -> pd.DataFrame:
+        """Converts one chunk; category columns become strings until ``finalize``."""
+        return df.astype(
+            {
+                column_name: cls._string_dtype() if dtype == "category" else dtype
+                for column_name, dtype in plan.items()
+                if column_name in df.columns
+            }
+        )
+
+    @staticmethod
+    def finalize(df: pd.DataFrame, plan: Dict[str, str]) -> pd.DataFrame:
+        categories = [
+            column_name
+            for column_name, dtype in plan.items()
+            if dtype == "category" and column_name in df.columns
+        ]
+        return df.astype({column_name: "category" for column_name in categories})
+
+    @staticmethod
+    def memory_report(bytes_before: pd.Series, df: pd.DataFrame) -> Dict:
+        """
+        Compares the memory of the converted DataFrame with the memory the plain
+        ``pd.read_sql`` dtypes used.
+
+        Args:
+            bytes_before: Deep memory usage per column of the unconverted chunks
+            df: Converted DataFrame
+
+        Returns:
+            Dict: rows, bytes_before, bytes_after, ratio and per-column dtype and sizes
+        """
+        bytes_after = df.memory_usage(deep=True, index=False)
+        before_total, after_total = int(bytes_before.sum()), int(bytes_after.sum())
+        return {
+            "rows": len(df),
+            "bytes_before": before_total,
+            "bytes_after": after_total,
+            "ratio": round(before_total / after_total, 2) if after_total else None,
+            "columns": {
+                column_name: {
+                    "dtype": str(df[column_name].dtype),
+                    "bytes_before": int(bytes_before.get(column_name, 0)),
+                    "bytes_after": int(bytes_after[column_name]),
+                }
+                for column_name in df.columns
+            },
+        }
@@ -4,4 +4,58 @@ class Config:
         "mysql": "🐬 MySQL",
         "postgres": "🐘 PostgreSQL",
     }
-    CONFIG_FILE = "connections.yaml"
\ No newline at end of file
+    CONFIG_FILE = "connections.yaml"
+
+    # Streamlit metadata/preview cache
+    CACHE_TTL_SECONDS = 600
+    CACHE_MAX_ENTRIES = 512
+    PREVIEW_ROWS = 5
+    SAMPLE_ROWS = 20
+
+    # Cross-connection catalog: all connections are queried concurrently and
+    # the ones that have not answered after CATALOG_TIMEOUT_SECONDS are skipped
+    CATALOG_TIMEOUT_SECONDS = 10
+    CATALOG_WORKERS = 8
+    CATALOG_TTL_SECONDS = 300
+
+    # Background retention enforcement
+    RETENTION_INTERVAL_SECONDS = 3600
+    RETENTION_MAX_DELETES_PER_RUN = 20
+
+    # Archive tier: directory on local or mounted storage for archived versions
+    ARCHIVE_DIR = "archive"
+
+    # Dataset table layouts
+    STORAGE_LAYOUTS = {
+        "standard": "Standard",
+        "sparse": "Sparse (wide or frequently changing schemas)",
+    }
+
+    # Dataset table compression. Sparse tables cannot be compressed.
+    STORAGE_COMPRESSIONS = {
+        "none": "None",
+        "row": "Row compression",
+        "page": "Page compression",
+        "columnstore": "Clustered columnstore (full-version analytical reads)",
+    }
+
+    # Client-side row fingerprint index used to skip uploading known rows. Off
+    # for the app: building it reads the whole dataset table and its files stay
+    # on the app host. The CLI enables it with --row-index.
+    ROW_INDEX_ENABLED = False
+    ROW_INDEX_DIR = ".row_index"
+
+    # Content fingerprints of ingested files, so re-ingesting an unchanged file
+    # is detected without reading it
+    FINGERPRINT_CACHE_FILE = ".row_index/file_fingerprints.json"
+
+    # Background upload jobs of the app. Unfinished jobs whose heartbeat is older
+    # than UPLOAD_JOB_STALE_SECONDS are shown as interrupted.
+    UPLOAD_WORKERS = 2
+    UPLOAD_POLL_SECONDS = 2
+    UPLOAD_HEARTBEAT_SECONDS = 30
+    UPLOAD_JOB_STALE_SECONDS = 90
+    UPLOAD_JOBS_SHOWN = 10
+
+    # Name shown for the main lineage of a dataset (stored without a branch)
+    DEFAULT_BRANCH = "main"
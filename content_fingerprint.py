@@ -0,0 +1,88 @@
+import json
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional
+from row_hash_index import RowHashIndex
+
+
+class ContentFingerprint:
+    """
+    Order-insensitive fingerprint of a version's content: the sum (mod 2^64) of
+    the row fingerprints of ``RowHashIndex.hash_rows``, the row count and a hash
+    of the schema, the column names with their SQL types as staging infers and
+    widens them. Row fingerprints render ``1`` and ``"1"`` alike, so the schema
+    hash is what tells a column whose type changed apart. Reordering rows or
+    columns gives the same fingerprint; duplicate rows count as often as they
+    occur. Data can be fed in chunks.
+    """
+
+    def __init__(self):
+        self.row_sum = 0
+        self.row_count = 0
+        self.columns: Dict[str, str] = {}
+
+    def update(
+        self,
+        df: pd.DataFrame,
+        hashes: Optional[np.ndarray] = None,
+        columns: Optional[List[Dict[str, str]]] = None,
+    ):
+        """
+        Adds a chunk. ``hashes`` and ``columns`` can pass the row fingerprints and
+        the inferred SQL types (``DatabaseConnection.infer_sql_types``) already
+        computed for it.
+        """
+        from database_connection import DatabaseConnection
+
+        if hashes is None:
+            hashes = RowHashIndex.hash_rows(df)
+        if columns is None:
+            columns = DatabaseConnection.infer_sql_types(df)
+        self.row_sum = (self.row_sum + int(hashes.sum(dtype=np.uint64))) % (1 << 64)
+        self.row_count += len(df)
+        for column in columns:
+            name = str(column["name"])
+            if name == RowHashIndex.ROW_HASH_COLUMN:
+                continue
+            self.columns[name] = DatabaseConnection._wider_sql_type(
+                self.columns.get(name, column["type"]), column["type"]
+            )
+
+    def hexdigest(self) -> str:
+        """48 hex digits: schema hash, row sum and row count."""
+        schema = "\x1f".join(
+            f"{name}\x1e{sql_type}" for name, sql_type in sorted(self.columns.items())
+        )
+        schema_hash = int(pd.util.hash_array(np.array([schema], dtype=object))[0])
+        return f"{schema_hash:016x}{self.row_sum:016x}{self.row_count:016x}"
+
+    def to_json(self) -> str:
+        """Serializes the accumulated state, e.g. to checkpoint a resumable ingest."""
+        return json.dumps(
+            {"row_sum": self.row_sum, "row_count": self.row_count, "columns": self.columns}
+        )
+
+    @classmethod
+    def from_json(cls, data: str) -> "ContentFingerprint":
+        """Restores ``to_json`` state; raises ValueError for state without column types."""
+        state = json.loads(data)
+        if not isinstance(state.get("columns"), dict):
+            raise ValueError("Fingerprint state has no column types")
+        fingerprint = cls()
+        fingerprint.row_sum = state["row_sum"]
+        fingerprint.row_count = state["row_count"]
+        fingerprint.columns = dict(state["columns"])
+        return fingerprint
+
+    @staticmethod
+    def digest_row_count(digest: str) -> int:
+        """Gets the row count encoded in a ``hexdigest``."""
+        return int(digest[32:], 16)
+
+    @classmethod
+    def of(cls, chunks: Iterable[pd.DataFrame]) -> str:
+        """Fingerprints all chunks and returns the ``hexdigest``."""
+        fingerprint = cls()
+        for chunk in chunks:
+            fingerprint.update(chunk)
+        return fingerprint.hexdigest()
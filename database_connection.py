@@ -1,13 +1,56 @@
 import sqlalchemy
 from sqlalchemy import text
+from contextlib import contextmanager
+from functools import lru_cache
 import pandas as pd
 import urllib
-from typing import List, Optional, Dict
+import json
+import hashlib
+import datetime
+import decimal
+import os
+import re
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Dict,
+    Tuple,
+    Union,
+)
 from sql_interface import SQLInterface
 from mssql_dialect import MSSQLDialect
+from column_statistics import ColumnStatistics
+from compact_dtypes import CompactDtypes
+from content_fingerprint import ContentFingerprint
+from row_hash_index import RowHashIndex
+import numpy as np
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+
+@lru_cache(maxsize=1024)
+def _statement(sql: str):
+    """
+    Returns a cached ``text`` construct per SQL string. Values are passed as bound
+    parameters, so the string (and the server's cached plan) is reused by every
+    call instead of being rebuilt and recompiled for each literal.
+    """
+    return text(sql)
 
 
 class DatabaseConnection:
+    VERSION_MASK_COLUMN = "__version_mask"
+    # Rows read by a sampled preview per requested row, before the final pick
+    SAMPLE_OVERSAMPLING = 4
+    # One bit per version in a signed bigint
+    MAX_VERSIONS_PER_READ = 63
+
     dtype_mapping = {
         "object": "varchar(255)",
         "int64": "bigint",
@@ -20,16 +63,42 @@ class DatabaseConnection:
         "string": "varchar(255)",
     }
 
-    def __init__(self, conn_details: Dict):
-        """Initialize database connection with connection details."""
+    def __init__(self, conn_details: Dict, create_schema: bool = True):
+        """
+        Initialize database connection with connection details.
+
+        The engine and connection are created on first use, and the schema tables
+        are created right after connecting, so constructing the object is free.
+        Read-only callers pass ``create_schema=False`` to connect without any DDL.
+        """
         self.conn_details = conn_details
+        self.create_schema = create_schema
         self.sql = self._get_sql_dialect(conn_details["type"])
-        self.engine = self._create_engine()
-        self.connection = self.engine.connect()
-
-        if conn_details.get("database") == "cdc_management":
-            self.create_database()
-        self.create_schema_tables()
+        self._engine = None
+        self._connection = None
+        self._raise_errors = False
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._engine = self._create_engine()
+        return self._engine
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = self.engine.connect()
+            if not self.create_schema:
+                return self._connection
+            try:
+                if self.conn_details.get("database") == "cdc_management":
+                    self.create_database()
+                self.create_schema_tables()
+            except Exception:
+                self._connection.close()
+                self._connection = None
+                raise
+        return self._connection
 
     def _get_sql_dialect(self, db_type: str) -> SQLInterface:
         """Returns appropriate SQL dialect implementation."""
@@ -51,8 +120,8 @@ class DatabaseConnection:
         else:
             raise ValueError(f"Unsupported database type: {db_type}")
 
-    def _create_mssql_engine(self):
-        """Creates MS SQL Server engine."""
+    def _odbc_connection_string(self) -> str:
+        """Builds the ODBC connection string of an MS SQL Server connection."""
         connection_string = (
             f"Driver={{ODBC Driver 17 for SQL Server}};"
             f"Server={self.conn_details['server']};"
@@ -63,10 +132,18 @@ class DatabaseConnection:
         if "database" in self.conn_details:
             connection_string += f"Database={self.conn_details['database']};"
 
-        odbc_connect = urllib.parse.quote_plus(connection_string)
+        return connection_string
+
+    def _create_mssql_engine(self):
+        """Creates MS SQL Server engine."""
+        odbc_connect = urllib.parse.quote_plus(self._odbc_connection_string())
+        connect_args = {}
+        if "login_timeout" in self.conn_details:
+            connect_args["timeout"] = self.conn_details["login_timeout"]
         return sqlalchemy.create_engine(
             f"mssql+pyodbc:///?odbc_connect={odbc_connect}",
             isolation_level="AUTOCOMMIT",
+            connect_args=connect_args,
         )
 
     def _create_mysql_engine(self):
@@ -83,13 +160,58 @@ class DatabaseConnection:
             f"@{self.conn_details['server']}/{self.conn_details['database']}"
         )
 
+    @property
+    def connection_key(self) -> str:
+        """Identifies the server and database, for client-side caches and indexes."""
+        details = self.conn_details
+        return f"{details['type']}://{details['server']}/{details.get('database', '')}"
+
     def __del__(self):
         """Cleanup connection on object destruction."""
-        if hasattr(self, "connection") and self.connection:
-            self.connection.close()
+        if getattr(self, "_connection", None) is not None:
+            self._connection.close()
+
+    def close(self):
+        """Closes the connection and disposes of the engine's pooled connections."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+
+    def execute(self, sql, params=None):
+        return self.connection.execute(_statement(sql), params)
+
+    @contextmanager
+    def raising_errors(self):
+        """
+        Makes the metadata and preview getters raise instead of returning empty
+        results, so callers caching them can tell a failure from no data.
+        """
+        self._raise_errors = True
+        try:
+            yield
+        finally:
+            self._raise_errors = False
 
-    def execute(self, sql):
-        return self.connection.execute(text(sql))
+    @contextmanager
+    def transaction(self):
+        """
+        Runs the block in one transaction that is rolled back if it raises. The
+        connection runs in autocommit mode otherwise, where ``begin`` does not
+        make anything atomic, so the block switches to the dialect's
+        transaction isolation level.
+        """
+        connection = self.connection
+        # End the transaction autocommit mode implicitly began
+        connection.commit()
+        connection.execution_options(isolation_level=self.sql.TRANSACTION_ISOLATION_LEVEL)
+        try:
+            with connection.begin():
+                yield connection
+        finally:
+            connection.execution_options(isolation_level="AUTOCOMMIT")
 
     def create_database(self):
         """Creates the CDC management database if it doesn't exist."""
@@ -157,10 +279,329 @@ class DatabaseConnection:
             )
         )
 
-    def create_dataset_table(self, d_name: str) -> bool:
+        # Create Column Statistics table
+        column_stats_columns = [
+            {"name": "cs_id", "type": "int IDENTITY(1,1)"},
+            {"name": "dv_id", "type": "int NOT NULL"},
+            {"name": "cs_column_name", "type": "varchar(20) NOT NULL"},
+            {"name": "cs_null_count", "type": "bigint NOT NULL"},
+            {"name": "cs_distinct_estimate", "type": "bigint NOT NULL"},
+            {"name": "cs_min_value", "type": "varchar(255)"},
+            {"name": "cs_max_value", "type": "varchar(255)"},
+            {"name": "cs_top_values", "type": "varchar(MAX)"},
+        ]
+        column_stats_foreign_keys = [
+            {
+                "column": "dv_id",
+                "reference_table": "Dataset_Versions",
+                "reference_column": "dv_id",
+                "constraint_name": "FK_ColumnStatistics_DatasetVersions",
+            }
+        ]
+        self.execute(
+            self.sql.create_table_if_not_exists(
+                "Column_Statistics",
+                column_stats_columns,
+                foreign_keys=column_stats_foreign_keys,
+                primary_key=["cs_id"],
+            )
+        )
+
+        # Create Dataset Branches table. A branch starts at a version of its
+        # dataset and shares that version's rows until it diverges.
+        branches_columns = [
+            {"name": "d_name", "type": "varchar(20) NOT NULL"},
+            {"name": "db_name", "type": "varchar(50) NOT NULL"},
+            {"name": "db_base_dv_id", "type": "int NOT NULL"},
+            {"name": "db_description", "type": "varchar(50)"},
+            {
+                "name": "db_createdat",
+                "type": "datetime NOT NULL DEFAULT CURRENT_TIMESTAMP",
+            },
+        ]
+        branches_foreign_keys = [
+            {
+                "column": "d_name",
+                "reference_table": "Datasets",
+                "reference_column": "d_name",
+                "constraint_name": "FK_DatasetBranches_Datasets",
+            },
+            {
+                "column": "db_base_dv_id",
+                "reference_table": "Dataset_Versions",
+                "reference_column": "dv_id",
+                "constraint_name": "FK_DatasetBranches_DatasetVersions",
+            },
+        ]
+        self.execute(
+            self.sql.create_table_if_not_exists(
+                "Dataset_Branches",
+                branches_columns,
+                foreign_keys=branches_foreign_keys,
+                primary_key=["d_name", "db_name"],
+            )
+        )
+
+        # Create Ingest Checkpoints table. Each row tracks a resumable ingest whose
+        # staged data has not been published yet.
+        checkpoints_columns = [
+            {"name": "ic_id", "type": "int IDENTITY(1,1)"},
+            {"name": "d_name", "type": "varchar(20) NOT NULL"},
+            {"name": "ic_key", "type": "varchar(255) NOT NULL"},
+            {"name": "ic_staging_table", "type": "varchar(128) NOT NULL"},
+            {"name": "ic_rows_staged", "type": "bigint NOT NULL DEFAULT 0"},
+            {"name": "ic_columns", "type": "varchar(MAX)"},
+            {"name": "ic_statistics", "type": "varbinary(MAX)"},
+            {
+                "name": "ic_updatedat",
+                "type": "datetime NOT NULL DEFAULT CURRENT_TIMESTAMP",
+            },
+        ]
+        checkpoints_foreign_keys = [
+            {
+                "column": "d_name",
+                "reference_table": "Datasets",
+                "reference_column": "d_name",
+                "constraint_name": "FK_IngestCheckpoints_Datasets",
+            }
+        ]
+        self.execute(
+            self.sql.create_table_if_not_exists(
+                "Ingest_Checkpoints",
+                checkpoints_columns,
+                foreign_keys=checkpoints_foreign_keys,
+                primary_key=["ic_id"],
+            )
+        )
+
+        # Create Schemas and Schema Columns tables. Versions with the same ordered
+        # columns and types share one schema, found by its fingerprint.
+        schemas_columns = [
+            {"name": "s_id", "type": "int IDENTITY(1,1)"},
+            {"name": "s_fingerprint", "type": "char(64) NOT NULL UNIQUE"},
+            {"name": "s_column_count", "type": "int NOT NULL"},
+        ]
+        self.execute(
+            self.sql.create_table_if_not_exists(
+                "Schemas", schemas_columns, primary_key=["s_id"]
+            )
+        )
+        schema_columns_columns = [
+            {"name": "s_id", "type": "int NOT NULL"},
+            {"name": "sc_position", "type": "int NOT NULL"},
+            {"name": "sc_column_name", "type": "varchar(20) NOT NULL"},
+            {"name": "sc_type", "type": "varchar(50) NOT NULL"},
+        ]
+        schema_columns_foreign_keys = [
+            {
+                "column": "s_id",
+                "reference_table": "Schemas",
+                "reference_column": "s_id",
+                "constraint_name": "FK_SchemaColumns_Schemas",
+            }
+        ]
+        self.execute(
+            self.sql.create_table_if_not_exists(
+                "Schema_Columns",
+                schema_columns_columns,
+                foreign_keys=schema_columns_foreign_keys,
+                primary_key=["s_id", "sc_position"],
+            )
+        )
+
+        # Create Dataset Columns table: the columns of each dataset table, kept up
+        # to date as versions add columns and compaction drops them
+        dataset_columns_columns = [
+            {"name": "d_name", "type": "varchar(20) NOT NULL"},
+            {"name": "dc_column_name", "type": "varchar(20) NOT NULL"},
+        ]
+        dataset_columns_foreign_keys = [
+            {
+                "column": "d_name",
+                "reference_table": "Datasets",
+                "reference_column": "d_name",
+                "constraint_name": "FK_DatasetColumns_Datasets",
+            }
+        ]
+        self.execute(
+            self.sql.create_table_if_not_exists(
+                "Dataset_Columns",
+                dataset_columns_columns,
+                foreign_keys=dataset_columns_foreign_keys,
+                primary_key=["d_name", "dc_column_name"],
+            )
+        )
+
+        # Create Version Archives table. Archived versions have their rows in a
+        # compressed file instead of the connection table.
+        archives_columns = [
+            {"name": "dv_id", "type": "int NOT NULL"},
+            {"name": "va_path", "type": "varchar(1024) NOT NULL"},
+            {"name": "va_rows", "type": "bigint NOT NULL"},
+            {"name": "va_bytes", "type": "bigint NOT NULL"},
+            {
+                "name": "va_archivedat",
+                "type": "datetime NOT NULL DEFAULT CURRENT_TIMESTAMP",
+            },
+        ]
+        archives_foreign_keys = [
+            {
+                "column": "dv_id",
+                "reference_table": "Dataset_Versions",
+                "reference_column": "dv_id",
+                "constraint_name": "FK_VersionArchives_DatasetVersions",
+            }
+        ]
+        self.execute(
+            self.sql.create_table_if_not_exists(
+                "Version_Archives",
+                archives_columns,
+                foreign_keys=archives_foreign_keys,
+                primary_key=["dv_id"],
+            )
+        )
+
+        # Create Upload Jobs table. Uploads run in the background; each job records
+        # its progress here so any session can follow it.
+        upload_jobs_columns = [
+            {"name": "uj_id", "type": "int IDENTITY(1,1)"},
+            {"name": "d_name", "type": "varchar(20) NOT NULL"},
+            {"name": "uj_file_name", "type": "varchar(255)"},
+            {"name": "uj_description", "type": "varchar(50)"},
+            {"name": "uj_branch", "type": "varchar(50)"},
+            {"name": "uj_status", "type": "varchar(20) NOT NULL DEFAULT 'queued'"},
+            {"name": "uj_phase", "type": "varchar(20)"},
+            {"name": "uj_rows", "type": "bigint NOT NULL DEFAULT 0"},
+            {"name": "uj_version_id", "type": "int"},
+            {"name": "uj_error", "type": "varchar(MAX)"},
+            {
+                "name": "uj_createdat",
+                "type": "datetime NOT NULL DEFAULT CURRENT_TIMESTAMP",
+            },
+            {
+                "name": "uj_updatedat",
+                "type": "datetime NOT NULL DEFAULT CURRENT_TIMESTAMP",
+            },
+        ]
+        self.execute(
+            self.sql.create_table_if_not_exists(
+                "Upload_Jobs", upload_jobs_columns, primary_key=["uj_id"]
+            )
+        )
+
+        # Add columns introduced after the initial schema to existing databases
+        added_columns = {
+            "Datasets": [
+                {"name": "d_retention_policy", "type": "varchar(255) NULL"},
+                {"name": "d_storage_layout", "type": "varchar(20) NULL"},
+                {"name": "d_compression", "type": "varchar(20) NULL"},
+                {"name": "d_partitioned", "type": "bit NULL"},
+            ],
+            "Dataset_Versions": [
+                {"name": "dv_tag", "type": "varchar(50) NULL"},
+                {"name": "dv_row_count", "type": "bigint NULL"},
+                {"name": "dv_branch", "type": "varchar(50) NULL"},
+                {"name": "dv_parent_id", "type": "int NULL"},
+                {"name": "dv_fingerprint", "type": "varchar(48) NULL"},
+                {"name": "dv_alias_of", "type": "int NULL"},
+                {"name": "s_id", "type": "int NULL"},
+            ],
+            "Ingest_Checkpoints": [
+                {"name": "ic_fingerprint", "type": "varchar(MAX) NULL"},
+            ],
+        }
+        for table_name, columns in added_columns.items():
+            for column in columns:
+                self.execute(self.sql.add_column_if_not_exists(table_name, column))
+        # Compaction drops unused schemas; the constraint keeps it from dropping
+        # one a version still uses
+        self.execute(
+            self.sql.add_foreign_key_if_not_exists(
+                "Dataset_Versions",
+                {
+                    "column": "s_id",
+                    "reference_table": "Schemas",
+                    "reference_column": "s_id",
+                    "constraint_name": "FK_DatasetVersions_Schemas",
+                },
+            )
+        )
+
+        # Datasets created before columns were tracked: collect the columns of
+        # their versions once
+        self.execute(
+            """
+            INSERT INTO Dataset_Columns (d_name, dc_column_name)
+            SELECT v.d_name, v.column_name
+            FROM (
+                SELECT dv.d_name, cd.cd_column_name AS column_name
+                FROM Column_Definition cd
+                JOIN Dataset_Versions dv ON cd.dv_id = dv.dv_id
+                UNION
+                SELECT dv.d_name, sc.sc_column_name
+                FROM Schema_Columns sc
+                JOIN Dataset_Versions dv ON sc.s_id = dv.s_id
+            ) v
+            WHERE NOT EXISTS (
+                SELECT 1 FROM Dataset_Columns dc WHERE dc.d_name = v.d_name
+            )
+        """
+        )
+
+    @staticmethod
+    def _check_compression(storage_layout: str, compression: str):
+        if compression not in ("none", "row", "page", "columnstore"):
+            raise ValueError(f"Unknown compression: {compression}")
+        # SQL Server cannot compress tables with sparse columns, and columnstore
+        # indexes do not support them either
+        if storage_layout == "sparse" and compression != "none":
+            raise ValueError("Sparse datasets cannot be compressed")
+
+    def _dataset_table_compressions(
+        self, d_name: str, compression: str
+    ) -> List[Tuple[str, str, List[str], List[Dict[str, str]]]]:
+        """
+        Lists (table, compression, primary key, referencing foreign keys) for the
+        tables of a dataset. The connection table is always a rowstore: versions
+        are looked up in it by key, so a columnstore dataset gets a page compressed
+        connection table.
+        """
+        return [
+            (
+                d_name,
+                compression,
+                ["data_id"],
+                [
+                    {
+                        "table": f"{d_name}_connection",
+                        "constraint_name": f"FK_{d_name}_connection_data",
+                        "column": "data_id",
+                        "reference_column": "data_id",
+                    }
+                ],
+            ),
+            (
+                f"{d_name}_connection",
+                "page" if compression == "columnstore" else compression,
+                ["data_id", "dv_id"],
+                [],
+            ),
+        ]
+
+    def create_dataset_table(
+        self,
+        d_name: str,
+        storage_layout: str = "standard",
+        compression: str = "none",
+        partitioned: bool = False,
+    ) -> bool:
         try:
-            # Create main dataset table
+            # Create main dataset table. The sparse layout stores every data column
+            # as a sparse column, which allows far wider tables and keeps rows
+            # narrow when most columns are NULL.
             initial_columns = [{"name": "data_id", "type": "int IDENTITY(1,1)"}]
+            if storage_layout == "sparse":
+                initial_columns.append(self.sql.sparse_column_set())
             self.execute(
                 self.sql.create_table_if_not_exists(
                     d_name, initial_columns, primary_key=["data_id"]
@@ -195,12 +636,34 @@ class DatabaseConnection:
                 )
             )
 
+            # Converting the still empty tables is instant
+            if compression != "none":
+                for table_name, table_compression, primary_key, foreign_keys in (
+                    self._dataset_table_compressions(d_name, compression)
+                ):
+                    self.execute(
+                        self.sql.set_table_compression(
+                            table_name, table_compression, primary_key, foreign_keys
+                        )
+                    )
+            if partitioned:
+                self.execute(
+                    self.sql.partition_table(
+                        f"{d_name}_connection",
+                        "dv_id",
+                        ["data_id", "dv_id"],
+                        [],
+                        self._dataset_table_compressions(d_name, compression)[1][1],
+                    )
+                )
+
             return True
         except Exception as e:
             print(f"Error creating dataset tables: {str(e)}")
             return False
 
-    def infer_sql_types(self, df: pd.DataFrame) -> List[Dict[str, str]]:
+    @classmethod
+    def infer_sql_types(cls, df: pd.DataFrame) -> List[Dict[str, str]]:
         """
         Infer SQL Server data types from pandas DataFrame columns.
 
@@ -226,383 +689,3062 @@ class DatabaseConnection:
                 sql_type = "varchar(MAX)"
             else:
                 # Use the mapping dictionary with a default to varchar(255)
-                sql_type = self.dtype_mapping.get(dtype_str, "varchar(255)")
+                sql_type = cls.dtype_mapping.get(dtype_str, "varchar(255)")
 
             columns.append({"name": column_name, "type": sql_type})
 
         return columns
 
     def insert_dataset_in_database(
-        self, d_name: str, df: pd.DataFrame, description: Optional[str] = None
+        self,
+        d_name: str,
+        df: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+        description: Optional[str] = None,
+        storage_layout: str = "standard",
+        progress: Optional[Callable[[str, int], None]] = None,
+        row_index: Optional[RowHashIndex] = None,
+        checkpoint_key: Optional[str] = None,
+        checkpoint_rows: int = 1000000,
+        compression: str = "none",
+        partitioned: bool = False,
     ) -> Optional[int]:
         """
         Inserts a new dataset into the Datasets table and creates a new version.
 
         Args:
             d_name: Name of the dataset
+            df: Data of the first version, as a DataFrame or DataFrame chunks
             description: Optional description of the dataset
+            storage_layout: "standard" for one regular column per field, or "sparse"
+                            for wide or volatile schemas
+            progress: Optional progress callback, see ``insert_new_version``
+            row_index: Optional client-side row index, see ``insert_new_version``
+            checkpoint_key: Stage resumably, see ``insert_new_version``. If staging
+                            fails, resume with ``insert_new_version`` since the
+                            dataset already exists.
+            checkpoint_rows: Input rows staged per committed checkpoint
+            compression: Storage format of the dataset tables, see
+                         ``set_dataset_compression``
+            partitioned: Partition the connection table by version, see
+                         ``set_connection_partitioning``
 
         Returns:
             str: Dataset name if successful, None if failed
         """
         try:
+            self._check_compression(storage_layout, compression)
 
             # Insert into Datasets table
             self.execute(
-                f"""
-                INSERT INTO Datasets (d_name, d_description)
-                VALUES ('{d_name}', 'Initial dataset')
-            """
+                """
+                INSERT INTO Datasets (
+                    d_name, d_description, d_storage_layout, d_compression, d_partitioned
+                )
+                VALUES (
+                    :d_name, 'Initial dataset', :storage_layout, :compression, :partitioned
+                )
+            """,
+                {
+                    "d_name": d_name,
+                    "storage_layout": storage_layout,
+                    "compression": compression,
+                    "partitioned": partitioned,
+                },
             )
 
             # Create initial version
             self.execute(
-                f"""
+                """
                 INSERT INTO Dataset_Versions (d_name,dv_name, dv_description)
-                VALUES ('{d_name}',1, 'Initial version')
-            """
+                VALUES (:d_name,1, 'Initial version')
+            """,
+                {"d_name": d_name},
+            )
+            if not self.create_dataset_table(
+                d_name, storage_layout, compression, partitioned
+            ):
+                return None
+            return self.insert_new_version(
+                d_name,
+                df,
+                description,
+                progress,
+                row_index,
+                checkpoint_key=checkpoint_key,
+                checkpoint_rows=checkpoint_rows,
             )
-            self.create_dataset_table(d_name)
-            return self.insert_new_version(d_name, df, description)
 
         except Exception as e:
             print(f"Error inserting dataset: {str(e)}")
             return None
 
-    def add_column_definitions(self, dv_id: int, column_names: List[str]) -> bool:
+    @staticmethod
+    def _schema_fingerprint(columns: List[Dict[str, str]]) -> str:
+        """Hashes the ordered column names and types of a schema."""
+        schema = "\x1f".join(f"{col['name']}\x1e{col['type']}" for col in columns)
+        return hashlib.sha256(schema.encode("utf-8")).hexdigest()
+
+    def get_schema_id(self, columns: List[Dict[str, str]]) -> int:
+        """
+        Gets the ID of the shared schema with the given ordered columns and types,
+        creating the schema if no version used it before. An unchanged schema costs
+        a single lookup. Must run inside a transaction: the lookup holds a key-range
+        lock until it ends, so concurrent publishes of a new schema wait for the
+        first one instead of both inserting it.
+
+        Args:
+            columns: Column names and SQL types, in order
+
+        Returns:
+            int: Schema ID
+        """
+        fingerprint = self._schema_fingerprint(columns)
+        schema_id = self.execute(
+            """
+            SELECT s_id FROM Schemas WITH (UPDLOCK, HOLDLOCK)
+            WHERE s_fingerprint = :fingerprint
+        """,
+            {"fingerprint": fingerprint},
+        ).scalar()
+        if schema_id is not None:
+            return schema_id
+
+        schema_id = self.execute(
+            """
+            INSERT INTO Schemas (s_fingerprint, s_column_count)
+            OUTPUT INSERTED.s_id
+            VALUES (:fingerprint, :column_count)
+        """,
+            {"fingerprint": fingerprint, "column_count": len(columns)},
+        ).scalar()
+        if columns:
+            self.execute(
+                """
+                INSERT INTO Schema_Columns (s_id, sc_position, sc_column_name, sc_type)
+                VALUES (:s_id, :position, :column_name, :column_type)
+            """,
+                [
+                    {
+                        "s_id": schema_id,
+                        "position": position,
+                        "column_name": col["name"],
+                        "column_type": col["type"],
+                    }
+                    for position, col in enumerate(columns)
+                ],
+            )
+        return schema_id
+
+    def add_column_statistics(self, dv_id: int, statistics: List[Dict]):
         """
-        Adds column definitions for a dataset version.
+        Stores the column statistics of a dataset version. Must run inside the
+        publish transaction: errors are raised, so a version is never published
+        without its statistics.
 
         Args:
             dv_id: Dataset version ID
-            column_names: List of column names to add
+            statistics: Column statistics as returned by ``ColumnStatistics.results``
+        """
+        if statistics:
+            self.execute(
+                """
+                INSERT INTO Column_Statistics (
+                    dv_id, cs_column_name, cs_null_count, cs_distinct_estimate,
+                    cs_min_value, cs_max_value, cs_top_values
+                )
+                VALUES (
+                    :dv_id, :column_name, :null_count, :distinct_estimate,
+                    :min_value, :max_value, :top_values
+                )
+            """,
+                [
+                    {
+                        **stats,
+                        "dv_id": dv_id,
+                        "top_values": json.dumps(stats["top_values"]),
+                    }
+                    for stats in statistics
+                ],
+            )
+
+    def get_version_statistics(self, version_id: int) -> List[Dict]:
+        """
+        Gets the precomputed column statistics of a version without reading its data.
+
+        Args:
+            version_id: Version ID to get statistics for
 
         Returns:
-            bool: True if successful, False otherwise
+            List[Dict]: One dictionary per column with null_count, distinct_estimate,
+                        min_value, max_value and top_values
         """
         try:
-            for column_name in column_names:
-                self.execute(
-                    f"""
-                    INSERT INTO Column_Definition (dv_id, cd_column_name)
-                    VALUES ({dv_id}, '{column_name}')
+            result = self.execute(
                 """
-                )
-            return True
+                SELECT cs_column_name, cs_null_count, cs_distinct_estimate,
+                       cs_min_value, cs_max_value, cs_top_values
+                FROM Column_Statistics
+                WHERE dv_id = :version_id
+                ORDER BY cs_id
+            """,
+                {"version_id": version_id},
+            ).fetchall()
+            return [
+                {
+                    "column_name": row[0],
+                    "null_count": row[1],
+                    "distinct_estimate": row[2],
+                    "min_value": row[3],
+                    "max_value": row[4],
+                    "top_values": json.loads(row[5]) if row[5] else [],
+                }
+                for row in result
+            ]
         except Exception as e:
-            print(f"Error adding column definitions: {str(e)}")
-            return False
+            if self._raise_errors:
+                raise
+            print(f"Error getting version statistics: {str(e)}")
+            return []
 
-    def get_latest_version_name(self, d_name: str) -> Optional[int]:
+    @staticmethod
+    def _branch_clause(branch: Optional[str]) -> str:
+        """Filters Dataset_Versions on a branch; the main lineage has no branch."""
+        return "dv_branch IS NULL" if branch is None else "dv_branch = :branch"
+
+    def get_branch_head(
+        self, d_name: str, branch: Optional[str] = None
+    ) -> Optional[Tuple[int, int]]:
         """
-        Gets the latest version details for a dataset.
+        Gets the latest version of a branch. A branch without versions of its own
+        is headed by the version it was created from.
 
         Args:
             d_name: Name of the dataset
+            branch: Branch name, None for the main lineage
 
         Returns:
-            int: Latest version ID if exists, None otherwise
+            Optional[Tuple[int, int]]: (dv_id, dv_name) of the head, None if the
+                                       branch does not exist
         """
-        try:
-            # select latest row version dv_name
+        params = {"d_name": d_name, "branch": branch}
+        result = self.execute(
+            f"""
+            SELECT TOP 1 dv_id, dv_name
+            FROM Dataset_Versions
+            WHERE d_name = :d_name AND {self._branch_clause(branch)}
+            ORDER BY dv_createdat DESC
+        """,
+            params,
+        ).fetchone()
+        if result is None and branch is not None:
             result = self.execute(
-                f"""
-                SELECT TOP 1 dv_name
-                FROM Dataset_Versions
-                WHERE d_name = '{d_name}'
-                ORDER BY dv_createdat DESC
-            """
+                """
+                SELECT dv.dv_id, dv.dv_name
+                FROM Dataset_Branches b
+                JOIN Dataset_Versions dv ON dv.dv_id = b.db_base_dv_id
+                WHERE b.d_name = :d_name AND b.db_name = :branch
+            """,
+                params,
             ).fetchone()
+        return (result[0], result[1]) if result else None
+
+    def get_latest_version_name(
+        self, d_name: str, branch: Optional[str] = None
+    ) -> Optional[int]:
+        """
+        Gets the latest version details for a dataset.
+
+        Args:
+            d_name: Name of the dataset
+            branch: Branch name, None for the main lineage
 
-            return result[0] if result else None
+        Returns:
+            int: Latest version ID if exists, None otherwise
+        """
+        try:
+            head = self.get_branch_head(d_name, branch)
+            return head[1] if head else None
         except Exception as e:
             print(f"Error getting latest version ID: {str(e)}")
             return None
 
-    def get_existing_columns(self, d_name: str) -> List[str]:
+    def get_storage_layout(self, d_name: str) -> str:
         """
-        Gets all existing columns for a dataset across all versions.
+        Gets the storage layout of a dataset table.
 
         Args:
             d_name: Name of the dataset
 
         Returns:
-            List[str]: List of existing column names
+            str: "sparse" or "standard"
         """
-        try:
-            result = self.execute(
-                f"""
-                SELECT DISTINCT cd_column_name
-                FROM Column_Definition cd
-                JOIN Dataset_Versions dv ON cd.dv_id = dv.dv_id
-                WHERE dv.d_name = '{d_name}'
+        result = self.execute(
             """
-            ).fetchall()
-            return [row[0] for row in result]
-        except Exception as e:
-            print(f"Error getting existing columns: {str(e)}")
-            return []
+            SELECT d_storage_layout
+            FROM Datasets
+            WHERE d_name = :d_name
+        """,
+            {"d_name": d_name},
+        ).fetchone()
+        return result[0] if result and result[0] else "standard"
+
+    def get_dataset_compression(self, d_name: str) -> str:
+        """
+        Gets the storage format of a dataset's tables.
 
-    def insert_new_version(
-        self, d_name: str, df: pd.DataFrame, description: Optional[str] = None
-    ) -> Optional[int]:
+        Args:
+            d_name: Name of the dataset
+
+        Returns:
+            str: "none", "row", "page" or "columnstore"
         """
-        Inserts a new version of a dataset, handling data deduplication, relationships,
-        and tracking column changes.
+        result = self.execute(
+            "SELECT d_compression FROM Datasets WHERE d_name = :d_name",
+            {"d_name": d_name},
+        ).fetchone()
+        return result[0] if result and result[0] else "none"
+
+    def get_dataset_size_kb(self, d_name: str) -> int:
+        """Gets the space reserved by a dataset's data and connection tables, in KB."""
+        return self._get_storage_size_kb([d_name, f"{d_name}_connection"])
+
+    def set_dataset_compression(
+        self, d_name: str, compression: str, online: bool = True
+    ) -> Optional[Dict]:
+        """
+        Converts the tables of an existing dataset to another storage format:
+
+            none:        uncompressed rowstore
+            row:         row compressed rowstore
+            page:        page compressed rowstore
+            columnstore: clustered columnstore data table, best for full-version
+                         analytical reads; the connection table is page compressed
+
+        Tables are rebuilt one after the other. With ``online``, conversions between
+        rowstore formats keep the tables readable and writable (this needs an
+        edition of the server that supports online index operations). Switching
+        between rowstore and columnstore is not fully online: the primary key and
+        foreign keys are recreated in one transaction, which blocks the data and
+        connection tables until it commits.
 
         Args:
             d_name: Name of the dataset
-            df: DataFrame containing the new data
-            description: Optional description of the new version
+            compression: Target storage format
+            online: Rebuild online
 
         Returns:
-            int: New version ID if successful, None if failed
+            Optional[Dict]: Previous and new format with the size of the dataset
+                            tables in KB before and after, or None if an error occurs
         """
         try:
-            self.connection.commit()
-            # Start transaction
-            with self.connection.begin():
-
-                # Create temporary staging table with same structure as main table
-                staging_table = f"{d_name}_staging"
-                columns = self.infer_sql_types(df)
-                columns_sql = ", ".join(
-                    [f"[{col['name']}] {col['type']}" for col in columns]
-                )
+            self._check_compression(self.get_storage_layout(d_name), compression)
+            previous = self.get_dataset_compression(d_name)
+            size_before = self.get_dataset_size_kb(d_name)
 
+            self.connection.commit()
+            for table_name, table_compression, primary_key, foreign_keys in (
+                self._dataset_table_compressions(d_name, compression)
+            ):
                 self.execute(
-                    f"""
+                    self.sql.set_table_compression(
+                        table_name, table_compression, primary_key, foreign_keys, online
+                    )
+                )
+            self.execute(
+                "UPDATE Datasets SET d_compression = :compression WHERE d_name = :d_name",
+                {"compression": compression, "d_name": d_name},
+            )
+            self.connection.commit()
+
+            report = {
+                "previous_compression": previous,
+                "compression": compression,
+                "size_before_kb": size_before,
+                "size_after_kb": self.get_dataset_size_kb(d_name),
+            }
+            print(f"Storage conversion of {d_name}: {report}")
+            return report
+        except Exception as e:
+            print(f"Error converting dataset storage: {str(e)}")
+            return None
+
+    def is_connection_partitioned(self, d_name: str) -> bool:
+        """Checks whether a dataset's connection table is partitioned by version."""
+        result = self.execute(
+            "SELECT d_partitioned FROM Datasets WHERE d_name = :d_name",
+            {"d_name": d_name},
+        ).fetchone()
+        return bool(result and result[0])
+
+    def set_connection_partitioning(self, d_name: str, online: bool = True) -> bool:
+        """
+        Partitions the connection table of an existing dataset by version: each
+        version's connection rows get a partition of their own, so reading a
+        version only touches its partition and deleting or archiving it empties
+        the partition instead of deleting rows one by one. New versions get their
+        partition when they are published.
+
+        The connection table is rebuilt once on the partition scheme. With
+        ``online`` the rebuild keeps the table readable and writable.
+
+        Args:
+            d_name: Name of the dataset
+            online: Rebuild online
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            if self.is_connection_partitioned(d_name):
+                return True
+            boundaries = [
+                row[0]
+                for row in self.execute(
+                    """
+                    SELECT dv_id
+                    FROM Dataset_Versions
+                    WHERE d_name = :d_name AND dv_alias_of IS NULL
+                """,
+                    {"d_name": d_name},
+                ).fetchall()
+            ]
+            compression = self._dataset_table_compressions(
+                d_name, self.get_dataset_compression(d_name)
+            )[1][1]
+
+            self.connection.commit()
+            self.execute(
+                self.sql.partition_table(
+                    f"{d_name}_connection",
+                    "dv_id",
+                    ["data_id", "dv_id"],
+                    boundaries,
+                    compression,
+                    online,
+                )
+            )
+            self.execute(
+                "UPDATE Datasets SET d_partitioned = 1 WHERE d_name = :d_name",
+                {"d_name": d_name},
+            )
+            self.connection.commit()
+            return True
+        except Exception as e:
+            print(f"Error partitioning connection table: {str(e)}")
+            return False
+
+    def _add_version_partition(self, d_name: str):
+        """
+        Starts an empty partition for the next version of a partitioned dataset,
+        in its own short autocommit step before the publish transaction, so the
+        schema lock of the split is not held while the version is published. The
+        boundary is just above the dataset's highest version ID: the next version
+        gets a higher ID, so its rows land in the new partition, and no stored row
+        moves. A partition left empty by a failed publish is reused by the next.
+        """
+        if not self.is_connection_partitioned(d_name):
+            return
+        boundary = self.execute(
+            "SELECT MAX(dv_id) + 1 FROM Dataset_Versions WHERE d_name = :d_name",
+            {"d_name": d_name},
+        ).scalar()
+        if boundary is not None:
+            self.execute(self.sql.split_partition(f"{d_name}_connection", boundary))
+
+    def _delete_version_rows(self, d_name: str, version_id: int, batch_size: int) -> int:
+        """
+        Deletes the connection rows of a version. On a partitioned connection table
+        the version's partition is truncated and merged when no other version
+        shares it; otherwise rows are deleted in batches.
+
+        Returns:
+            int: Number of deleted rows
+        """
+        table_name = f"{d_name}_connection"
+        params = {"version_id": version_id, "d_name": d_name}
+        if self.is_connection_partitioned(d_name):
+            partition, lower, upper = self.execute(
+                self.sql.partition_range(table_name), {"value": version_id}
+            ).fetchone()
+            shared = self.execute(
+                """
+                SELECT COUNT(*)
+                FROM Dataset_Versions
+                WHERE d_name = :d_name AND dv_id <> :version_id
+                    AND dv_alias_of IS NULL
+                    AND dv_id >= COALESCE(:lower, dv_id)
+                    AND dv_id < COALESCE(:upper, dv_id + 1)
+                    AND dv_id NOT IN (SELECT dv_id FROM Version_Archives)
+            """,
+                {**params, "lower": lower, "upper": upper},
+            ).scalar()
+            if not shared:
+                rows = self.execute(
+                    f"SELECT COUNT(*) FROM [{table_name}] WHERE dv_id = :version_id",
+                    params,
+                ).scalar()
+                self.connection.commit()
+                self.execute(self.sql.truncate_partition(table_name, partition, lower))
+                self.connection.commit()
+                return rows
+
+        return self._delete_in_batches(
+            table_name, "t.dv_id = :version_id", batch_size, params
+        )
+
+    def get_dataset_row_state(self, d_name: str, since_data_id: int = 0) -> Dict[str, int]:
+        """
+        Gets the row count and highest data_id of a dataset table, used to tell
+        whether a client-side row index is still in sync with it.
+
+        Args:
+            d_name: Name of the dataset
+            since_data_id: Also count the rows with a data_id above this one
+
+        Returns:
+            Dict[str, int]: row_count, max_data_id and rows_since
+        """
+        result = self.execute(
+            f"""
+            SELECT COUNT_BIG(*),
+                   COALESCE(MAX(data_id), 0),
+                   COUNT_BIG(CASE WHEN data_id > :since_data_id THEN 1 END)
+            FROM [{d_name}]
+        """,
+            {"since_data_id": since_data_id},
+        ).fetchone()
+        return {"row_count": result[0], "max_data_id": result[1], "rows_since": result[2]}
+
+    def iter_dataset_rows(
+        self, d_name: str, since_data_id: int = 0, chunksize: int = 100000
+    ) -> Iterable[pd.DataFrame]:
+        """
+        Reads all stored rows of a dataset table with a data_id above
+        ``since_data_id``, in chunks ordered by data_id.
+
+        Args:
+            d_name: Name of the dataset
+            since_data_id: Only read rows with a higher data_id
+            chunksize: Rows per returned DataFrame
+
+        Returns:
+            Iterable[pd.DataFrame]: Chunks with a data_id column and all data columns
+        """
+        table_columns = [
+            row[0] for row in self.execute(self.sql.get_table_columns(d_name)).fetchall()
+        ]
+        columns_str = ", ".join(f"[{col}]" for col in table_columns)
+        return pd.read_sql(
+            _statement(
+                f"""
+            SELECT {columns_str}
+            FROM [{d_name}]
+            WHERE data_id > :since_data_id
+            ORDER BY data_id
+        """
+            ),
+            self.connection,
+            params={"since_data_id": since_data_id},
+            chunksize=chunksize,
+        )
+
+    def get_existing_columns(self, d_name: str) -> List[str]:
+        """
+        Gets all existing columns for a dataset across all versions, from the
+        columns tracked in Dataset_Columns. Columns of deleted versions are included
+        until the dataset is compacted.
+
+        Args:
+            d_name: Name of the dataset
+
+        Returns:
+            List[str]: List of existing column names
+        """
+        try:
+            params = {"d_name": d_name}
+            query = "SELECT dc_column_name FROM Dataset_Columns WHERE d_name = :d_name"
+            result = self.execute(query, params).fetchall()
+            return [row[0] for row in result]
+        except Exception as e:
+            print(f"Error getting existing columns: {str(e)}")
+            return []
+
+    @staticmethod
+    def _wider_sql_type(current: str, other: str) -> str:
+        """Returns a SQL type able to hold the values of both given types."""
+        if current == other:
+            return current
+        numeric_types = ["bit", "int", "bigint", "float"]
+        if current in numeric_types and other in numeric_types:
+            return max(current, other, key=numeric_types.index)
+        if "varchar(MAX)" in (current, other):
+            return "varchar(MAX)"
+        return "varchar(255)"
+
+    def _stage_chunks(
+        self,
+        staging_table: str,
+        chunks: Iterable[pd.DataFrame],
+        statistics: ColumnStatistics,
+        progress: Optional[Callable[[str, int], None]] = None,
+        row_index: Optional[RowHashIndex] = None,
+        columns: Optional[List[Dict[str, str]]] = None,
+        fingerprint: Optional[ContentFingerprint] = None,
+        row_hashes: Optional[np.ndarray] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Streams DataFrame chunks into a new staging table, widening column types when
+        a later chunk needs it, and feeds every chunk to the statistics accumulator.
+        Passing the ``columns`` of an existing staging table appends to it instead.
+        A ``fingerprint`` accumulates the content fingerprint of the chunks.
+        ``row_hashes`` can pass the row fingerprints of the whole input, already
+        computed, by input row position (``statistics.row_count`` rows in).
+
+        With a row index, rows the server already stores are not staged; their
+        data_ids go to the ``{staging_table}_refs`` table instead, and staged rows
+        carry their fingerprint so the index can be updated after publishing.
+
+        Returns:
+            List[Dict[str, str]]: Final column names and SQL types of the staging table
+        """
+        for chunk in chunks:
+            chunk_columns = self.infer_sql_types(chunk)
+            if columns is None:
+                columns = chunk_columns
+                staging_columns = list(columns)
+                if row_index is not None:
+                    staging_columns.append(
+                        {"name": RowHashIndex.ROW_HASH_COLUMN, "type": "bigint"}
+                    )
+                    self.execute(
+                        f"CREATE TABLE {staging_table}_refs (data_id int NOT NULL)"
+                    )
+                columns_sql = ", ".join(
+                    [f"[{col['name']}] {col['type']}" for col in staging_columns]
+                )
+                self.execute(
+                    f"""
                     CREATE TABLE {staging_table} (
                         data_id int IDENTITY(1,1) PRIMARY KEY,
                         {columns_sql}
                     )
                 """
                 )
+            else:
+                for column, chunk_column in zip(columns, chunk_columns):
+                    wider_type = self._wider_sql_type(column["type"], chunk_column["type"])
+                    if wider_type != column["type"]:
+                        column["type"] = wider_type
+                        self.execute(self.sql.alter_column_type(staging_table, column))
+
+            hashes = None
+            if row_hashes is not None:
+                hashes = row_hashes[
+                    statistics.row_count : statistics.row_count + len(chunk)
+                ]
+            elif row_index is not None or fingerprint is not None:
+                hashes = RowHashIndex.hash_rows(chunk)
+            statistics.update(chunk)
+            if fingerprint is not None:
+                fingerprint.update(chunk, hashes, chunk_columns)
+            if row_index is not None:
+                known_ids = row_index.lookup(hashes)
+                known = known_ids >= 0
+                if known.any():
+                    pd.DataFrame({"data_id": np.unique(known_ids[known])}).to_sql(
+                        f"{staging_table}_refs",
+                        self.connection,
+                        if_exists="append",
+                        index=False,
+                    )
+                chunk = chunk[~known].assign(
+                    **{RowHashIndex.ROW_HASH_COLUMN: hashes[~known].view(np.int64)}
+                )
+            chunk.to_sql(
+                staging_table, self.connection, if_exists="append", index=False
+            )
+            if progress:
+                progress("stage", statistics.row_count)
+
+        if columns is None:
+            raise ValueError("No data to ingest")
+        return columns
+
+    @staticmethod
+    def _skip_rows(
+        chunks: Iterable[pd.DataFrame], rows: int
+    ) -> Iterator[pd.DataFrame]:
+        for chunk in chunks:
+            if rows >= len(chunk):
+                rows -= len(chunk)
+                continue
+            yield chunk.iloc[rows:] if rows else chunk
+            rows = 0
+
+    def _stage_checkpointed(
+        self,
+        d_name: str,
+        checkpoint_key: str,
+        chunks: Iterable[pd.DataFrame],
+        progress: Optional[Callable[[str, int], None]],
+        row_index: Optional[RowHashIndex],
+        checkpoint_rows: int,
+        row_hashes: Optional[np.ndarray] = None,
+    ) -> Tuple[int, str, List[Dict[str, str]], ColumnStatistics, ContentFingerprint]:
+        """
+        Stages chunks into the persistent staging table of a checkpoint, committing
+        every ``checkpoint_rows`` input rows. An existing checkpoint for the key is
+        resumed: its rows are skipped and its statistics, content fingerprint and
+        column types restored.
+
+        Returns:
+            Tuple: Checkpoint ID, staging table, staging columns, and the statistics
+                   and content fingerprint of all staged rows
+        """
+        params = {"d_name": d_name, "key": checkpoint_key}
+        checkpoint = self.execute(
+            """
+            SELECT ic_id, ic_staging_table, ic_rows_staged, ic_columns, ic_statistics,
+                   ic_fingerprint
+            FROM Ingest_Checkpoints
+            WHERE d_name = :d_name AND ic_key = :key
+        """,
+            params,
+        ).fetchone()
+
+        if checkpoint is None:
+            with self.transaction():
+                checkpoint_id = self.execute(
+                    """
+                    INSERT INTO Ingest_Checkpoints (d_name, ic_key, ic_staging_table)
+                    OUTPUT INSERTED.ic_id
+                    VALUES (:d_name, :key, '')
+                """,
+                    params,
+                ).scalar()
+                staging_table = f"{d_name}_staging_{checkpoint_id}"
+                self.execute(
+                    """
+                    UPDATE Ingest_Checkpoints
+                    SET ic_staging_table = :staging_table
+                    WHERE ic_id = :ic_id
+                """,
+                    {"staging_table": staging_table, "ic_id": checkpoint_id},
+                )
+            rows_staged, columns, statistics = 0, None, ColumnStatistics()
+            fingerprint = ContentFingerprint()
+        else:
+            checkpoint_id, staging_table, rows_staged = checkpoint[:3]
+            columns = json.loads(checkpoint[3]) if checkpoint[3] else None
+            try:
+                statistics = (
+                    ColumnStatistics.from_json(bytes(checkpoint[4]).decode("utf-8"))
+                    if checkpoint[4]
+                    else ColumnStatistics()
+                )
+                fingerprint = (
+                    ContentFingerprint.from_json(checkpoint[5])
+                    if checkpoint[5]
+                    else ContentFingerprint()
+                )
+            except ValueError:
+                raise ValueError(
+                    f"Checkpoint {checkpoint_id} was written in an older format; "
+                    "abort the ingest and start it again"
+                )
+            print(f"Resuming ingest of {d_name} after {rows_staged} staged rows")
+
+        remaining = self._skip_rows(chunks, rows_staged)
+        exhausted = False
+
+        def checkpoint_batch() -> Iterator[pd.DataFrame]:
+            nonlocal exhausted
+            batch_rows = 0
+            for chunk in remaining:
+                yield chunk
+                batch_rows += len(chunk)
+                if batch_rows >= checkpoint_rows:
+                    return
+            exhausted = True
+
+        while not exhausted:
+            with self.transaction():
+                columns = self._stage_chunks(
+                    staging_table,
+                    checkpoint_batch(),
+                    statistics,
+                    progress,
+                    row_index,
+                    columns,
+                    fingerprint,
+                    row_hashes,
+                )
+                self.execute(
+                    """
+                    UPDATE Ingest_Checkpoints
+                    SET ic_rows_staged = :rows_staged,
+                        ic_columns = :columns,
+                        ic_statistics = :statistics,
+                        ic_fingerprint = :fingerprint,
+                        ic_updatedat = CURRENT_TIMESTAMP
+                    WHERE ic_id = :ic_id
+                """,
+                    {
+                        "rows_staged": statistics.row_count,
+                        "columns": json.dumps(columns),
+                        "statistics": statistics.to_json().encode("utf-8"),
+                        "fingerprint": fingerprint.to_json(),
+                        "ic_id": checkpoint_id,
+                    },
+                )
+
+        return checkpoint_id, staging_table, columns, statistics, fingerprint
+
+    def get_ingest_checkpoints(self) -> List[Dict]:
+        """
+        Gets the resumable ingests that have not been published yet.
+
+        Returns:
+            List[Dict]: One dictionary per checkpoint with dataset, key, staging_table,
+                        rows_staged and updated_at
+        """
+        try:
+            result = self.execute(
+                """
+                SELECT d_name, ic_key, ic_staging_table, ic_rows_staged, ic_updatedat
+                FROM Ingest_Checkpoints
+                ORDER BY ic_updatedat
+            """
+            ).fetchall()
+            return [
+                {
+                    "dataset": row[0],
+                    "key": row[1],
+                    "staging_table": row[2],
+                    "rows_staged": row[3],
+                    "updated_at": row[4],
+                }
+                for row in result
+            ]
+        except Exception as e:
+            print(f"Error getting ingest checkpoints: {str(e)}")
+            return []
+
+    def abort_ingest(self, d_name: str, checkpoint_key: str) -> bool:
+        """
+        Discards a resumable ingest: drops its staging tables and its checkpoint.
+
+        Args:
+            d_name: Name of the dataset
+            checkpoint_key: Key the ingest was started with
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            params = {"d_name": d_name, "key": checkpoint_key}
+            staging_table = self.execute(
+                """
+                SELECT ic_staging_table
+                FROM Ingest_Checkpoints
+                WHERE d_name = :d_name AND ic_key = :key
+            """,
+                params,
+            ).scalar()
+            if staging_table is None:
+                return True
+
+            with self.transaction():
+                for table_name in (f"{staging_table}_refs", staging_table):
+                    self.execute(self.sql.drop_table_if_exists(table_name))
+                self.execute(
+                    "DELETE FROM Ingest_Checkpoints WHERE d_name = :d_name AND ic_key = :key",
+                    params,
+                )
+            return True
+        except Exception as e:
+            print(f"Error aborting ingest: {str(e)}")
+            return False
+
+    def _publish_version(
+        self,
+        d_name: str,
+        staging_table: str,
+        columns: List[Dict[str, str]],
+        statistics: ColumnStatistics,
+        description: Optional[str],
+        row_index: Optional[RowHashIndex],
+        branch: Optional[str],
+        fingerprint: Optional[str] = None,
+    ) -> Tuple[int, int, List]:
+        """
+        Publishes staged rows as a new version: deduplicates them into the dataset
+        table, connects them to the version, writes the version metadata and drops
+        the staging tables. Must run inside a transaction.
+
+        Returns:
+            Tuple[int, int, List]: New version ID, number of rows inserted into the
+                                   dataset table and, with a row index, the
+                                   (fingerprint, data_id) pairs of staged rows
+        """
+        indexed_rows = []
+        parent_id, parent_name = self.get_branch_head(d_name, branch)
+        # Create new version entry referencing its (usually shared) schema
+        result = self.execute(
+            """
+            INSERT INTO Dataset_Versions
+                (d_name, dv_name, dv_description, dv_row_count, dv_branch, dv_parent_id,
+                 dv_fingerprint, s_id)
+            OUTPUT INSERTED.dv_id
+            VALUES (:d_name, :dv_name, :description, :row_count, :branch, :parent_id,
+                    :fingerprint, :s_id)
+        """,
+            {
+                "d_name": d_name,
+                "dv_name": parent_name + 1,
+                "description": description or "New version",
+                "row_count": statistics.row_count,
+                "branch": branch,
+                "parent_id": parent_id,
+                "fingerprint": fingerprint,
+                "s_id": self.get_schema_id(columns),
+            },
+        ).fetchone()
+        new_version_id = result[0]
+
+        # Get existing columns
+        existing_columns = self.get_existing_columns(d_name)
+        current_columns = [col["name"] for col in columns]
+
+        # Identify new columns
+        new_columns = [
+            col for col in current_columns if col not in existing_columns
+        ]
+
+        # If there are new columns, alter the main table. Columns of deleted
+        # versions stay in the table until the dataset is compacted, so only
+        # add the ones the table does not have yet.
+        if new_columns:
+            table_columns = [
+                row[0]
+                for row in self.execute(
+                    self.sql.get_table_columns(d_name)
+                ).fetchall()
+            ]
+            added_columns = [
+                col
+                for col in columns
+                if col["name"] in new_columns and col["name"] not in table_columns
+            ]
+
+            if added_columns:
+                sparse = self.get_storage_layout(d_name) == "sparse"
+                max_columns = (
+                    self.sql.MAX_SPARSE_COLUMNS if sparse else self.sql.MAX_COLUMNS
+                )
+                # data_id counts towards the table's column limit
+                if len(table_columns) + len(added_columns) > max_columns:
+                    raise ValueError(
+                        f"Dataset '{d_name}' would exceed {max_columns} columns; "
+                        "compact it or use the sparse storage layout"
+                    )
+                self.execute(
+                    self.sql.alter_table_add_columns(
+                        d_name, added_columns, sparse=sparse
+                    )
+                )
+            self.execute(
+                """
+                INSERT INTO Dataset_Columns (d_name, dc_column_name)
+                VALUES (:d_name, :column_name)
+            """,
+                [{"d_name": d_name, "column_name": col} for col in new_columns],
+            )
+
+        # Insert only non-duplicate records into main table
+        insert_comparison_columns = [
+            col for col in current_columns if col in existing_columns
+        ]
+        if not new_columns and insert_comparison_columns:
+            comparison_clause = " AND ".join(
+                [
+                    f"(m.[{col}] = s.[{col}] OR (m.[{col}] IS NULL AND s.[{col}] IS NULL))"
+                    for col in insert_comparison_columns
+                ]
+            )
+        else:
+            comparison_clause = (
+                "1=0"  # If no columns to compare, treat all records as new
+            )
+
+        inserted_rows = self.execute(
+            f"""
+            INSERT INTO [{d_name}] ({', '.join([f'[{col}]' for col in current_columns])})
+            SELECT {', '.join([f's.[{col}]' for col in current_columns])}
+            FROM {staging_table} s
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM [{d_name}] m
+                WHERE {comparison_clause}
+            )
+            """
+        ).rowcount
+
+        insert_connection_comparison_clause = " AND ".join(
+            [
+                (
+                    f"(m.[{col}] = s.[{col}] OR (m.[{col}] IS NULL AND s.[{col}] IS NULL))"
+                    if col in current_columns
+                    else f"m.[{col}] IS NULL"
+                )
+                for col in set(existing_columns + current_columns)
+            ]
+        )
+
+        # Insert connections for all relevant records
+        self.execute(
+            f"""
+            INSERT INTO [{d_name}_connection] (data_id, dv_id)
+            SELECT m.data_id, :dv_id
+            FROM [{d_name}] m
+            JOIN {staging_table} s ON {insert_connection_comparison_clause}
+            """,
+            {"dv_id": new_version_id},
+        )
+
+        if row_index is not None:
+            # Connect the rows that were only sent as references
+            self.execute(
+                f"""
+                INSERT INTO [{d_name}_connection] (data_id, dv_id)
+                SELECT DISTINCT r.data_id, :dv_id
+                FROM {staging_table}_refs r
+                WHERE NOT EXISTS (
+                    SELECT 1
+                    FROM [{d_name}_connection] c
+                    WHERE c.data_id = r.data_id AND c.dv_id = :dv_id
+                )
+                """,
+                {"dv_id": new_version_id},
+            )
+            indexed_rows = self.execute(
+                f"""
+                SELECT s.[{RowHashIndex.ROW_HASH_COLUMN}], m.data_id
+                FROM [{d_name}] m
+                JOIN {staging_table} s ON {insert_connection_comparison_clause}
+                """
+            ).fetchall()
+            self.execute(f"DROP TABLE {staging_table}_refs")
+
+        # Clean up staging table
+        self.execute(f"DROP TABLE {staging_table}")
+
+        # Add column statistics for the new version
+        self.add_column_statistics(new_version_id, statistics.results())
+        return new_version_id, inserted_rows, indexed_rows
+
+    def _drop_staging_tables(self, staging_table: str):
+        """Drops a staging table and its row reference table, if they exist."""
+        for table_name in (staging_table, f"{staging_table}_refs"):
+            self.execute(self.sql.drop_table_if_exists(table_name))
+
+    def _match_fingerprint(
+        self,
+        d_name: str,
+        branch: Optional[str],
+        fingerprint: str,
+        description: Optional[str],
+        alias: bool,
+    ) -> Optional[int]:
+        """
+        Compares a content fingerprint with the head of a branch. On a match no data
+        is written: the head's ID is returned or, with ``alias``, a new version that
+        reads the head's rows is created. Must run inside a transaction.
+
+        Returns:
+            Optional[int]: Matching or alias version ID, None if the content differs
+        """
+        head = self.get_branch_head(d_name, branch)
+        if head is None:
+            return None
+        head_fingerprint = self.execute(
+            "SELECT dv_fingerprint FROM Dataset_Versions WHERE dv_id = :dv_id",
+            {"dv_id": head[0]},
+        ).scalar()
+        if head_fingerprint != fingerprint:
+            return None
+        if not alias:
+            print(f"Content of {d_name} matches version {head[0]}, nothing uploaded")
+            return head[0]
+
+        # The alias shares the rows of the version holding the data, so it needs
+        # no connection rows of its own
+        params = {
+            "head_id": head[0],
+            "dv_name": head[1] + 1,
+            "description": description or "New version",
+            "branch": branch,
+        }
+        alias_id = self.execute(
+            """
+            INSERT INTO Dataset_Versions
+                (d_name, dv_name, dv_description, dv_row_count, dv_branch, dv_parent_id,
+                 dv_fingerprint, dv_alias_of, s_id)
+            OUTPUT INSERTED.dv_id
+            SELECT d_name, :dv_name, :description, dv_row_count, :branch, dv_id,
+                   dv_fingerprint, COALESCE(dv_alias_of, dv_id), s_id
+            FROM Dataset_Versions
+            WHERE dv_id = :head_id
+        """,
+            params,
+        ).scalar()
+        params["alias_id"] = alias_id
+        # Only versions older than shared schemas have column definitions to copy
+        self.execute(
+            """
+            INSERT INTO Column_Definition (dv_id, cd_column_name)
+            SELECT :alias_id, cd_column_name
+            FROM Column_Definition
+            WHERE dv_id = :head_id
+            ORDER BY cd_id
+        """,
+            params,
+        )
+        self.execute(
+            """
+            INSERT INTO Column_Statistics (
+                dv_id, cs_column_name, cs_null_count, cs_distinct_estimate,
+                cs_min_value, cs_max_value, cs_top_values
+            )
+            SELECT :alias_id, cs_column_name, cs_null_count, cs_distinct_estimate,
+                   cs_min_value, cs_max_value, cs_top_values
+            FROM Column_Statistics
+            WHERE dv_id = :head_id
+            ORDER BY cs_id
+        """,
+            params,
+        )
+        print(f"Content of {d_name} matches version {head[0]}, created alias {alias_id}")
+        return alias_id
+
+    def insert_new_version(
+        self,
+        d_name: str,
+        df: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+        description: Optional[str] = None,
+        progress: Optional[Callable[[str, int], None]] = None,
+        row_index: Optional[RowHashIndex] = None,
+        branch: Optional[str] = None,
+        checkpoint_key: Optional[str] = None,
+        checkpoint_rows: int = 1000000,
+        fingerprint: Optional[str] = None,
+        alias_duplicates: bool = False,
+    ) -> Optional[int]:
+        """
+        Inserts a new version of a dataset, handling data deduplication, relationships,
+        and tracking column changes.
+
+        Every version stores the content fingerprint of its rows (see
+        ``ContentFingerprint``), computed while the data is staged. When the content
+        matches the head of the branch, nothing is published: the head's ID is
+        returned, or with ``alias_duplicates`` an alias version sharing the head's
+        rows is created. A fingerprint known in advance, e.g. from an earlier upload
+        of the same file, is checked before any data is read or staged.
+
+        By default staging and publishing run in a single transaction. With a
+        ``checkpoint_key`` the ingest is resumable: staged rows are committed every
+        ``checkpoint_rows`` input rows together with a checkpoint in
+        Ingest_Checkpoints, and the version is only published, atomically, once all
+        data is staged. Calling again with the same key and the same data after a
+        failure skips the rows staged before the last checkpoint.
+
+        Args:
+            d_name: Name of the dataset
+            df: DataFrame containing the new data, or an iterable of DataFrame chunks
+                with the same columns that is streamed into the staging table
+            description: Optional description of the new version
+            progress: Optional callback receiving (phase, rows so far). It is called
+                      with "stage" after every staged chunk, then with "publish" and
+                      "done" around deduplication and metadata writes.
+            row_index: Optional client-side row index of the dataset. Rows found in
+                       it are sent as data_id references instead of being staged.
+            branch: Branch to add the version to, None for the main lineage. Rows
+                    are shared with every other version and branch of the dataset.
+            checkpoint_key: Identifies the input (e.g. file path, size and mtime) to
+                            stage it resumably
+            checkpoint_rows: Input rows staged per committed checkpoint
+            fingerprint: Content fingerprint of ``df`` (``ContentFingerprint.hexdigest``)
+                         if already known; computed up front for a DataFrame
+            alias_duplicates: Create an alias version instead of returning the head
+                              when the content is unchanged
+
+        Returns:
+            int: New version ID (or the matching version's ID) if successful, None if
+                 failed
+        """
+        try:
+            if branch is not None and self.get_branch_head(d_name, branch) is None:
+                raise ValueError(f"Branch '{branch}' does not exist for {d_name}")
+            row_hashes = None
+            if isinstance(df, pd.DataFrame):
+                chunks = [df]
+                if fingerprint is None:
+                    # Hash once; staging reuses the row fingerprints
+                    row_hashes = RowHashIndex.hash_rows(df)
+                    content = ContentFingerprint()
+                    content.update(df, row_hashes)
+                    fingerprint = content.hexdigest()
+            else:
+                chunks = df
+
+            if fingerprint is not None:
+                with self.transaction():
+                    matched_id = self._match_fingerprint(
+                        d_name, branch, fingerprint, description, alias_duplicates
+                    )
+                if matched_id is not None:
+                    if progress:
+                        progress("done", ContentFingerprint.digest_row_count(fingerprint))
+                    return matched_id
+
+            if row_index is not None:
+                row_index.sync(self, d_name)
+            self._add_version_partition(d_name)
+
+            inserted_rows, indexed_rows = 0, []
+            if checkpoint_key is not None:
+                checkpoint_id, staging_table, columns, statistics, staged = (
+                    self._stage_checkpointed(
+                        d_name,
+                        checkpoint_key,
+                        chunks,
+                        progress,
+                        row_index,
+                        checkpoint_rows,
+                        row_hashes,
+                    )
+                )
+                if progress:
+                    progress("publish", statistics.row_count)
+                # Publish the version and retire its checkpoint in one transaction
+                with self.transaction():
+                    new_version_id = self._match_fingerprint(
+                        d_name, branch, staged.hexdigest(), description, alias_duplicates
+                    )
+                    if new_version_id is None:
+                        new_version_id, inserted_rows, indexed_rows = self._publish_version(
+                            d_name,
+                            staging_table,
+                            columns,
+                            statistics,
+                            description,
+                            row_index,
+                            branch,
+                            staged.hexdigest(),
+                        )
+                    else:
+                        self._drop_staging_tables(staging_table)
+                    self.execute(
+                        "DELETE FROM Ingest_Checkpoints WHERE ic_id = :ic_id",
+                        {"ic_id": checkpoint_id},
+                    )
+            else:
+                with self.transaction():
+
+                    # Stream the data into a staging table, computing column
+                    # statistics on the way
+                    staging_table = f"{d_name}_staging"
+                    statistics = ColumnStatistics()
+                    staged = ContentFingerprint()
+                    columns = self._stage_chunks(
+                        staging_table,
+                        chunks,
+                        statistics,
+                        progress,
+                        row_index,
+                        None,
+                        staged,
+                        row_hashes,
+                    )
+                    if progress:
+                        progress("publish", statistics.row_count)
 
-                # Upload data to staging table
-                df.to_sql(
-                    staging_table, self.connection, if_exists="append", index=False
+                    new_version_id = self._match_fingerprint(
+                        d_name, branch, staged.hexdigest(), description, alias_duplicates
+                    )
+                    if new_version_id is None:
+                        new_version_id, inserted_rows, indexed_rows = self._publish_version(
+                            d_name,
+                            staging_table,
+                            columns,
+                            statistics,
+                            description,
+                            row_index,
+                            branch,
+                            staged.hexdigest(),
+                        )
+                    else:
+                        self._drop_staging_tables(staging_table)
+
+            if row_index is not None:
+                row_index.add_uploaded_rows(
+                    self,
+                    d_name,
+                    np.array([row[0] for row in indexed_rows], dtype=np.int64).view(
+                        np.uint64
+                    ),
+                    np.array([row[1] for row in indexed_rows], dtype=np.int64),
+                    inserted_rows,
                 )
 
-                latest_version_name = self.get_latest_version_name(d_name)
-                # Create new version entry
-                result = self.execute(
-                    f"""
-                    INSERT INTO Dataset_Versions (d_name,dv_name, dv_description)
-                    OUTPUT INSERTED.dv_id
-                    VALUES ('{d_name}',{latest_version_name+1}, '{description or "New version"}')
-                """
-                ).fetchone()
-                new_version_id = result[0]
+            if progress:
+                progress("done", statistics.row_count)
+            return new_version_id
+
+        except Exception as e:
+            print(f"Error inserting new version: {str(e)}")
+            return None
+
+    def estimate_version_delta(
+        self,
+        d_name: str,
+        df: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+        branch: Optional[str] = None,
+        row_index: Optional[RowHashIndex] = None,
+        sample_rows: int = 10000,
+    ) -> Optional[Dict]:
+        """
+        Dry run of ``insert_new_version``: estimates how the data differs from the
+        head of the branch and what publishing it would cost, without writing
+        anything to the server.
+
+        Input rows are fingerprinted on the client (``RowHashIndex.hash_rows``) and
+        compared, as distinct rows, with the head version:
+
+            exact:   with a ``row_index``, the head's data_ids are looked up in the
+                     index; rows stored for other versions are told apart from
+                     rows the dataset table does not have yet
+            sampled: otherwise a random sample of ``sample_rows`` head rows is
+                     fingerprinted and the share found in the input is projected
+                     onto the head's row count, with a 95% margin
+
+        Args:
+            d_name: Name of the dataset
+            df: DataFrame or DataFrame chunks of the new version
+            branch: Branch the version would be added to, None for the main lineage
+            row_index: Optional client-side row index of the dataset; it is synced
+                       with the server first
+            sample_rows: Head rows sampled without a row index
+
+        Returns:
+            Optional[Dict]: Row counts (new, unchanged, gone), column changes and
+                            estimated cost, or None if an error occurs
+        """
+        try:
+            chunks = [df] if isinstance(df, pd.DataFrame) else df
+            input_rows, staged_bytes, types = 0, 0, {}
+            hashes = []
+            fingerprint = ContentFingerprint()
+            for chunk in chunks:
+                chunk_hashes = RowHashIndex.hash_rows(chunk)
+                chunk_columns = self.infer_sql_types(chunk)
+                fingerprint.update(chunk, chunk_hashes, chunk_columns)
+                hashes.append(chunk_hashes)
+                input_rows += len(chunk)
+                staged_bytes += int(chunk.memory_usage(deep=True, index=False).sum())
+                for column in chunk_columns:
+                    types[column["name"]] = self._wider_sql_type(
+                        types.get(column["name"], column["type"]), column["type"]
+                    )
+            hashes = np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+            input_hashes = np.unique(hashes)
+
+            head = self.get_branch_head(d_name, branch)
+            head_id = head[0] if head else None
+            head_columns = self.get_version_columns(head_id) if head else []
+            table_columns = [
+                row[0] for row in self.execute(self.sql.get_table_columns(d_name)).fetchall()
+            ]
+
+            estimate = {
+                "dataset": d_name,
+                "head_version_id": head_id,
+                "input_rows": input_rows,
+                "distinct_rows": len(input_hashes),
+                "fingerprint_match": bool(head)
+                and fingerprint.hexdigest() == self.get_version_fingerprint(head_id),
+                "added_columns": [col for col in types if col not in head_columns],
+                "removed_columns": [col for col in head_columns if col not in types],
+                "alter_table_columns": [
+                    {"name": col, "type": sql_type}
+                    for col, sql_type in types.items()
+                    if col not in table_columns
+                ],
+            }
+
+            staged_rows = input_rows
+            if not head:
+                estimate.update(method="exact", head_rows=0, new_rows=len(input_hashes))
+                estimate.update(unchanged_rows=0, gone_rows=0, margin_rows=0)
+                inserted_rows = len(input_hashes)
+            elif row_index is not None and self._version_archive(head_id) is None:
+                row_index.sync(self, d_name)
+                head_ids = np.array(
+                    [
+                        row[0]
+                        for row in self.execute(
+                            f"""
+                            SELECT data_id FROM [{d_name}_connection]
+                            WHERE dv_id = {self._data_version_clause(":version_id")}
+                        """,
+                            {"version_id": head_id},
+                        ).fetchall()
+                    ],
+                    dtype=np.int64,
+                )
+                found = row_index.lookup(input_hashes)
+                unchanged = int(np.isin(found, head_ids).sum())
+                inserted_rows = int((found < 0).sum())
+                # Rows the index knows are sent as data_id references
+                staged_rows = int(np.isin(hashes, input_hashes[found < 0]).sum())
+                estimate.update(
+                    method="exact",
+                    head_rows=len(head_ids),
+                    new_rows=len(input_hashes) - unchanged,
+                    unchanged_rows=unchanged,
+                    gone_rows=len(head_ids) - unchanged,
+                    margin_rows=0,
+                )
+            else:
+                head_rows = (
+                    self.execute(
+                        "SELECT dv_row_count FROM Dataset_Versions WHERE dv_id = :version_id",
+                        {"version_id": head_id},
+                    ).scalar()
+                    or 0
+                )
+                sample = self.get_version_sample(d_name, head_id, sample_rows)
+                if sample is None:
+                    raise ValueError(f"Could not sample version {head_id}")
+                sample = sample.drop(columns=["data_id"], errors="ignore")
+                share = (
+                    float(np.isin(RowHashIndex.hash_rows(sample), input_hashes).mean())
+                    if len(sample)
+                    else 0.0
+                )
+                # The sample is the whole version when it has fewer rows
+                exact = len(sample) < sample_rows
+                head_rows = len(sample) if exact else max(head_rows, len(sample))
+                unchanged = min(int(round(share * head_rows)), len(input_hashes))
+                margin = (
+                    0
+                    if exact
+                    else int(1.96 * np.sqrt(share * (1 - share) / len(sample)) * head_rows)
+                )
+                # Rows stored for other versions cannot be told apart without an
+                # index, so every new row counts as inserted
+                inserted_rows = len(input_hashes) - unchanged
+                estimate.update(
+                    method="exact" if exact else "sampled",
+                    head_rows=head_rows,
+                    new_rows=len(input_hashes) - unchanged,
+                    unchanged_rows=unchanged,
+                    gone_rows=head_rows - unchanged,
+                    margin_rows=margin,
+                )
+
+            estimate["cost"] = {
+                "staged_rows": staged_rows,
+                "staged_bytes": staged_bytes,
+                "dataset_rows_inserted": 0 if estimate["fingerprint_match"] else inserted_rows,
+                "connection_rows": 0 if estimate["fingerprint_match"] else len(input_hashes),
+                "alter_table_columns": len(estimate["alter_table_columns"]),
+            }
+            return estimate
+        except Exception as e:
+            print(f"Error estimating version delta: {str(e)}")
+            return None
+
+    def get_version_columns(self, version_id: int) -> List[str]:
+        """
+        Gets the columns defined for a specific version.
+
+        Args:
+            version_id: Version ID to get columns for
+
+        Returns:
+            List[str]: List of column names defined for the version
+        """
+        try:
+            # Versions created before schemas were shared keep their columns in
+            # Column_Definition; each version has rows in only one of the two
+            result = self.execute(
+                """
+                SELECT column_name
+                FROM (
+                    SELECT sc.sc_column_name AS column_name, sc.sc_position AS position
+                    FROM Dataset_Versions dv
+                    JOIN Schema_Columns sc ON sc.s_id = dv.s_id
+                    WHERE dv.dv_id = :version_id
+                    UNION ALL
+                    SELECT cd_column_name, cd_id
+                    FROM Column_Definition
+                    WHERE dv_id = :version_id
+                ) version_columns
+                ORDER BY position
+            """,
+                {"version_id": version_id},
+            ).fetchall()
+            return [row[0] for row in result]
+        except Exception as e:
+            if self._raise_errors:
+                raise
+            print(f"Error getting version columns: {str(e)}")
+            return []
+
+    def get_version_fingerprint(self, version_id: int) -> Optional[str]:
+        """
+        Gets the content fingerprint stored for a version.
+
+        Args:
+            version_id: Version ID
+
+        Returns:
+            Optional[str]: ``ContentFingerprint.hexdigest`` of the version's rows, None
+                           if the version has none or an error occurs
+        """
+        try:
+            return self.execute(
+                "SELECT dv_fingerprint FROM Dataset_Versions WHERE dv_id = :version_id",
+                {"version_id": version_id},
+            ).scalar()
+        except Exception as e:
+            print(f"Error getting version fingerprint: {str(e)}")
+            return None
+
+    def _version_archive(self, version_id: int) -> Optional[str]:
+        """Gets the archive file holding a version's rows, resolving aliases."""
+        return self.execute(
+            """
+            SELECT va.va_path
+            FROM Dataset_Versions dv
+            JOIN Version_Archives va ON va.dv_id = COALESCE(dv.dv_alias_of, dv.dv_id)
+            WHERE dv.dv_id = :version_id
+        """,
+            {"version_id": version_id},
+        ).scalar()
+
+    @staticmethod
+    def _read_archive(path: str, rows: Optional[int] = None) -> pd.DataFrame:
+        """Reads an archived version, or only its first ``rows`` rows."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        if rows is None:
+            return parquet_file.read().to_pandas()
+        batches, count = [], 0
+        for batch in parquet_file.iter_batches(batch_size=rows):
+            batches.append(batch)
+            count += batch.num_rows
+            if count >= rows:
+                break
+        return (
+            pa.Table.from_batches(batches, schema=parquet_file.schema_arrow)
+            .slice(0, rows)
+            .to_pandas()
+        )
+
+    @staticmethod
+    def _data_version_clause(placeholder: str) -> str:
+        """Resolves a version ID to the version whose connection rows it reads."""
+        return f"""(
+                SELECT COALESCE(dv_alias_of, dv_id) FROM Dataset_Versions
+                WHERE dv_id = {placeholder}
+            )"""
+
+    def _version_query(
+        self,
+        d_name: str,
+        version_columns: List[str],
+        placeholder: str = ":version_id",
+        top: bool = False,
+    ) -> str:
+        """
+        Builds the query selecting the rows of a version, including data_id. The
+        version ID is bound through ``placeholder``; with ``top`` only the first
+        ``:rows`` rows are selected. Alias versions read the rows of their target.
+        """
+        columns_str = ", ".join([f"d.[{col}]" for col in version_columns])
+        top_str = "TOP (:rows) " if top else ""
+        return f"""
+            SELECT {top_str}d.data_id, {columns_str}
+            FROM [{d_name}] d
+            JOIN [{d_name}_connection] c ON d.data_id = c.data_id
+            WHERE c.dv_id = {self._data_version_clause(placeholder)}
+            ORDER BY d.data_id
+        """
+
+    def iter_version_batches(
+        self, d_name: str, version_id: int, batch_size: int = 65536
+    ) -> Iterator["pa.RecordBatch"]:
+        """
+        Streams the rows of a version as Arrow record batches.
+
+        Archived versions are streamed from their archive file. On MS SQL Server
+        with the ``arrow-odbc`` package installed, result sets are
+        fetched by the ODBC driver straight into Arrow buffers without creating a
+        Python object per value. Otherwise rows are fetched with ``fetchmany`` and
+        converted column by column, with Arrow types taken from the cursor
+        description so every batch has the same schema. An empty version gives a
+        single empty batch, so its schema is still known.
+
+        Args:
+            d_name: Name of the dataset
+            version_id: Version ID to retrieve
+            batch_size: Maximum number of rows per record batch
+
+        Returns:
+            Iterator[pa.RecordBatch]: Record batches with data_id and the version's columns
+        """
+        import pyarrow as pa
+
+        version_columns = self.get_version_columns(version_id)
+        if not version_columns:
+            raise ValueError(f"No columns found for version {version_id}")
+        archive_path = self._version_archive(version_id)
+        if archive_path is not None:
+            import pyarrow.parquet as pq
+
+            archive = pq.ParquetFile(archive_path)
+            if archive.metadata.num_rows == 0:
+                yield pa.RecordBatch.from_pylist([], schema=archive.schema_arrow)
+                return
+            yield from archive.iter_batches(batch_size)
+            return
+        if self.conn_details["type"] == "mssql":
+            try:
+                from arrow_odbc import read_arrow_batches_from_odbc
+            except ImportError:
+                read_arrow_batches_from_odbc = None
+
+            if read_arrow_batches_from_odbc is not None:
+                reader = read_arrow_batches_from_odbc(
+                    query=self._version_query(d_name, version_columns, "?"),
+                    connection_string=self._odbc_connection_string(),
+                    batch_size=batch_size,
+                    parameters=[str(version_id)],
+                )
+                empty = True
+                for batch in reader:
+                    empty = False
+                    yield batch
+                if empty:
+                    yield pa.RecordBatch.from_pylist([], schema=reader.schema)
+                return
+
+        arrow_types = {
+            str: pa.string(),
+            int: pa.int64(),
+            float: pa.float64(),
+            bool: pa.bool_(),
+            datetime.datetime: pa.timestamp("ms"),
+            datetime.date: pa.date32(),
+        }
+        # pyodbc cursors fetch from the server as rows are consumed
+        result = self.execute(
+            self._version_query(d_name, version_columns), {"version_id": version_id}
+        )
+        names = list(result.keys())
+        types = [
+            # Decimal columns keep the precision and scale of the SQL type
+            pa.decimal128(column[4], column[5])
+            if column[1] is decimal.Decimal
+            else arrow_types.get(column[1])
+            for column in result.cursor.description
+        ]
+        rows = result.fetchmany(batch_size)
+        while True:
+            columns = list(zip(*rows)) or [() for _ in names]
+            yield pa.RecordBatch.from_arrays(
+                [
+                    pa.array(values, type=arrow_type)
+                    for values, arrow_type in zip(columns, types)
+                ],
+                names=names,
+            )
+            rows = result.fetchmany(batch_size)
+            if not rows:
+                break
+
+    def get_version_arrow(self, d_name: str, version_id: int) -> "pa.Table":
+        """
+        Retrieves a version of a dataset as an Arrow table.
+
+        Args:
+            d_name: Name of the dataset
+            version_id: Version ID to retrieve
+
+        Returns:
+            pa.Table: Table with data_id and the version's columns
+        """
+        import pyarrow as pa
+
+        return pa.Table.from_batches(list(self.iter_version_batches(d_name, version_id)))
+
+    def export_version(
+        self,
+        d_name: str,
+        version_id: int,
+        path: str,
+        file_format: str = "parquet",
+        compression: Optional[str] = "zstd",
+    ) -> int:
+        """
+        Streams a version into a Parquet, Feather or Arrow IPC stream file, one
+        record batch at a time. An empty version gives a file with no rows and the
+        version's schema.
+
+        Args:
+            d_name: Name of the dataset
+            version_id: Version ID to export
+            path: Output file path
+            file_format: "parquet", "feather" (Arrow IPC file) or "ipc" (Arrow IPC stream)
+            compression: Compression codec, e.g. "zstd", "lz4" or None
+
+        Returns:
+            int: Number of exported rows
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        rows = 0
+        try:
+            for batch in self.iter_version_batches(d_name, version_id):
+                if writer is None:
+                    if file_format == "parquet":
+                        writer = pq.ParquetWriter(
+                            path, batch.schema, compression=compression or "none"
+                        )
+                    elif file_format in ("feather", "ipc"):
+                        options = pa.ipc.IpcWriteOptions(compression=compression)
+                        new_writer = (
+                            pa.ipc.new_file if file_format == "feather" else pa.ipc.new_stream
+                        )
+                        writer = new_writer(path, batch.schema, options=options)
+                    else:
+                        raise ValueError(f"Unsupported export format: {file_format}")
+
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
+
+    def _read_version_compact(
+        self,
+        d_name: str,
+        version_id: int,
+        version_columns: List[str],
+        use_arrow: bool,
+        chunksize: int,
+    ) -> pd.DataFrame:
+        """Reads a version in chunks, converting each chunk to compact dtypes."""
+        sql_types = {
+            row[0]: row[1]
+            for row in self.execute(self.sql.get_table_column_types(d_name)).fetchall()
+        }
+        row_count = self.execute(
+            "SELECT dv_row_count FROM Dataset_Versions WHERE dv_id = :version_id",
+            {"version_id": version_id},
+        ).scalar()
+        plan = CompactDtypes.plan(
+            {col: sql_types[col] for col in version_columns if col in sql_types},
+            self.get_version_statistics(version_id),
+            row_count,
+        )
+
+        if use_arrow:
+            chunks = (
+                batch.to_pandas()
+                for batch in self.iter_version_batches(d_name, version_id, chunksize)
+            )
+        else:
+            chunks = pd.read_sql(
+                _statement(self._version_query(d_name, version_columns)),
+                self.connection,
+                params={"version_id": version_id},
+                chunksize=chunksize,
+            )
+
+        bytes_before = pd.Series(dtype="int64")
+        converted = []
+        for chunk in chunks:
+            bytes_before = bytes_before.add(
+                chunk.memory_usage(deep=True, index=False), fill_value=0
+            )
+            converted.append(CompactDtypes.apply(chunk, plan))
+
+        if converted:
+            df = CompactDtypes.finalize(pd.concat(converted, ignore_index=True), plan)
+        else:
+            df = pd.DataFrame(columns=["data_id"] + version_columns)
+        df.attrs["memory_report"] = CompactDtypes.memory_report(bytes_before, df)
+        return df
+
+    def get_version_data_by_columns(
+        self,
+        d_name: str,
+        version_id: int,
+        use_arrow: bool = False,
+        compact: bool = False,
+        chunksize: int = 100000,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Retrieves data for a specific version of a dataset using only the columns
+        defined for that version. Archived versions are read from their archive
+        file.
+
+        Args:
+            d_name: Name of the dataset
+            version_id: Version ID to retrieve
+            use_arrow: Fetch through the Arrow batch path (see ``iter_version_batches``)
+                       and convert the result to pandas
+            compact: Build the DataFrame with compact dtypes (see ``CompactDtypes``),
+                     reading in chunks of ``chunksize`` rows. A memory report is
+                     stored in ``df.attrs["memory_report"]``.
+            chunksize: Rows per chunk when ``compact`` is set
+
+        Returns:
+            Optional[pd.DataFrame]: DataFrame containing version data with appropriate columns,
+                                or None if an error occurs
+        """
+        try:
+            # Get columns defined for this version
+            version_columns = self.get_version_columns(version_id)
+
+            if not version_columns:
+                print(f"No columns found for version {version_id}")
+                return None
+
+            # Archive files are read through the Arrow path
+            if not use_arrow and self._version_archive(version_id) is not None:
+                use_arrow = True
+
+            if compact:
+                df = self._read_version_compact(
+                    d_name, version_id, version_columns, use_arrow, chunksize
+                )
+            elif use_arrow:
+                df = self.get_version_arrow(d_name, version_id).to_pandas()
+            else:
+                # Use pandas to read the query result
+                df = pd.read_sql(
+                    _statement(self._version_query(d_name, version_columns)),
+                    self.connection,
+                    params={"version_id": version_id},
+                )
+
+            # Get version metadata
+            version_info = self.execute(
+                """
+                SELECT dv_createdat, dv_description
+                FROM Dataset_Versions
+                WHERE dv_id = :version_id
+            """,
+                {"version_id": version_id},
+            ).fetchone()
+
+            if version_info:
+                print(f"\nVersion {version_id} Info:")
+                print(f"Created at: {version_info[0]}")
+                print(f"Description: {version_info[1]}")
+                print(f"Number of columns: {len(version_columns)}")
+                print(f"Columns: {', '.join(version_columns)}")
+                print(f"Number of records: {len(df)}")
+                if compact:
+                    report = df.attrs["memory_report"]
+                    print(
+                        f"Memory: {report['bytes_after'] / 2**20:.1f} MB "
+                        f"({report['ratio']}x smaller than default dtypes)"
+                    )
+
+            return df
+
+        except Exception as e:
+            print(f"Error retrieving version data: {str(e)}")
+            return None
+
+    def get_version_head(
+        self, d_name: str, version_id: int, rows: int
+    ) -> Optional[pd.DataFrame]:
+        """
+        Retrieves the first rows of a version without reading the rest of it.
+
+        Args:
+            d_name: Name of the dataset
+            version_id: Version ID to preview
+            rows: Number of rows
+
+        Returns:
+            Optional[pd.DataFrame]: Up to ``rows`` rows ordered by data_id, or None
+                                    if an error occurs
+        """
+        try:
+            version_columns = self.get_version_columns(version_id)
+            if not version_columns:
+                raise ValueError(f"No columns found for version {version_id}")
+            archive_path = self._version_archive(version_id)
+            if archive_path is not None:
+                return self._read_archive(archive_path, rows)
+            return pd.read_sql(
+                _statement(self._version_query(d_name, version_columns, top=True)),
+                self.connection,
+                params={"version_id": version_id, "rows": rows},
+            )
+        except Exception as e:
+            if self._raise_errors:
+                raise
+            print(f"Error retrieving version head: {str(e)}")
+            return None
+
+    def _sample_query(
+        self,
+        d_name: str,
+        version_columns: List[str],
+        percent: Optional[float],
+        stratify_by: Optional[str],
+    ) -> str:
+        columns_str = ", ".join(f"d.[{col}]" for col in version_columns)
+        sample_filter = (
+            f"AND {self.sql.random_sample_filter('c.data_id', percent)}" if percent else ""
+        )
+        sampled_ids = f"""
+            SELECT c.data_id
+            FROM [{d_name}_connection] c
+            WHERE c.dv_id = {self._data_version_clause(":version_id")} {sample_filter}
+        """
+        if stratify_by is None:
+            return f"""
+                SELECT TOP (:rows) d.data_id, {columns_str}
+                FROM ({sampled_ids}) s
+                JOIN [{d_name}] d ON d.data_id = s.data_id
+                ORDER BY {self.sql.random_order()}
+            """
+        # Taking the n-th random row of every stratum before any (n+1)-th row
+        # spreads the sample evenly over the strata
+        outer_columns = ", ".join(f"[{col}]" for col in version_columns)
+        return f"""
+            SELECT TOP (:rows) data_id, {outer_columns}
+            FROM (
+                SELECT d.data_id, {columns_str},
+                       ROW_NUMBER() OVER (
+                           PARTITION BY d.[{stratify_by}] ORDER BY {self.sql.random_order()}
+                       ) AS stratum_row
+                FROM ({sampled_ids}) s
+                JOIN [{d_name}] d ON d.data_id = s.data_id
+            ) sampled
+            ORDER BY stratum_row, {self.sql.random_order()}
+        """
+
+    def get_version_sample(
+        self,
+        d_name: str,
+        version_id: int,
+        rows: int,
+        stratify_by: Optional[str] = None,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Retrieves a random sample of a version. On large versions each of the
+        version's keys in the connection table is kept with a random filter, so
+        only the sampled rows are joined to the data table and sorted, whatever
+        share of the dataset the version holds; when too few keys pass, the
+        sampled fraction grows tenfold per attempt up to an exact sample over the
+        whole version.
+
+        Args:
+            d_name: Name of the dataset
+            version_id: Version ID to sample
+            rows: Number of rows in the sample
+            stratify_by: Optional column whose values are represented evenly
+
+        Returns:
+            Optional[pd.DataFrame]: Up to ``rows`` random rows, or None if an error occurs
+        """
+        try:
+            version_columns = self.get_version_columns(version_id)
+            if not version_columns:
+                raise ValueError(f"No columns found for version {version_id}")
+            if stratify_by is not None and stratify_by not in version_columns:
+                raise ValueError(f"Column {stratify_by} is not part of version {version_id}")
+
+            archive_path = self._version_archive(version_id)
+            if archive_path is not None:
+                # Archived versions are cold: sample the whole file in memory
+                shuffled = self._read_archive(archive_path).sample(frac=1)
+                if stratify_by is not None:
+                    stratum_row = shuffled.groupby(stratify_by, dropna=False).cumcount()
+                    shuffled = shuffled.iloc[
+                        np.argsort(stratum_row.to_numpy(), kind="stable")
+                    ]
+                return shuffled.head(rows).reset_index(drop=True)
+
+            row_count = self.execute(
+                "SELECT dv_row_count FROM Dataset_Versions WHERE dv_id = :version_id",
+                {"version_id": version_id},
+            ).scalar()
+            percent = (
+                100.0 * rows * self.SAMPLE_OVERSAMPLING / row_count if row_count else 100.0
+            )
+
+            params = {"version_id": version_id, "rows": rows}
+            while True:
+                # Round the fraction so repeated previews reuse the same statement
+                percent = float(f"{percent:.1g}")
+                query = self._sample_query(
+                    d_name,
+                    version_columns,
+                    percent if percent < 100 else None,
+                    stratify_by,
+                )
+                df = pd.read_sql(_statement(query), self.connection, params=params)
+                if len(df) >= rows or percent >= 100:
+                    return df
+                percent = min(percent * 10, 100.0)
+        except Exception as e:
+            print(f"Error sampling version: {str(e)}")
+            return None
+
+    def get_versions_data(
+        self, d_name: str, version_ids: List[int]
+    ) -> Optional[pd.DataFrame]:
+        """
+        Retrieves several versions of a dataset with a single scan. Each stored row
+        is returned once, with a ``__version_mask`` column whose bit ``i`` is set
+        when the row belongs to ``version_ids[i]``. Use ``select_version`` to get
+        one version back from the result.
+
+        Args:
+            d_name: Name of the dataset
+            version_ids: Version IDs to retrieve, at most ``MAX_VERSIONS_PER_READ``
+
+        Returns:
+            Optional[pd.DataFrame]: data_id, the union of the versions' columns and
+                                    the version mask, or None if an error occurs.
+                                    ``df.attrs["versions"]`` maps each version ID
+                                    to its bit and columns.
+        """
+        try:
+            version_ids = list(dict.fromkeys(version_ids))
+            if not version_ids:
+                raise ValueError("No versions requested")
+            if len(version_ids) > self.MAX_VERSIONS_PER_READ:
+                raise ValueError(
+                    f"At most {self.MAX_VERSIONS_PER_READ} versions can be read at once"
+                )
+
+            # Alias versions share the bit of the version holding their rows
+            data_versions = dict(
+                self.execute(
+                    f"""
+                    SELECT dv_id, COALESCE(dv_alias_of, dv_id)
+                    FROM Dataset_Versions
+                    WHERE dv_id IN ({", ".join(f":v{i}" for i in range(len(version_ids)))})
+                """,
+                    {f"v{i}": version_id for i, version_id in enumerate(version_ids)},
+                ).fetchall()
+            )
+            data_version_ids = list(
+                dict.fromkeys(data_versions.get(v, v) for v in version_ids)
+            )
+
+            versions = {}
+            all_columns = []
+            for version_id in version_ids:
+                version_columns = self.get_version_columns(version_id)
+                if not version_columns:
+                    raise ValueError(f"No columns found for version {version_id}")
+                if self._version_archive(version_id) is not None:
+                    raise ValueError(
+                        f"Version {version_id} is archived, read it with "
+                        "get_version_data_by_columns"
+                    )
+                versions[version_id] = {
+                    "bit": data_version_ids.index(data_versions.get(version_id, version_id)),
+                    "columns": version_columns,
+                }
+                all_columns.extend(c for c in version_columns if c not in all_columns)
+
+            placeholders = ", ".join(f":v{bit}" for bit in range(len(data_version_ids)))
+            bit_cases = " ".join(
+                f"WHEN :v{bit} THEN {bit}" for bit in range(len(data_version_ids))
+            )
+            columns_str = ", ".join(f"d.[{col}]" for col in all_columns)
+            # (data_id, dv_id) is unique, so summing the bits of a row's versions
+            # gives their bitwise OR
+            query = f"""
+                SELECT d.data_id, {columns_str}, m.version_mask AS [{self.VERSION_MASK_COLUMN}]
+                FROM [{d_name}] d
+                JOIN (
+                    SELECT data_id,
+                           SUM(POWER(CAST(2 AS bigint), CASE dv_id {bit_cases} END))
+                               AS version_mask
+                    FROM [{d_name}_connection]
+                    WHERE dv_id IN ({placeholders})
+                    GROUP BY data_id
+                ) m ON d.data_id = m.data_id
+                ORDER BY d.data_id
+            """
+            df = pd.read_sql(
+                _statement(query),
+                self.connection,
+                params={
+                    f"v{bit}": version_id for bit, version_id in enumerate(data_version_ids)
+                },
+            )
+            df.attrs["versions"] = versions
+            return df
+
+        except Exception as e:
+            print(f"Error retrieving versions data: {str(e)}")
+            return None
+
+    @classmethod
+    def select_version(cls, df: pd.DataFrame, version_id: int) -> pd.DataFrame:
+        """
+        Extracts one version from the result of ``get_versions_data``.
+
+        Returns:
+            pd.DataFrame: The version's rows with data_id and its own columns
+        """
+        version = df.attrs["versions"][version_id]
+        mask = df[cls.VERSION_MASK_COLUMN].to_numpy(dtype=np.int64)
+        in_version = (mask >> version["bit"]) & 1 == 1
+        return df.loc[in_version, ["data_id"] + version["columns"]].reset_index(drop=True)
+
+    def get_all_datasets(self) -> List[Tuple[str, str]]:
+        """
+        Gets the name and description of every dataset.
+
+        Returns:
+            List[Tuple[str, str]]: List of (d_name, d_description) pairs
+        """
+        try:
+            result = self.execute(
+                "SELECT d_name, d_description FROM Datasets"
+            ).fetchall()
+            return [(row[0], row[1]) for row in result]
+        except Exception as e:
+            if self._raise_errors:
+                raise
+            print(f"Error getting datasets: {str(e)}")
+            return []
+
+    def get_catalog(self) -> List[Dict]:
+        """
+        Summarizes every dataset from the metadata tables only: description,
+        storage, version and branch counts, the latest version and the row count
+        of the main lineage's head, and the dataset's columns.
+
+        Works on databases the app has not migrated yet: metadata the database
+        does not have yet is reported with its default or None, and datasets
+        without Dataset_Columns rows get the columns of their versions instead.
+
+        Returns:
+            List[Dict]: One entry per dataset
+        """
+        present = {
+            table: {row[0] for row in self.execute(self.sql.get_table_columns(table)).fetchall()}
+            for table in ["Datasets", "Dataset_Versions", "Dataset_Columns", "Schema_Columns"]
+        }
+
+        def column(alias: str, table: str, name: str) -> str:
+            return f"{alias}.{name}" if name in present[table] else "NULL"
+
+        storage_columns = [
+            column("d", "Datasets", "d_storage_layout"),
+            column("d", "Datasets", "d_compression"),
+        ]
+        branch_count = (
+            "COUNT(DISTINCT dv.dv_branch)" if "dv_branch" in present["Dataset_Versions"] else "0"
+        )
+        head_row_count = "NULL"
+        if "dv_row_count" in present["Dataset_Versions"]:
+            main_lineage = (
+                "AND h.dv_branch IS NULL" if "dv_branch" in present["Dataset_Versions"] else ""
+            )
+            head_row_count = f"""(
+                       SELECT TOP 1 h.dv_row_count
+                       FROM Dataset_Versions h
+                       WHERE h.d_name = d.d_name {main_lineage}
+                       ORDER BY h.dv_createdat DESC
+                   )"""
+        group_by = ", ".join(
+            ["d.d_name", "d.d_description"] + [col for col in storage_columns if col != "NULL"]
+        )
+        result = self.execute(
+            f"""
+            SELECT d.d_name, d.d_description, {", ".join(storage_columns)},
+                   COUNT(dv.dv_id), {branch_count}, MAX(dv.dv_createdat),
+                   {head_row_count}
+            FROM Datasets d
+            LEFT JOIN Dataset_Versions dv ON dv.d_name = d.d_name
+            GROUP BY {group_by}
+        """
+        ).fetchall()
+
+        columns: Dict[str, set] = {}
+        version_columns = """
+            SELECT dv.d_name, cd.cd_column_name
+            FROM Column_Definition cd
+            JOIN Dataset_Versions dv ON dv.dv_id = cd.dv_id
+        """
+        if present["Schema_Columns"] and "s_id" in present["Dataset_Versions"]:
+            version_columns += """
+            UNION
+            SELECT dv.d_name, sc.sc_column_name
+            FROM Dataset_Versions dv
+            JOIN Schema_Columns sc ON sc.s_id = dv.s_id
+            """
+        if present["Dataset_Columns"]:
+            queries = [
+                "SELECT d_name, dc_column_name FROM Dataset_Columns",
+                # Datasets created before columns were tracked
+                f"""
+                SELECT d_name, column_name
+                FROM ({version_columns}) v (d_name, column_name)
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM Dataset_Columns dc WHERE dc.d_name = v.d_name
+                )
+                """,
+            ]
+        else:
+            queries = [version_columns]
+        for query in queries:
+            for d_name, column_name in self.execute(query).fetchall():
+                columns.setdefault(d_name, set()).add(column_name)
+
+        return [
+            {
+                "d_name": row[0],
+                "description": row[1],
+                "storage_layout": row[2] or "standard",
+                "compression": row[3] or "none",
+                "version_count": row[4],
+                "branch_count": row[5],
+                "last_version_at": row[6],
+                "row_count": row[7],
+                "columns": sorted(columns.get(row[0], [])),
+            }
+            for row in result
+        ]
+
+    def get_all_versions_info(self, d_name: str) -> List[Dict]:
+        """
+        Gets information about all versions of a dataset.
+
+        Args:
+            d_name: Name of the dataset
+
+        Returns:
+            List[Dict]: List of dictionaries containing version information
+        """
+        try:
+            versions = []
+            result = self.execute(
+                """
+                SELECT dv_id,dv_name, dv_createdat, dv_description, dv_tag, dv_row_count,
+                       dv_branch, dv_parent_id, dv_alias_of, dv_fingerprint,
+                       CASE WHEN EXISTS (
+                           SELECT 1 FROM Dataset_Branches b WHERE b.db_base_dv_id = dv.dv_id
+                       ) THEN 1 ELSE 0 END,
+                       CASE WHEN EXISTS (
+                           SELECT 1 FROM Version_Archives va WHERE va.dv_id = dv.dv_id
+                       ) THEN 1 ELSE 0 END
+                FROM Dataset_Versions dv
+                WHERE d_name = :d_name
+                ORDER BY dv_createdat
+            """,
+                {"d_name": d_name},
+            ).fetchall()
+
+            for row in result:
+                version_id = row[0]
+                columns = self.get_version_columns(version_id)
+
+                versions.append(
+                    {
+                        "version_id": version_id,
+                        "version_name": row[1],
+                        "created_at": row[2],
+                        "description": row[3],
+                        "tag": row[4],
+                        "row_count": row[5],
+                        "branch": row[6],
+                        "parent_id": row[7],
+                        "alias_of": row[8],
+                        "fingerprint": row[9],
+                        "is_branch_base": bool(row[10]),
+                        "archived": bool(row[11]),
+                        "column_count": len(columns),
+                    }
+                )
+
+            return versions
+
+        except Exception as e:
+            if self._raise_errors:
+                raise
+            print(f"Error getting versions info: {str(e)}")
+            return []
+
+    def _delete_in_batches(
+        self,
+        table_name: str,
+        where_clause: str,
+        batch_size: int,
+        params: Optional[Dict] = None,
+    ) -> int:
+        """
+        Deletes rows matching ``where_clause`` in batches of ``batch_size``, committing
+        after each batch so locks are only held for one batch at a time. ``params``
+        are bound to the placeholders of ``where_clause``.
+
+        Returns:
+            int: Total number of deleted rows
+        """
+        deleted = 0
+        while True:
+            with self.transaction():
+                rowcount = self.execute(
+                    self.sql.delete_batch(table_name, where_clause, batch_size), params
+                ).rowcount
+            deleted += max(rowcount, 0)
+            if rowcount < batch_size:
+                return deleted
+
+    def _delete_unused_schemas(self, batch_size: int) -> int:
+        """
+        Deletes the schemas no version uses, with their columns, in batches of
+        ``batch_size`` schemas. Schemas are shared by all datasets: each batch
+        locks the Schemas table, which waits for publishes holding a schema from
+        ``get_schema_id`` to commit and holds off new ones until the batch
+        commits, so a publish never reuses a schema being deleted.
+
+        Returns:
+            int: Total number of deleted Schemas and Schema_Columns rows
+        """
+        deleted = 0
+        while True:
+            with self.transaction():
+                schema_ids = [
+                    row[0]
+                    for row in self.execute(
+                        """
+                        SELECT TOP (:batch_size) s.s_id
+                        FROM Schemas s WITH (TABLOCKX, HOLDLOCK)
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM Dataset_Versions dv WHERE dv.s_id = s.s_id
+                        )
+                    """,
+                        {"batch_size": batch_size},
+                    ).fetchall()
+                ]
+                if schema_ids:
+                    placeholders = ", ".join(f":s{i}" for i in range(len(schema_ids)))
+                    params = {f"s{i}": s_id for i, s_id in enumerate(schema_ids)}
+                    for table_name in ["Schema_Columns", "Schemas"]:
+                        deleted += max(
+                            self.execute(
+                                f"DELETE FROM {table_name} WHERE s_id IN ({placeholders})",
+                                params,
+                            ).rowcount,
+                            0,
+                        )
+            if len(schema_ids) < batch_size:
+                return deleted
+
+    def _get_storage_size_kb(self, table_names: List[str]) -> int:
+        return sum(
+            self.execute(self.sql.table_size_kb(table_name)).scalar() or 0
+            for table_name in table_names
+        )
 
-                # Get existing columns
-                existing_columns = self.get_existing_columns(d_name)
-                current_columns = df.columns.tolist()
+    def delete_version(self, d_name: str, version_id: int, batch_size: int = 10000) -> bool:
+        """
+        Deletes a version of a dataset. Data rows are left in place and are reclaimed
+        by ``compact_dataset`` once no other version references them.
 
-                # Identify new columns
-                new_columns = [
-                    col for col in current_columns if col not in existing_columns
-                ]
+        The version's connection rows are removed in batches, or by emptying its
+        partition if the connection table is partitioned; the version row and its
+        column definitions are then removed in a single transaction. If the process
+        stops in between, calling this method again finishes the deletion. Versions
+        that a branch was created from cannot be deleted while the branch exists,
+        nor versions whose rows alias versions read.
 
-                # If there are new columns, alter the main table
-                if new_columns:
-                    new_columns_sql = []
-                    for col in new_columns:
-                        col_type = self.infer_sql_types(df[[col]])[0]["type"]
-                        new_columns_sql.append(f"[{col}] {col_type}")
+        Args:
+            d_name: Name of the dataset
+            version_id: Version ID to delete
+            batch_size: Maximum number of connection rows deleted per transaction
 
-                    if new_columns_sql:
-                        self.execute(
-                            f"""
-                            ALTER TABLE [{d_name}]
-                            ADD {', '.join(new_columns_sql)}
-                        """
-                        )
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            params = {"version_id": version_id, "d_name": d_name}
+            branches = self.execute(
+                "SELECT db_name FROM Dataset_Branches WHERE db_base_dv_id = :version_id",
+                params,
+            ).fetchall()
+            if branches:
+                print(
+                    f"Cannot delete version {version_id}: it is the base of branches "
+                    f"{', '.join(row[0] for row in branches)}"
+                )
+                return False
+            aliases = self.execute(
+                "SELECT dv_id FROM Dataset_Versions WHERE dv_alias_of = :version_id",
+                params,
+            ).fetchall()
+            if aliases:
+                print(
+                    f"Cannot delete version {version_id}: it is aliased by versions "
+                    f"{', '.join(str(row[0]) for row in aliases)}"
+                )
+                return False
 
-                # Insert only non-duplicate records into main table
-                insert_comparison_columns = [
-                    col for col in current_columns if col in existing_columns
-                ]
-                if not new_columns and insert_comparison_columns:
-                    comparison_clause = " AND ".join(
-                        [
-                            f"(m.[{col}] = s.[{col}] OR (m.[{col}] IS NULL AND s.[{col}] IS NULL))"
-                            for col in insert_comparison_columns
-                        ]
-                    )
-                else:
-                    comparison_clause = (
-                        "1=0"  # If no columns to compare, treat all records as new
-                    )
+            self._delete_version_rows(d_name, version_id, batch_size)
+            archive_path = self.execute(
+                "SELECT va_path FROM Version_Archives WHERE dv_id = :version_id", params
+            ).scalar()
 
+            with self.transaction():
+                self.execute(
+                    "DELETE FROM Version_Archives WHERE dv_id = :version_id", params
+                )
                 self.execute(
-                    f"""
-                    INSERT INTO [{d_name}] ({', '.join([f'[{col}]' for col in current_columns])})
-                    SELECT {', '.join([f's.[{col}]' for col in current_columns])}
-                    FROM {staging_table} s
-                    WHERE NOT EXISTS (
-                        SELECT 1
-                        FROM [{d_name}] m
-                        WHERE {comparison_clause}
-                    )
                     """
+                    DELETE FROM Column_Definition
+                    WHERE dv_id = :version_id
+                """,
+                    params,
                 )
-
-                insert_connection_comparison_clause = " AND ".join(
-                    [
-                        (
-                            f"(m.[{col}] = s.[{col}] OR (m.[{col}] IS NULL AND s.[{col}] IS NULL))"
-                            if col in current_columns
-                            else f"m.[{col}] IS NULL"
-                        )
-                        for col in set(existing_columns + current_columns)
-                    ]
+                self.execute(
+                    """
+                    DELETE FROM Column_Statistics
+                    WHERE dv_id = :version_id
+                """,
+                    params,
                 )
-
-                # Insert connections for all relevant records
                 self.execute(
-                    f"""
-                    INSERT INTO [{d_name}_connection] (data_id, dv_id)
-                    SELECT m.data_id, {new_version_id}
-                    FROM [{d_name}] m
-                    JOIN {staging_table} s ON {insert_connection_comparison_clause}
                     """
+                    DELETE FROM Dataset_Versions
+                    WHERE dv_id = :version_id AND d_name = :d_name
+                """,
+                    params,
                 )
+            if archive_path is not None and os.path.exists(archive_path):
+                os.remove(archive_path)
+            return True
+        except Exception as e:
+            print(f"Error deleting version: {str(e)}")
+            return False
 
-                # Clean up staging table
-                self.execute(f"DROP TABLE {staging_table}")
+    def archive_version(
+        self,
+        d_name: str,
+        version_id: int,
+        archive_dir: str,
+        batch_size: int = 10000,
+        compact: bool = True,
+    ) -> Optional[Dict]:
+        """
+        Moves a version to the archive tier: its rows are exported to a zstd
+        compressed Parquet file under ``archive_dir`` and its connection rows are
+        removed in batches (or its partition emptied). Reads of the version are then served from the file.
+        Data rows no other version uses are reclaimed by ``compact_dataset``.
+
+        The archive is recorded before any rows are removed, so reads switch to the
+        file first. If the process stops while rows are removed, calling this
+        method again finishes the job.
 
-                # Add column definitions for the new version
-                self.add_column_definitions(new_version_id, current_columns)
+        Args:
+            d_name: Name of the dataset
+            version_id: Version ID to archive
+            archive_dir: Directory on local or mounted storage for archive files
+            batch_size: Maximum number of rows deleted per transaction
+            compact: Compact the dataset afterwards; disable it to compact once
+                     after archiving several versions
 
-                return new_version_id
+        Returns:
+            Optional[Dict]: Archive path, rows, file size and deleted connection
+                            rows, or None if an error occurs
+        """
+        try:
+            params = {"version_id": version_id, "d_name": d_name}
+            version = self.execute(
+                """
+                SELECT dv_alias_of, dv_row_count
+                FROM Dataset_Versions
+                WHERE dv_id = :version_id AND d_name = :d_name
+            """,
+                params,
+            ).fetchone()
+            if version is None:
+                raise ValueError(f"Version {version_id} of {d_name} does not exist")
+            if version[0] is not None:
+                raise ValueError(
+                    f"Version {version_id} is an alias of version {version[0]}, "
+                    "archive that version instead"
+                )
 
+            archive = self.execute(
+                "SELECT va_path, va_rows FROM Version_Archives WHERE dv_id = :version_id",
+                params,
+            ).fetchone()
+            if archive is None:
+                directory = (
+                    Path(archive_dir)
+                    / re.sub(r"[^A-Za-z0-9_.-]+", "_", self.connection_key)
+                    / d_name
+                )
+                directory.mkdir(parents=True, exist_ok=True)
+                path = str((directory / f"v{version_id}.parquet").resolve())
+                temp_path = f"{path}.tmp"
+                rows = self.export_version(d_name, version_id, temp_path)
+                if version[1] is not None and rows != version[1]:
+                    os.remove(temp_path)
+                    raise ValueError(
+                        f"Exported {rows} rows but version {version_id} has {version[1]}"
+                    )
+                os.replace(temp_path, path)
+                self.execute(
+                    """
+                    INSERT INTO Version_Archives (dv_id, va_path, va_rows, va_bytes)
+                    VALUES (:version_id, :path, :rows, :bytes)
+                """,
+                    {
+                        **params,
+                        "path": path,
+                        "rows": rows,
+                        "bytes": os.path.getsize(path),
+                    },
+                )
+                archive = (path, rows)
+
+            deleted = self._delete_version_rows(d_name, version_id, batch_size)
+            if compact:
+                self.compact_dataset(d_name, batch_size)
+
+            report = {
+                "version_id": version_id,
+                "path": archive[0],
+                "rows": archive[1],
+                "bytes": os.path.getsize(archive[0]),
+                "connection_rows_deleted": deleted,
+            }
+            print(f"Archived version {version_id} of {d_name}: {report}")
+            return report
         except Exception as e:
-            print(f"Error inserting new version: {str(e)}")
+            print(f"Error archiving version: {str(e)}")
             return None
 
-    def get_version_columns(self, version_id: int) -> List[str]:
+    def create_branch(
+        self,
+        d_name: str,
+        branch: str,
+        version_id: int,
+        description: Optional[str] = None,
+    ) -> bool:
         """
-        Gets the columns defined for a specific version.
+        Creates a branch of a dataset starting at one of its versions. Only the
+        branch row is written: the branch reads the rows of its base version until
+        versions are added to it, and new versions share unchanged rows with every
+        other branch.
 
         Args:
-            version_id: Version ID to get columns for
+            d_name: Name of the dataset
+            branch: Name of the new branch
+            version_id: Version ID the branch starts from
+            description: Optional description of the branch
 
         Returns:
-            List[str]: List of column names defined for the version
+            bool: True if successful, False otherwise
         """
         try:
             result = self.execute(
-                f"""
-                SELECT cd_column_name
-                FROM Column_Definition
-                WHERE dv_id = {version_id}
-                ORDER BY cd_id
-            """
+                """
+                INSERT INTO Dataset_Branches (d_name, db_name, db_base_dv_id, db_description)
+                SELECT d_name, :branch, dv_id, :description
+                FROM Dataset_Versions
+                WHERE dv_id = :version_id AND d_name = :d_name
+            """,
+                {
+                    "d_name": d_name,
+                    "branch": branch,
+                    "version_id": version_id,
+                    "description": description,
+                },
+            )
+            if result.rowcount != 1:
+                print(f"Version {version_id} does not belong to dataset {d_name}")
+                return False
+            return True
+        except Exception as e:
+            print(f"Error creating branch: {str(e)}")
+            return False
+
+    def get_branches(self, d_name: str) -> List[Dict]:
+        """
+        Gets the branches of a dataset.
+
+        Args:
+            d_name: Name of the dataset
+
+        Returns:
+            List[Dict]: One dictionary per branch with name, base_version_id,
+                        base_version_name, description and created_at
+        """
+        try:
+            result = self.execute(
+                """
+                SELECT b.db_name, b.db_base_dv_id, dv.dv_name, b.db_description,
+                       b.db_createdat
+                FROM Dataset_Branches b
+                JOIN Dataset_Versions dv ON dv.dv_id = b.db_base_dv_id
+                WHERE b.d_name = :d_name
+                ORDER BY b.db_createdat
+            """,
+                {"d_name": d_name},
             ).fetchall()
-            return [row[0] for row in result]
+            return [
+                {
+                    "name": row[0],
+                    "base_version_id": row[1],
+                    "base_version_name": row[2],
+                    "description": row[3],
+                    "created_at": row[4],
+                }
+                for row in result
+            ]
         except Exception as e:
-            print(f"Error getting version columns: {str(e)}")
+            if self._raise_errors:
+                raise
+            print(f"Error getting branches: {str(e)}")
             return []
 
-    def get_version_data_by_columns(
-        self, d_name: str, version_id: int
-    ) -> Optional[pd.DataFrame]:
+    def delete_branch(self, d_name: str, branch: str, batch_size: int = 10000) -> bool:
         """
-        Retrieves data for a specific version of a dataset using only the columns
-        defined for that version.
+        Deletes a branch and its versions, newest first. Rows shared with other
+        branches stay; the rest are reclaimed by ``compact_dataset``. Nothing is
+        deleted while another branch was created from one of its versions or a
+        version outside the branch aliases one of them.
 
         Args:
             d_name: Name of the dataset
-            version_id: Version ID to retrieve
+            branch: Name of the branch
+            batch_size: Maximum number of connection rows deleted per transaction
 
         Returns:
-            Optional[pd.DataFrame]: DataFrame containing version data with appropriate columns,
-                                or None if an error occurs
+            bool: True if successful, False otherwise
         """
         try:
-            # Get columns defined for this version
-            version_columns = self.get_version_columns(version_id)
+            params = {"d_name": d_name, "branch": branch}
+            versions = self.execute(
+                """
+                SELECT dv_id
+                FROM Dataset_Versions
+                WHERE d_name = :d_name AND dv_branch = :branch
+                ORDER BY dv_createdat DESC
+            """,
+                params,
+            ).fetchall()
 
-            if not version_columns:
-                print(f"No columns found for version {version_id}")
-                return None
+            dependent_branches = self.execute(
+                """
+                SELECT db.db_name
+                FROM Dataset_Branches db
+                JOIN Dataset_Versions dv ON dv.dv_id = db.db_base_dv_id
+                WHERE dv.d_name = :d_name AND dv.dv_branch = :branch
+                  AND db.db_name <> :branch
+            """,
+                params,
+            ).fetchall()
+            if dependent_branches:
+                print(
+                    f"Cannot delete branch {branch}: branches "
+                    f"{', '.join(row[0] for row in dependent_branches)} were created from it"
+                )
+                return False
+            aliases = self.execute(
+                """
+                SELECT a.dv_id
+                FROM Dataset_Versions a
+                JOIN Dataset_Versions dv ON dv.dv_id = a.dv_alias_of
+                WHERE dv.d_name = :d_name AND dv.dv_branch = :branch
+                  AND (a.dv_branch IS NULL OR a.dv_branch <> :branch)
+            """,
+                params,
+            ).fetchall()
+            if aliases:
+                print(
+                    f"Cannot delete branch {branch}: its versions are aliased by versions "
+                    f"{', '.join(str(row[0]) for row in aliases)}"
+                )
+                return False
 
-            # Build column selection string, including data_id
-            columns_str = ", ".join([f"d.[{col}]" for col in version_columns])
+            for row in versions:
+                if not self.delete_version(d_name, row[0], batch_size):
+                    return False
 
-            # Build and execute query
-            query = f"""
-                SELECT d.data_id, {columns_str}
-                FROM [{d_name}] d
-                JOIN [{d_name}_connection] c ON d.data_id = c.data_id
-                WHERE c.dv_id = {version_id}
-                ORDER BY d.data_id
-            """
+            self.execute(
+                "DELETE FROM Dataset_Branches WHERE d_name = :d_name AND db_name = :branch",
+                params,
+            )
+            return True
+        except Exception as e:
+            print(f"Error deleting branch: {str(e)}")
+            return False
 
-            # Use pandas to read the query result
-            df = pd.read_sql(query, self.connection)
+    def compact_dataset(
+        self, d_name: str, batch_size: int = 10000, rebuild: bool = False
+    ) -> Optional[Dict]:
+        """
+        Reclaims storage no version references anymore: orphaned data rows, columns
+        of the dataset table that no version defines, and column definitions and
+        schemas left behind by deleted versions. Rows are deleted in bounded batches.
 
-            # Get version metadata
-            version_info = self.execute(
-                f"""
-                SELECT dv_createdat, dv_description
-                FROM Dataset_Versions
-                WHERE dv_id = {version_id}
-            """
-            ).fetchone()
+        Args:
+            d_name: Name of the dataset
+            batch_size: Maximum number of rows deleted per transaction
+            rebuild: Rebuild the dataset table afterwards so the space of dropped
+                     columns is released. This takes a table lock for the rebuild.
 
-            if version_info:
-                print(f"\nVersion {version_id} Info:")
-                print(f"Created at: {version_info[0]}")
-                print(f"Description: {version_info[1]}")
-                print(f"Number of columns: {len(version_columns)}")
-                print(f"Columns: {', '.join(version_columns)}")
-                print(f"Number of records: {len(df)}")
+        Returns:
+            Optional[Dict]: Compaction report with the deleted rows, dropped columns
+                            and reclaimed space in KB, or None if an error occurs
+        """
+        try:
+            tables = [
+                d_name,
+                f"{d_name}_connection",
+                "Column_Definition",
+                "Column_Statistics",
+                "Schema_Columns",
+            ]
+            size_before = self._get_storage_size_kb(tables)
+
+            metadata_rows_deleted = 0
+            for metadata_table in ["Column_Definition", "Column_Statistics"]:
+                metadata_rows_deleted += self._delete_in_batches(
+                    metadata_table,
+                    "NOT EXISTS (SELECT 1 FROM Dataset_Versions dv WHERE dv.dv_id = t.dv_id)",
+                    batch_size,
+                )
+            metadata_rows_deleted += self._delete_unused_schemas(batch_size)
 
-            return df
+            rows_deleted = self._delete_in_batches(
+                d_name,
+                f"NOT EXISTS (SELECT 1 FROM [{d_name}_connection] c WHERE c.data_id = t.data_id)",
+                batch_size,
+            )
+
+            table_columns = [
+                row[0]
+                for row in self.execute(self.sql.get_table_columns(d_name)).fetchall()
+            ]
+            referenced_columns = {
+                row[0]
+                for row in self.execute(
+                    """
+                    SELECT sc.sc_column_name
+                    FROM Dataset_Versions dv
+                    JOIN Schema_Columns sc ON sc.s_id = dv.s_id
+                    WHERE dv.d_name = :d_name
+                    UNION
+                    SELECT cd.cd_column_name
+                    FROM Column_Definition cd
+                    JOIN Dataset_Versions dv ON cd.dv_id = dv.dv_id
+                    WHERE dv.d_name = :d_name
+                """,
+                    {"d_name": d_name},
+                ).fetchall()
+            }
+            unused_columns = (
+                [
+                    col
+                    for col in table_columns
+                    if col != "data_id" and col not in referenced_columns
+                ]
+                if referenced_columns
+                else []
+            )
+            if unused_columns:
+                with self.transaction():
+                    self.execute(self.sql.drop_columns(d_name, unused_columns))
+                    self.execute(
+                        """
+                        DELETE FROM Dataset_Columns
+                        WHERE d_name = :d_name AND dc_column_name = :column_name
+                    """,
+                        [
+                            {"d_name": d_name, "column_name": col}
+                            for col in unused_columns
+                        ],
+                    )
 
+            if rebuild and (rows_deleted or unused_columns):
+                self.connection.commit()
+                self.execute(self.sql.rebuild_table(d_name))
+
+            self.connection.commit()
+            size_after = self._get_storage_size_kb(tables)
+
+            report = {
+                "rows_deleted": rows_deleted,
+                "columns_dropped": unused_columns,
+                "metadata_rows_deleted": metadata_rows_deleted,
+                "size_before_kb": size_before,
+                "size_after_kb": size_after,
+                "reclaimed_kb": max(size_before - size_after, 0),
+            }
+            print(f"Compaction of {d_name}: {report}")
+            return report
         except Exception as e:
-            print(f"Error retrieving version data: {str(e)}")
+            print(f"Error compacting dataset: {str(e)}")
             return None
 
-    def get_all_versions_info(self, d_name: str) -> List[Dict]:
+    def set_version_tag(self, version_id: int, tag: Optional[str]) -> bool:
         """
-        Gets information about all versions of a dataset.
+        Sets or clears the tag of a version. Tagged versions can be protected from
+        pruning by a retention policy.
+
+        Args:
+            version_id: Version ID to tag
+            tag: Tag to set, or None to clear it
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            self.execute(
+                """
+                UPDATE Dataset_Versions
+                SET dv_tag = :tag
+                WHERE dv_id = :version_id
+            """,
+                {"tag": tag or None, "version_id": version_id},
+            )
+            return True
+        except Exception as e:
+            print(f"Error setting version tag: {str(e)}")
+            return False
+
+    def set_retention_policy(self, d_name: str, policy: Optional[Dict]) -> bool:
+        """
+        Stores the retention policy of a dataset in the Datasets table.
 
         Args:
             d_name: Name of the dataset
+            policy: Retention policy (see ``RetentionPolicy``), or None to remove it
 
         Returns:
-            List[Dict]: List of dictionaries containing version information
+            bool: True if successful, False otherwise
+        """
+        try:
+            self.execute(
+                """
+                UPDATE Datasets
+                SET d_retention_policy = :policy
+                WHERE d_name = :d_name
+            """,
+                {"policy": json.dumps(policy) if policy else None, "d_name": d_name},
+            )
+            return True
+        except Exception as e:
+            print(f"Error setting retention policy: {str(e)}")
+            return False
+
+    def get_retention_policies(self) -> Dict[str, Dict]:
+        """
+        Gets the retention policies of all datasets that have one.
+
+        Returns:
+            Dict[str, Dict]: Retention policy per dataset name
         """
         try:
-            versions = []
             result = self.execute(
-                f"""
-                SELECT dv_id,dv_name, dv_createdat, dv_description
-                FROM Dataset_Versions
-                WHERE d_name = '{d_name}'
-                ORDER BY dv_createdat
+                """
+                SELECT d_name, d_retention_policy
+                FROM Datasets
+                WHERE d_retention_policy IS NOT NULL
             """
             ).fetchall()
+            return {row[0]: json.loads(row[1]) for row in result}
+        except Exception as e:
+            print(f"Error getting retention policies: {str(e)}")
+            return {}
+
+    def create_upload_job(
+        self,
+        d_name: str,
+        file_name: str,
+        description: Optional[str] = None,
+        branch: Optional[str] = None,
+    ) -> Optional[int]:
+        """
+        Records a queued upload job.
 
-            for row in result:
-                version_id = row[0]
-                columns = self.get_version_columns(version_id)
+        Args:
+            d_name: Name of the dataset the upload creates or adds a version to
+            file_name: Name of the uploaded file
+            description: Description of the dataset or version
+            branch: Branch the version is added to, None for the main lineage
 
-                versions.append(
-                    {
-                        "version_id": version_id,
-                        "version_name": row[1],
-                        "created_at": row[2],
-                        "description": row[3],
-                        "column_count": len(columns),
-                    }
+        Returns:
+            Optional[int]: Job ID, None if failed
+        """
+        try:
+            return self.execute(
+                """
+                INSERT INTO Upload_Jobs (d_name, uj_file_name, uj_description, uj_branch)
+                OUTPUT INSERTED.uj_id
+                VALUES (:d_name, :file_name, :description, :branch)
+            """,
+                {
+                    "d_name": d_name,
+                    "file_name": file_name[-255:],
+                    "description": description,
+                    "branch": branch,
+                },
+            ).scalar()
+        except Exception as e:
+            print(f"Error creating upload job: {str(e)}")
+            return None
+
+    def update_upload_job(
+        self,
+        job_id: int,
+        status: Optional[str] = None,
+        phase: Optional[str] = None,
+        rows: Optional[int] = None,
+        version_id: Optional[int] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        """
+        Records the progress of an upload job. Fields left as None keep their value;
+        the job's update time is refreshed either way.
+
+        Args:
+            job_id: Job ID
+            status: "queued", "running", "succeeded" or "failed"
+            phase: Current phase of the upload, see ``insert_new_version``
+            rows: Rows processed so far
+            version_id: Version created by the upload
+            error: Error message of a failed upload
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            self.execute(
+                """
+                UPDATE Upload_Jobs
+                SET uj_status = COALESCE(:status, uj_status),
+                    uj_phase = COALESCE(:phase, uj_phase),
+                    uj_rows = COALESCE(:rows, uj_rows),
+                    uj_version_id = COALESCE(:version_id, uj_version_id),
+                    uj_error = COALESCE(:error, uj_error),
+                    uj_updatedat = CURRENT_TIMESTAMP
+                WHERE uj_id = :job_id
+            """,
+                {
+                    "job_id": job_id,
+                    "status": status,
+                    "phase": phase,
+                    "rows": rows,
+                    "version_id": version_id,
+                    "error": error,
+                },
+            )
+            return True
+        except Exception as e:
+            print(f"Error updating upload job: {str(e)}")
+            return False
+
+    def touch_upload_jobs(self, job_ids: List[int]) -> bool:
+        """Refreshes the update time of jobs that are still queued or running."""
+        try:
+            if job_ids:
+                self.execute(
+                    """
+                    UPDATE Upload_Jobs
+                    SET uj_updatedat = CURRENT_TIMESTAMP
+                    WHERE uj_id = :job_id AND uj_status IN ('queued', 'running')
+                """,
+                    [{"job_id": job_id} for job_id in job_ids],
                 )
+            return True
+        except Exception as e:
+            print(f"Error refreshing upload jobs: {str(e)}")
+            return False
 
-            return versions
+    def get_upload_jobs(
+        self, d_name: Optional[str] = None, limit: int = 10, stale_seconds: int = 90
+    ) -> List[Dict]:
+        """
+        Gets the most recent upload jobs, newest first. Queued or running jobs not
+        updated for ``stale_seconds`` belong to an app that stopped and are
+        reported as "interrupted".
+
+        Args:
+            d_name: Only jobs of this dataset, or all jobs when None
+            limit: Maximum number of jobs
+            stale_seconds: Age of the last update after which an unfinished job is
+                           considered interrupted
 
+        Returns:
+            List[Dict]: Job details
+        """
+        try:
+            result = self.execute(
+                """
+                SELECT TOP (:limit) uj_id, d_name, uj_file_name, uj_description,
+                       uj_branch,
+                       CASE
+                           WHEN uj_status IN ('queued', 'running')
+                                AND DATEDIFF(second, uj_updatedat, CURRENT_TIMESTAMP)
+                                    > :stale_seconds
+                           THEN 'interrupted'
+                           ELSE uj_status
+                       END,
+                       uj_phase, uj_rows, uj_version_id, uj_error, uj_createdat,
+                       uj_updatedat
+                FROM Upload_Jobs
+                WHERE :d_name IS NULL OR d_name = :d_name
+                ORDER BY uj_id DESC
+            """,
+                {"d_name": d_name, "limit": limit, "stale_seconds": stale_seconds},
+            ).fetchall()
+            return [
+                {
+                    "job_id": row[0],
+                    "dataset": row[1],
+                    "file_name": row[2],
+                    "description": row[3],
+                    "branch": row[4],
+                    "status": row[5],
+                    "phase": row[6],
+                    "rows": row[7],
+                    "version_id": row[8],
+                    "error": row[9],
+                    "created_at": row[10],
+                    "updated_at": row[11],
+                }
+                for row in result
+            ]
         except Exception as e:
-            print(f"Error getting versions info: {str(e)}")
+            print(f"Error getting upload jobs: {str(e)}")
             return []
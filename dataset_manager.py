@@ -1,12 +1,24 @@
 import streamlit as st
-from typing import Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 from connection_manager import ConnectionManager
-from database_connection import DatabaseConnection
-from dataset_uploader import DatasetUploader
 from config import Config
 from ui_components import UIComponents
+from ui_cache import UICache
+
+# The Connections page needs no database: pandas, SQLAlchemy and the upload
+# readers are only imported once the Datasets page is rendered.
+if TYPE_CHECKING:
+    from database_connection import DatabaseConnection
 
 class DatasetManager:
+    JOB_STATUS_ICONS = {
+        "queued": "⏳",
+        "running": "🔄",
+        "succeeded": "✅",
+        "failed": "❌",
+        "interrupted": "⚠️",
+    }
+
     def __init__(self, conn_manager: ConnectionManager):
         self.conn_manager = conn_manager
 
@@ -21,12 +33,64 @@ class DatasetManager:
         if not selected_conn:
             return
 
+        from database_connection import DatabaseConnection
+
         try:
             db_conn = DatabaseConnection(self.conn_manager.connections[selected_conn])
+            # Connect here: the query methods report failures as empty results
+            db_conn.connection
             self._handle_datasets(db_conn)
         except Exception as e:
             st.error(f"Error connecting to database: {str(e)}")
 
+    def render_catalog_page(self):
+        st.header("Catalog")
+        connections = self.conn_manager.connections
+        if not connections:
+            st.warning("Please add a database connection first.")
+            return
+
+        search_col, refresh_col = st.columns([4, 1])
+        with search_col:
+            text = st.text_input(
+                "Search datasets",
+                placeholder="Dataset name, description, connection or column",
+            )
+        with refresh_col:
+            if st.button("🔄 Refresh"):
+                UICache.invalidate_catalog()
+
+        with st.spinner(f"Querying {len(connections)} connections..."):
+            catalog = UICache.get_catalog(connections)
+
+        from catalog import CatalogAggregator
+
+        for name, status in catalog["connections"].items():
+            if status["status"] != "ok":
+                st.warning(f"{name}: {status['status']} ({status['error']})")
+        results = CatalogAggregator.search(catalog, text)
+        st.caption(
+            f"{len(results)} of {len(catalog['datasets'])} datasets"
+            f"{' (partial results)' if catalog['partial'] else ''}, collected "
+            f"{catalog['collected_at']:%Y-%m-%d %H:%M:%S} in {catalog['seconds']}s"
+        )
+        st.dataframe(
+            [
+                {
+                    "Connection": entry["connection"],
+                    "Dataset": entry["d_name"],
+                    "Description": entry["description"],
+                    "Versions": entry["version_count"],
+                    "Branches": entry["branch_count"],
+                    "Rows": entry["row_count"],
+                    "Last Version": entry["last_version_at"],
+                    "Matched Columns": ", ".join(entry["matched_columns"]),
+                }
+                for entry in results
+            ],
+            hide_index=True,
+        )
+
     def _display_existing_connections(self):
         if self.conn_manager.connections:
             st.subheader("Existing Connections")
@@ -57,11 +121,54 @@ class DatasetManager:
             return None
         return st.selectbox("Select Connection", connection_names)
 
-    def _handle_datasets(self, db_conn: DatabaseConnection):
+    def _handle_datasets(self, db_conn: "DatabaseConnection"):
+        self._display_upload_jobs(db_conn)
         self._handle_new_dataset(db_conn)
         self._display_existing_datasets(db_conn)
 
-    def _handle_new_dataset(self, db_conn: DatabaseConnection):
+    def _upload_jobs(self, db_conn: "DatabaseConnection") -> List[Dict]:
+        return db_conn.get_upload_jobs(
+            limit=Config.UPLOAD_JOBS_SHOWN,
+            stale_seconds=Config.UPLOAD_JOB_STALE_SECONDS,
+        )
+
+    def _display_upload_jobs(self, db_conn: "DatabaseConnection"):
+        # Only poll while jobs are unfinished; the rest of the page stays usable
+        polling = any(
+            job["status"] in ("queued", "running") for job in self._upload_jobs(db_conn)
+        )
+
+        @st.fragment(run_every=Config.UPLOAD_POLL_SECONDS if polling else None)
+        def upload_jobs():
+            jobs = self._upload_jobs(db_conn)
+            if polling and not any(
+                job["status"] in ("queued", "running") for job in jobs
+            ):
+                # Jobs finished: refresh the whole page to show the new versions
+                st.rerun()
+            if not jobs:
+                return
+
+            with st.expander("⬆️ Uploads", expanded=polling):
+                for job in jobs:
+                    line = (
+                        f"{self.JOB_STATUS_ICONS.get(job['status'], '')} "
+                        f"**{job['dataset']}** ← {job['file_name']}: {job['status']}"
+                    )
+                    if job["status"] == "running":
+                        line += f" ({job['phase']}, {job['rows']:,} rows)"
+                    elif job["status"] == "succeeded":
+                        line += f" (version {job['version_id']}, {job['rows']:,} rows)"
+                    st.write(line)
+                    if job["error"]:
+                        st.caption(job["error"])
+
+        upload_jobs()
+
+    def _handle_new_dataset(self, db_conn: "DatabaseConnection"):
+        from dataset_uploader import DatasetUploader
+        from file_readers import FileReaders
+
         if st.button("➕ Add New Dataset"):
             st.session_state["adding_dataset"] = True
 
@@ -69,20 +176,42 @@ class DatasetManager:
             with st.form("new_dataset_form"):
                 dataset_name = st.text_input("Dataset Name")
                 description = st.text_input("Description")
-                uploaded_file = st.file_uploader("Choose CSV file", type="csv")
+                storage_layout = st.selectbox(
+                    "Storage Layout",
+                    list(Config.STORAGE_LAYOUTS.keys()),
+                    format_func=Config.STORAGE_LAYOUTS.get,
+                )
+                compression = st.selectbox(
+                    "Compression",
+                    list(Config.STORAGE_COMPRESSIONS.keys()),
+                    format_func=Config.STORAGE_COMPRESSIONS.get,
+                    help="Sparse datasets cannot be compressed",
+                )
+                partitioned = st.checkbox(
+                    "Partition by version",
+                    help="Keeps each version's rows in a partition of their own, so "
+                    "reading, archiving or deleting a version only touches its partition",
+                )
+                uploaded_file = st.file_uploader(
+                    "Choose data file", type=FileReaders.supported_types()
+                )
                 submitted = st.form_submit_button("Create Dataset")
 
                 if submitted and dataset_name and uploaded_file:
                     if DatasetUploader.upload_dataset(
-                        db_conn, dataset_name, description, uploaded_file
+                        db_conn,
+                        dataset_name,
+                        description,
+                        uploaded_file,
+                        storage_layout,
+                        compression,
+                        partitioned,
                     ):
                         st.session_state["adding_dataset"] = False
                         st.rerun()
 
-    def _display_existing_datasets(self, db_conn: DatabaseConnection):
-        datasets = db_conn.execute(
-            "SELECT d_name, d_description FROM Datasets"
-        ).fetchall()
+    def _display_existing_datasets(self, db_conn: "DatabaseConnection"):
+        datasets = UICache.get_datasets(db_conn)
 
         if not datasets:
             st.info("No datasets found in this connection.")
@@ -93,52 +222,316 @@ class DatasetManager:
             self._render_dataset_section(db_conn, d_name, description)
 
     def _render_dataset_section(
-        self, db_conn: DatabaseConnection, d_name: str, description: str
+        self, db_conn: "DatabaseConnection", d_name: str, description: str
     ):
         with st.expander(f"📊 {d_name}"):
             st.write(f"Description: {description}")
             self._handle_new_version(db_conn, d_name)
+            self._handle_compaction(db_conn, d_name)
+            self._handle_compression(db_conn, d_name)
+            self._handle_retention_policy(db_conn, d_name)
+            self._handle_branches(db_conn, d_name)
             self._display_versions(db_conn, d_name)
 
-    def _handle_new_version(self, db_conn: DatabaseConnection, d_name: str):
+    def _handle_new_version(self, db_conn: "DatabaseConnection", d_name: str):
+        from dataset_uploader import DatasetUploader
+        from file_readers import FileReaders
+
         if st.button("➕ Add New Version", key=f"new_version_{d_name}"):
             st.session_state[f"adding_version_{d_name}"] = True
 
         if st.session_state.get(f"adding_version_{d_name}", False):
+            branches = [Config.DEFAULT_BRANCH] + [
+                branch["name"] for branch in UICache.get_branches(db_conn, d_name)
+            ]
             with st.form(f"new_version_{d_name}"):
                 description = st.text_input("Version Description")
-                uploaded_file = st.file_uploader("Choose CSV file", type="csv")
+                branch = st.selectbox("Branch", branches)
+                uploaded_file = st.file_uploader(
+                    "Choose data file", type=FileReaders.supported_types()
+                )
+                estimated = st.form_submit_button("Estimate Changes")
                 submitted = st.form_submit_button("Create New Version")
 
+                if estimated and uploaded_file:
+                    self._display_version_estimate(
+                        db_conn,
+                        d_name,
+                        uploaded_file,
+                        None if branch == Config.DEFAULT_BRANCH else branch,
+                    )
+
                 if submitted and uploaded_file:
                     if DatasetUploader.upload_new_version(
-                        db_conn, d_name, description, uploaded_file
+                        db_conn,
+                        d_name,
+                        description,
+                        uploaded_file,
+                        None if branch == Config.DEFAULT_BRANCH else branch,
                     ):
                         st.session_state[f"adding_version_{d_name}"] = False
                         st.rerun()
 
-    def _display_versions(self, db_conn: DatabaseConnection, d_name: str):
-        versions = db_conn.get_all_versions_info(d_name)
+    def _display_version_estimate(
+        self,
+        db_conn: "DatabaseConnection",
+        d_name: str,
+        uploaded_file,
+        branch: Optional[str],
+    ):
+        from file_readers import FileReaders
+        from row_hash_index import RowHashIndex
+
+        row_index = None
+        if Config.ROW_INDEX_ENABLED:
+            row_index = RowHashIndex(Config.ROW_INDEX_DIR, db_conn.connection_key, d_name)
+        with st.spinner("Estimating changes..."):
+            estimate = db_conn.estimate_version_delta(
+                d_name,
+                FileReaders.read_chunks(uploaded_file),
+                branch,
+                row_index,
+            )
+        if estimate is None:
+            st.error("Failed to estimate the changes.")
+            return
+        if estimate["fingerprint_match"]:
+            st.info("The file matches the latest version; uploading it adds nothing.")
+
+        margin = f" ± {estimate['margin_rows']:,}" if estimate["margin_rows"] else ""
+        new_col, unchanged_col, gone_col = st.columns(3)
+        new_col.metric("New rows", f"{estimate['new_rows']:,}{margin}")
+        unchanged_col.metric("Unchanged rows", f"{estimate['unchanged_rows']:,}{margin}")
+        gone_col.metric("Removed rows", f"{estimate['gone_rows']:,}{margin}")
+        if estimate["added_columns"] or estimate["removed_columns"]:
+            st.write(
+                f"Added columns: {', '.join(estimate['added_columns']) or '-'}; "
+                f"removed columns: {', '.join(estimate['removed_columns']) or '-'}"
+            )
+        cost = estimate["cost"]
+        st.caption(
+            f"{estimate['method'].capitalize()} estimate. Upload would stage "
+            f"{cost['staged_rows']:,} rows ({cost['staged_bytes'] / 1e6:.1f} MB), insert "
+            f"{cost['dataset_rows_inserted']:,} rows and add "
+            f"{cost['alter_table_columns']} table columns."
+        )
+
+    def _handle_compaction(self, db_conn: "DatabaseConnection", d_name: str):
+        if st.button("🧹 Compact Storage", key=f"compact_{d_name}"):
+            report = db_conn.compact_dataset(d_name)
+            if report is None:
+                st.error("Failed to compact dataset.")
+            else:
+                # Dropped columns and reclaimed storage show in the dataset views
+                # and the catalog
+                UICache.invalidate(db_conn, d_name)
+                UICache.invalidate_catalog()
+                st.success(
+                    f"Removed {report['rows_deleted']} orphaned rows and "
+                    f"{len(report['columns_dropped'])} unused columns, "
+                    f"reclaimed {report['reclaimed_kb']} KB."
+                )
+
+    def _handle_compression(self, db_conn: "DatabaseConnection", d_name: str):
+        if st.button("🗜️ Storage Format", key=f"compression_{d_name}"):
+            st.session_state[f"editing_compression_{d_name}"] = True
+
+        if st.session_state.get(f"editing_compression_{d_name}", False):
+            compressions = list(Config.STORAGE_COMPRESSIONS.keys())
+            current = db_conn.get_dataset_compression(d_name)
+            partitioned = db_conn.is_connection_partitioned(d_name)
+            with st.form(f"compression_form_{d_name}"):
+                compression = st.selectbox(
+                    "Compression",
+                    compressions,
+                    index=compressions.index(current),
+                    format_func=Config.STORAGE_COMPRESSIONS.get,
+                )
+                online = st.checkbox(
+                    "Convert online (keeps the dataset usable during the conversion)",
+                    value=True,
+                    help="Switching to or from columnstore still blocks the dataset "
+                    "while its keys are recreated.",
+                )
+                partition = st.checkbox(
+                    "Partition by version",
+                    value=partitioned,
+                    disabled=partitioned,
+                )
+                submitted = st.form_submit_button("Convert")
+
+            if submitted:
+                with st.spinner("Converting dataset tables..."):
+                    report = db_conn.set_dataset_compression(d_name, compression, online)
+                    if report is not None and partition and not partitioned:
+                        if not db_conn.set_connection_partitioning(d_name, online):
+                            st.error("Failed to partition the connection table.")
+                if report is None:
+                    st.error("Failed to convert dataset storage.")
+                else:
+                    UICache.invalidate(db_conn, d_name)
+                    UICache.invalidate_catalog()
+                    st.session_state[f"editing_compression_{d_name}"] = False
+                    st.success(
+                        f"Converted from {report['previous_compression']} to "
+                        f"{report['compression']}: {report['size_before_kb']} KB → "
+                        f"{report['size_after_kb']} KB."
+                    )
+
+    def _handle_retention_policy(self, db_conn: "DatabaseConnection", d_name: str):
+        if st.button("🗓️ Retention Policy", key=f"retention_{d_name}"):
+            st.session_state[f"editing_retention_{d_name}"] = True
+
+        if st.session_state.get(f"editing_retention_{d_name}", False):
+            current = db_conn.get_retention_policies().get(d_name)
+            policy = UIComponents.create_retention_policy_form(d_name, current)
+            if policy is not None:
+                policy = {key: value for key, value in policy.items() if value}
+                if db_conn.set_retention_policy(d_name, policy or None):
+                    st.session_state[f"editing_retention_{d_name}"] = False
+                    st.rerun()
+                st.error("Failed to save retention policy.")
+
+    def _handle_branches(self, db_conn: "DatabaseConnection", d_name: str):
+        branches = UICache.get_branches(db_conn, d_name)
+        for branch in branches:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.write(
+                    f"🌿 **{branch['name']}** from version {branch['base_version_name']}"
+                    + (f" – {branch['description']}" if branch["description"] else "")
+                )
+            with col2:
+                if st.button("Delete", key=f"delete_branch_{d_name}_{branch['name']}"):
+                    if db_conn.delete_branch(d_name, branch["name"]):
+                        UICache.invalidate(db_conn, d_name)
+                        st.rerun()
+                    st.error("Failed to delete branch.")
+
+        if st.button("🌿 New Branch", key=f"new_branch_{d_name}"):
+            st.session_state[f"adding_branch_{d_name}"] = True
+
+        if st.session_state.get(f"adding_branch_{d_name}", False):
+            versions = UICache.get_versions_info(db_conn, d_name)
+            with st.form(f"new_branch_{d_name}"):
+                name = st.text_input("Branch Name")
+                description = st.text_input("Branch Description")
+                base = st.selectbox(
+                    "Branch From",
+                    versions,
+                    format_func=self._version_label,
+                )
+                submitted = st.form_submit_button("Create Branch")
+
+                if submitted and name and base:
+                    if name == Config.DEFAULT_BRANCH or name in [
+                        branch["name"] for branch in branches
+                    ]:
+                        st.error(f"Branch '{name}' already exists.")
+                    elif db_conn.create_branch(
+                        d_name, name, base["version_id"], description or None
+                    ):
+                        UICache.invalidate(db_conn, d_name)
+                        st.session_state[f"adding_branch_{d_name}"] = False
+                        st.rerun()
+                    else:
+                        st.error("Failed to create branch.")
+
+    @staticmethod
+    def _version_label(version: dict) -> str:
+        label = f"Version {version['version_name']}"
+        if version["branch"]:
+            label += f" ({version['branch']})"
+        return label
+
+    def _preview_version(self, db_conn: "DatabaseConnection", d_name: str, version: dict):
+        key = f"{d_name}_v{version['version_id']}"
+        mode = st.radio(
+            "Preview Mode", ["First Rows", "Sample"], horizontal=True, key=f"{key}_mode"
+        )
+        stratify_by = None
+        if mode == "Sample":
+            stratify_by = st.selectbox(
+                "Stratify By",
+                [None]
+                + UICache.get_version_columns(db_conn, d_name, version["version_id"]),
+                format_func=lambda column: column or "No stratification",
+                key=f"{key}_stratify",
+            )
+
+        if st.button("Preview Data", key=f"{key}_preview"):
+            if mode == "Sample":
+                # Samples are cheap and meant to differ between clicks, so not cached
+                df = db_conn.get_version_sample(
+                    d_name, version["version_id"], Config.SAMPLE_ROWS, stratify_by
+                )
+            else:
+                df = UICache.get_version_preview(db_conn, d_name, version["version_id"])
+            if df is not None:
+                st.dataframe(df)
+
+    def _display_versions(self, db_conn: "DatabaseConnection", d_name: str):
+        versions = UICache.get_versions_info(db_conn, d_name)
         if not versions:
             return
 
-        tabs = st.tabs([f"Version {v['version_name']}" for v in versions])
+        tabs = st.tabs([self._version_label(v) for v in versions])
         for tab, version in zip(tabs, versions):
             with tab:
                 st.write(f"Created: {version['created_at']}")
                 st.write(f"Description: {version['description']}")
                 st.write(f"Number of columns: {version['column_count']}")
+                if version["row_count"] is not None:
+                    st.write(f"Number of records: {version['row_count']}")
+                if version["tag"]:
+                    st.write(f"Tag: {version['tag']}")
+                if version["archived"]:
+                    st.write("Storage: 🧊 archived")
 
-                if st.button("Show Schema", key=f"{d_name}_v{version['version_name']}"):
+                tag = st.text_input(
+                    "Tag",
+                    value=version["tag"] or "",
+                    key=f"{d_name}_v{version['version_id']}_tag",
+                )
+                if st.button(
+                    "Save Tag", key=f"{d_name}_v{version['version_id']}_save_tag"
+                ):
+                    if db_conn.set_version_tag(version["version_id"], tag or None):
+                        UICache.invalidate(db_conn, d_name)
+                        st.rerun()
+                    st.error("Failed to save tag.")
+
+                if st.button("Show Schema", key=f"{d_name}_v{version['version_id']}"):
                     UIComponents.display_version_schema(
                         db_conn, d_name, version["version_id"], version["version_name"]
                     )
 
                 if st.button(
-                    "Preview Data", key=f"{d_name}_v{version['version_name']}_preview"
+                    "Show Statistics",
+                    key=f"{d_name}_v{version['version_id']}_statistics",
                 ):
-                    df = db_conn.get_version_data_by_columns(
-                        d_name, version["version_id"]
+                    UIComponents.display_version_statistics(
+                        db_conn, d_name, version["version_id"], version["version_name"]
                     )
-                    if df is not None:
-                        st.dataframe(df.head())
+
+                self._preview_version(db_conn, d_name, version)
+
+                if not version["archived"] and st.button(
+                    "🧊 Archive Version",
+                    key=f"{d_name}_v{version['version_id']}_archive",
+                ):
+                    if db_conn.archive_version(
+                        d_name, version["version_id"], Config.ARCHIVE_DIR
+                    ):
+                        UICache.invalidate(db_conn, d_name)
+                        st.rerun()
+                    st.error("Failed to archive version.")
+
+                if st.button(
+                    "🗑️ Delete Version",
+                    key=f"{d_name}_v{version['version_id']}_delete",
+                ):
+                    if db_conn.delete_version(d_name, version["version_id"]):
+                        UICache.invalidate(db_conn, d_name)
+                        st.rerun()
+                    st.error("Failed to delete version.")
@@ -1,25 +1,45 @@
-import pandas as pd
 import streamlit as st
-from typing import Optional
-from database_connection import DatabaseConnection
+from typing import TYPE_CHECKING, Optional
+from upload_jobs import UploadJobQueue
+
+if TYPE_CHECKING:
+    from database_connection import DatabaseConnection
+
+
+@st.cache_resource
+def _upload_queue() -> UploadJobQueue:
+    """One queue per app process, shared by all sessions."""
+    return UploadJobQueue()
+
 
 class DatasetUploader:
     @staticmethod
     def upload_dataset(
-        db_conn: DatabaseConnection, dataset_name: str, description: str, uploaded_file
+        db_conn: "DatabaseConnection",
+        dataset_name: str,
+        description: str,
+        uploaded_file,
+        storage_layout: str = "standard",
+        compression: str = "none",
+        partitioned: bool = False,
     ) -> bool:
         try:
-            df = pd.read_csv(uploaded_file)
-            version_id = db_conn.insert_dataset_in_database(
-                dataset_name, df, description
+            job_id = _upload_queue().submit(
+                db_conn,
+                dataset_name,
+                uploaded_file,
+                description,
+                storage_layout=storage_layout,
+                compression=compression,
+                partitioned=partitioned,
             )
 
-            if version_id:
+            if job_id:
                 st.success(
-                    f"Dataset '{dataset_name}' created successfully with version {version_id}!"
+                    f"Dataset '{dataset_name}' is being created in the background (job {job_id})."
                 )
                 return True
-            st.error("Failed to create dataset.")
+            st.error("Failed to queue dataset upload.")
             return False
         except Exception as e:
             st.error(f"Error creating dataset: {str(e)}")
@@ -27,16 +47,21 @@ class DatasetUploader:
 
     @staticmethod
     def upload_new_version(
-        db_conn: DatabaseConnection, dataset_name: str, description: str, uploaded_file
+        db_conn: "DatabaseConnection",
+        dataset_name: str,
+        description: str,
+        uploaded_file,
+        branch: Optional[str] = None,
     ) -> bool:
         try:
-            df = pd.read_csv(uploaded_file)
-            version_id = db_conn.insert_new_version(dataset_name, df, description)
+            job_id = _upload_queue().submit(
+                db_conn, dataset_name, uploaded_file, description, branch
+            )
 
-            if version_id:
-                st.success(f"New version {version_id} created successfully!")
+            if job_id:
+                st.success(f"New version is being uploaded in the background (job {job_id}).")
                 return True
-            st.error("Failed to create new version.")
+            st.error("Failed to queue version upload.")
             return False
         except Exception as e:
             st.error(f"Error creating new version: {str(e)}")
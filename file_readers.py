@@ -0,0 +1,200 @@
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+import pandas as pd
+
+
+class FileReaders:
+    """
+    Registry of upload readers keyed by file extension. Every reader yields a file
+    as DataFrame chunks that can be fed to ``insert_new_version``.
+
+    Compressed files (for example ``data.csv.gz`` or ``data.csv.zst``) are
+    decompressed on the fly and then read by the reader of the inner extension.
+    pyarrow is used when installed: CSV files are streamed and parsed on all cores and Parquet
+    and Feather files are read natively with column projection. Without pyarrow
+    only CSV files can be read, through ``pd.read_csv``.
+    """
+
+    COMPRESSIONS = {".gz": "gzip", ".bz2": "bz2", ".zst": "zstd", ".zstd": "zstd"}
+    _readers: Dict[str, Callable] = {}
+
+    @classmethod
+    def register(cls, *extensions: str):
+        """Registers a reader function ``(source, chunksize, columns, compression)``."""
+
+        def decorator(reader: Callable) -> Callable:
+            for extension in extensions:
+                cls._readers[extension] = reader
+            return reader
+
+        return decorator
+
+    @classmethod
+    def supported_types(cls) -> List[str]:
+        """File extensions accepted by the upload widgets."""
+        return [ext.lstrip(".") for ext in list(cls._readers) + list(cls.COMPRESSIONS)]
+
+    @classmethod
+    def read_chunks(
+        cls,
+        source,
+        name: Optional[str] = None,
+        chunksize: int = 100000,
+        columns: Optional[List[str]] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Reads a file as DataFrame chunks.
+
+        Args:
+            source: File path or file-like object (e.g. a Streamlit upload)
+            name: File name used to detect the format, defaults to the source's name
+            chunksize: Maximum number of rows per chunk
+            columns: Only read these columns, when the format supports it
+
+        Returns:
+            Iterator[pd.DataFrame]: The file's rows in chunks
+        """
+        suffixes = [s.lower() for s in Path(name or getattr(source, "name", str(source))).suffixes]
+        compression = None
+        if suffixes and suffixes[-1] in cls.COMPRESSIONS:
+            compression = cls.COMPRESSIONS[suffixes.pop()]
+        extension = suffixes[-1] if suffixes else ""
+
+        if extension not in cls._readers:
+            raise ValueError(f"Unsupported file type: {extension or 'unknown'}")
+        return cls._readers[extension](source, chunksize, columns, compression)
+
+
+# Bytes of CSV parsed per block; types are inferred from the first block
+CSV_BLOCK_BYTES = 16 << 20
+
+
+def _input_stream(source, compression: Optional[str]):
+    import pyarrow as pa
+
+    if isinstance(source, (str, Path)):
+        return pa.input_stream(str(source), compression=compression)
+    return pa.input_stream(pa.PythonFile(source, mode="r"), compression=compression)
+
+
+def _seekable_input(source, compression: Optional[str]):
+    """Columnar formats need random access, so compressed files are decompressed into memory."""
+    import pyarrow as pa
+
+    if compression is None:
+        return source if isinstance(source, (str, Path)) else pa.PythonFile(source, mode="r")
+    with _input_stream(source, compression) as stream:
+        return pa.BufferReader(stream.read_buffer())
+
+
+def _arrow_csv_chunks(
+    source, chunksize: int, columns: Optional[List[str]], compression: Optional[str]
+) -> Iterator[pd.DataFrame]:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    def open_reader(column_types: Dict[str, "pa.DataType"]):
+        return pa_csv.open_csv(
+            _input_stream(source, compression),
+            read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_BYTES),
+            # Empty cells are NULL, as with pd.read_csv
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=columns,
+                strings_can_be_null=True,
+                column_types=column_types,
+            ),
+        )
+
+    reader = open_reader({})
+    # pd.read_csv leaves dates and timestamps as text. Read the columns inferred as
+    # temporal from the first block again as strings, so their text is kept as
+    # written instead of being parsed and reformatted.
+    temporal = {
+        field.name: pa.string()
+        for field in reader.schema
+        if pa.types.is_temporal(field.type)
+    }
+    if temporal:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        reader = open_reader(temporal)
+
+    batches, buffered = [], 0
+    for batch in reader:
+        batches.append(batch)
+        buffered += batch.num_rows
+        if buffered >= chunksize:
+            table = pa.Table.from_batches(batches)
+            for offset in range(0, buffered - buffered % chunksize, chunksize):
+                yield table.slice(offset, chunksize).to_pandas()
+            rest = table.slice(buffered - buffered % chunksize)
+            batches, buffered = rest.to_batches(), rest.num_rows
+    if buffered:
+        yield pa.Table.from_batches(batches, schema=reader.schema).to_pandas()
+
+
+@FileReaders.register(".csv", ".txt")
+def read_csv_chunks(
+    source, chunksize: int, columns: Optional[List[str]], compression: Optional[str]
+) -> Iterator[pd.DataFrame]:
+    try:
+        import pyarrow as pa
+    except ImportError:
+        yield from pd.read_csv(
+            source, chunksize=chunksize, usecols=columns, compression=compression
+        )
+        return
+
+    # The streaming reader parses each block on all cores and keeps memory bounded.
+    # Column types are inferred from the first block; if a later block does not
+    # fit them, the rest of the file is read with pd.read_csv, which infers types
+    # per chunk.
+    rows_read = 0
+    try:
+        for chunk in _arrow_csv_chunks(source, chunksize, columns, compression):
+            yield chunk
+            rows_read += len(chunk)
+    except pa.ArrowInvalid:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        yield from pd.read_csv(
+            source,
+            chunksize=chunksize,
+            usecols=columns,
+            compression=compression,
+            skiprows=range(1, rows_read + 1),
+        )
+
+
+@FileReaders.register(".parquet", ".pq")
+def read_parquet_chunks(
+    source, chunksize: int, columns: Optional[List[str]], compression: Optional[str]
+) -> Iterator[pd.DataFrame]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet files requires pyarrow")
+
+    parquet_file = pq.ParquetFile(_seekable_input(source, compression))
+    for batch in parquet_file.iter_batches(
+        batch_size=chunksize, columns=columns, use_threads=True
+    ):
+        yield batch.to_pandas()
+
+
+@FileReaders.register(".feather", ".arrow", ".ipc")
+def read_feather_chunks(
+    source, chunksize: int, columns: Optional[List[str]], compression: Optional[str]
+) -> Iterator[pd.DataFrame]:
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("Reading Feather/Arrow files requires pyarrow")
+
+    reader = pa.ipc.open_file(_seekable_input(source, compression))
+    for index in range(reader.num_record_batches):
+        batch = reader.get_batch(index)
+        if columns:
+            batch = batch.select(columns)
+        for offset in range(0, batch.num_rows, chunksize):
+            yield batch.slice(offset, chunksize).to_pandas()
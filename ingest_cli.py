@@ -0,0 +1,414 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import pandas as pd
+from config import Config
+from connection_manager import ConnectionManager
+from database_connection import DatabaseConnection
+from file_readers import FileReaders
+from row_hash_index import RowHashIndex
+
+
+class FingerprintCache:
+    """
+    Maps ingested files (path, size, mtime and projected columns) to the content
+    fingerprint of the version they produced. Shared by the ingest threads.
+
+    The key is only a hint: an entry is trusted when the file's content sample
+    (see ``IngestJob.content_sample``) still matches the one stored with it, so
+    a file rewritten within the mtime resolution is read again.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            self._fingerprints = json.loads(path.read_text())
+        except (OSError, ValueError):
+            self._fingerprints = {}
+
+    def get(self, key: str, sample: str) -> Optional[str]:
+        with self._lock:
+            entry = self._fingerprints.get(key)
+        if not isinstance(entry, dict) or entry.get("sample") != sample:
+            return None
+        return entry["fingerprint"]
+
+    def put(self, key: str, sample: str, fingerprint: Optional[str]):
+        if not fingerprint:
+            return
+        with self._lock:
+            self._fingerprints[key] = {"sample": sample, "fingerprint": fingerprint}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(".tmp")
+            temp_path.write_text(json.dumps(self._fingerprints))
+            os.replace(temp_path, self.path)
+
+
+class IngestJob:
+    """Ingests one file as a new version of a dataset and times each phase."""
+
+    def __init__(
+        self,
+        d_name: str,
+        path: Path,
+        description: str,
+        chunksize: int,
+        use_row_index: bool = False,
+        columns: Optional[List[str]] = None,
+        branch: Optional[str] = None,
+        checkpoint_rows: Optional[int] = None,
+        fingerprints: Optional[FingerprintCache] = None,
+        alias_duplicates: bool = False,
+        compression: str = "none",
+        partitioned: bool = False,
+        dry_run: bool = False,
+        max_new_rows: Optional[int] = None,
+    ):
+        self.d_name = d_name
+        self.path = path
+        self.description = description
+        self.chunksize = chunksize
+        self.use_row_index = use_row_index
+        self.columns = columns
+        self.branch = branch
+        self.checkpoint_rows = checkpoint_rows
+        self.fingerprints = fingerprints
+        self.alias_duplicates = alias_duplicates
+        self.compression = compression
+        self.partitioned = partitioned
+        self.dry_run = dry_run
+        self.max_new_rows = max_new_rows
+        self.phase_seconds = OrderedDict(read=0.0, stage=0.0, publish=0.0)
+        self.rows = 0
+        self._phase = None
+        self._phase_started = None
+
+    def _timed_chunks(self) -> Iterator[pd.DataFrame]:
+        chunks = FileReaders.read_chunks(
+            self.path, chunksize=self.chunksize, columns=self.columns
+        )
+        while True:
+            started = time.perf_counter()
+            chunk = next(chunks, None)
+            elapsed = time.perf_counter() - started
+            self.phase_seconds["read"] += elapsed
+            # Reading happens while the stage phase is running; keep the two apart
+            if self._phase_started is not None:
+                self._phase_started += elapsed
+            if chunk is None:
+                return
+            yield chunk
+
+    def _progress(self, phase: str, rows: int):
+        now = time.perf_counter()
+        if self._phase is not None:
+            self.phase_seconds[self._phase] += now - self._phase_started
+        self._phase, self._phase_started = phase, now
+        if phase == "done":
+            self._phase = None
+
+        self.rows = rows
+        print(f"[{self.d_name}] {self.path.name}: {phase} {rows} rows", file=sys.stderr)
+
+    SAMPLE_BYTES = 64 << 10
+
+    def file_key(self) -> str:
+        stat = self.path.stat()
+        return f"{self.path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def content_sample(self) -> str:
+        """Hashes the first, middle and last ``SAMPLE_BYTES`` of the file."""
+        digest = hashlib.blake2b(digest_size=16)
+        size = self.path.stat().st_size
+        with open(self.path, "rb") as file:
+            for offset in (0, (size - self.SAMPLE_BYTES) // 2, size - self.SAMPLE_BYTES):
+                file.seek(max(0, offset))
+                digest.update(file.read(self.SAMPLE_BYTES))
+        return digest.hexdigest()
+
+    def checkpoint_key(self) -> Optional[str]:
+        """Identifies the file, so a rerun after a failure resumes its ingest."""
+        if not self.checkpoint_rows:
+            return None
+        return self.file_key()[-255:]
+
+    def fingerprint_key(self) -> str:
+        return f"{self.d_name}:{self.file_key()}:{','.join(self.columns or [])}"
+
+    def estimate(
+        self, db_conn: DatabaseConnection, row_index: Optional[RowHashIndex]
+    ) -> Optional[Dict]:
+        """Estimates the version delta without ingesting anything."""
+        return db_conn.estimate_version_delta(
+            self.d_name,
+            FileReaders.read_chunks(self.path, chunksize=self.chunksize, columns=self.columns),
+            self.branch,
+            row_index,
+        )
+
+    def run(self, db_conn: DatabaseConnection, dataset_exists: bool) -> Dict:
+        row_index = None
+        if self.use_row_index:
+            row_index = RowHashIndex(
+                Config.ROW_INDEX_DIR, db_conn.connection_key, self.d_name
+            )
+
+        if self.dry_run or (dataset_exists and self.max_new_rows is not None):
+            estimate = self.estimate(db_conn, row_index if dataset_exists else None)
+            if estimate is None:
+                status = "failed"
+            elif self.dry_run:
+                status = "estimated"
+            elif estimate["new_rows"] > self.max_new_rows:
+                status = "skipped"
+            else:
+                status = None
+            if status is not None:
+                return {
+                    "dataset": self.d_name,
+                    "file": str(self.path),
+                    "status": status,
+                    "estimate": estimate,
+                }
+
+        checkpoint = {}
+        if self.checkpoint_rows:
+            checkpoint = {
+                "checkpoint_key": self.checkpoint_key(),
+                "checkpoint_rows": self.checkpoint_rows,
+            }
+
+        self._phase, self._phase_started = "stage", time.perf_counter()
+        started = time.perf_counter()
+        if self.fingerprints:
+            # Taken before reading, so a file changed meanwhile is not cached
+            fingerprint_key, sample = self.fingerprint_key(), self.content_sample()
+        if dataset_exists:
+            # An unchanged file matches the branch head by its cached fingerprint
+            # before anything is read
+            version_id = db_conn.insert_new_version(
+                self.d_name,
+                self._timed_chunks(),
+                self.description,
+                self._progress,
+                row_index,
+                self.branch,
+                fingerprint=self.fingerprints
+                and self.fingerprints.get(fingerprint_key, sample),
+                alias_duplicates=self.alias_duplicates,
+                **checkpoint,
+            )
+        else:
+            version_id = db_conn.insert_dataset_in_database(
+                self.d_name,
+                self._timed_chunks(),
+                self.description,
+                progress=self._progress,
+                row_index=row_index,
+                compression=self.compression,
+                partitioned=self.partitioned,
+                **checkpoint,
+            )
+        total_seconds = time.perf_counter() - started
+        if version_id and self.fingerprints:
+            self.fingerprints.put(
+                fingerprint_key, sample, db_conn.get_version_fingerprint(version_id)
+            )
+
+        return {
+            "dataset": self.d_name,
+            "file": str(self.path),
+            "status": "ok" if version_id else "failed",
+            "version_id": version_id,
+            "rows": self.rows,
+            "seconds": round(total_seconds, 3),
+            "rows_per_sec": round(self.rows / total_seconds, 1) if total_seconds else None,
+            "phases": {
+                phase: {
+                    "seconds": round(seconds, 3),
+                    "rows_per_sec": round(self.rows / seconds, 1) if seconds else None,
+                }
+                for phase, seconds in self.phase_seconds.items()
+            },
+        }
+
+
+def ingest_dataset(conn_details: Dict, jobs: List[IngestJob]) -> List[Dict]:
+    """Runs the jobs of one dataset in order, each creating one version."""
+    db_conn = DatabaseConnection(conn_details)
+    existing = {d_name for d_name, _ in db_conn.get_all_datasets()}
+    results = []
+    for job in jobs:
+        result = job.run(db_conn, job.d_name in existing)
+        if result["status"] == "ok":
+            existing.add(job.d_name)
+        results.append(result)
+    return results
+
+
+def parse_job(spec: str) -> Tuple[str, Path]:
+    d_name, separator, path = spec.partition("=")
+    if not separator or not d_name or not path:
+        raise argparse.ArgumentTypeError(f"Expected DATASET=FILE, got '{spec}'")
+    return d_name, Path(path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Ingest CSV/Parquet/Feather files (optionally gzip/bz2/zstd "
+        "compressed) as new dataset versions without the UI."
+    )
+    parser.add_argument(
+        "files",
+        nargs="+",
+        type=parse_job,
+        metavar="DATASET=FILE",
+        help="Files to ingest; several files of one dataset become consecutive versions",
+    )
+    parser.add_argument(
+        "--connection", required=True, help="Connection name from connections.yaml"
+    )
+    parser.add_argument("--description", default="Batch ingest", help="Version description")
+    parser.add_argument(
+        "--workers", type=int, default=4, help="Datasets ingested in parallel"
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=100000, help="Rows read and staged per chunk"
+    )
+    parser.add_argument(
+        "--columns",
+        type=lambda value: value.split(","),
+        help="Comma-separated columns to ingest (projected while reading)",
+    )
+    parser.add_argument(
+        "--row-index",
+        action="store_true",
+        help="Skip uploading rows already stored on the server, using the local row index",
+    )
+    parser.add_argument(
+        "--branch",
+        help="Add the versions to this branch of existing datasets instead of "
+        f"'{Config.DEFAULT_BRANCH}'",
+    )
+    parser.add_argument(
+        "--resumable",
+        type=int,
+        nargs="?",
+        const=1000000,
+        metavar="ROWS",
+        help="Commit staged data every ROWS rows (default 1000000) so a failed "
+        "ingest resumes from its last checkpoint when rerun with the same file",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=list(Config.STORAGE_COMPRESSIONS.keys()),
+        default="none",
+        help="Storage format of datasets created by the ingest",
+    )
+    parser.add_argument(
+        "--partition-by-version",
+        action="store_true",
+        help="Partition the connection table of datasets created by the ingest by "
+        "version, so versions are read and deleted one partition at a time",
+    )
+    parser.add_argument(
+        "--alias-duplicates",
+        action="store_true",
+        help="Record a file whose content matches the latest version as a new alias "
+        "version instead of reusing the latest version",
+    )
+    parser.add_argument(
+        "--no-fingerprint-cache",
+        action="store_true",
+        help="Read every file even if an unchanged copy was ingested before",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only estimate the new, unchanged and removed rows, added columns and "
+        "ingest cost of each file; nothing is written to the server",
+    )
+    parser.add_argument(
+        "--max-new-rows",
+        type=int,
+        metavar="ROWS",
+        help="Skip files of existing datasets estimated to add more than ROWS new rows",
+    )
+    parser.add_argument("--summary", type=Path, help="Also write the JSON summary here")
+    args = parser.parse_args()
+
+    connections = ConnectionManager().connections
+    if args.connection not in connections:
+        parser.error(f"Unknown connection '{args.connection}'")
+
+    fingerprints = (
+        None
+        if args.no_fingerprint_cache
+        else FingerprintCache(Path(Config.FINGERPRINT_CACHE_FILE))
+    )
+    jobs_by_dataset: Dict[str, List[IngestJob]] = OrderedDict()
+    for d_name, path in args.files:
+        jobs_by_dataset.setdefault(d_name, []).append(
+            IngestJob(
+                d_name,
+                path,
+                args.description,
+                args.chunksize,
+                args.row_index,
+                args.columns,
+                None if args.branch == Config.DEFAULT_BRANCH else args.branch,
+                args.resumable,
+                fingerprints,
+                args.alias_duplicates,
+                args.compression,
+                args.partition_by_version,
+                args.dry_run,
+                args.max_new_rows,
+            )
+        )
+
+    started = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(ingest_dataset, connections[args.connection], jobs): d_name
+            for d_name, jobs in jobs_by_dataset.items()
+        }
+        for future in as_completed(futures):
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                results.append(
+                    {"dataset": futures[future], "status": "failed", "error": str(e)}
+                )
+    total_seconds = time.perf_counter() - started
+
+    total_rows = sum(result.get("rows", 0) for result in results)
+    summary = {
+        "connection": args.connection,
+        "jobs": results,
+        "total_rows": total_rows,
+        "total_seconds": round(total_seconds, 3),
+        "rows_per_sec": round(total_rows / total_seconds, 1) if total_seconds else None,
+        "failed": sum(1 for result in results if result["status"] == "failed"),
+        "skipped": sum(1 for result in results if result["status"] == "skipped"),
+    }
+
+    output = json.dumps(summary, indent=2, default=str)
+    print(output)
+    if args.summary:
+        args.summary.write_text(output)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
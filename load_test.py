@@ -0,0 +1,488 @@
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+import numpy as np
+import pandas as pd
+from config import Config
+from upload_jobs import UploadJobQueue
+
+OPERATIONS = ["list_datasets", "open_versions", "preview", "upload"]
+
+
+class ConnectionStats:
+    """Counts connections opened by the simulated sessions and how many are open at once."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.open = 0
+        self.peak_open = 0
+
+    def connected(self):
+        with self._lock:
+            self.opened += 1
+            self.open += 1
+            self.peak_open = max(self.peak_open, self.open)
+
+    def closed(self):
+        with self._lock:
+            self.open -= 1
+
+
+class InMemoryBackend:
+    """
+    Stand-in for ``DatabaseConnection`` holding datasets in process memory.
+
+    It implements the methods the load test and the upload queue call, with
+    ``latency_seconds`` of simulated round trip per query. Writes are serialized
+    like the publish transaction of a dataset on a server. It measures the
+    app-side cost and concurrency of the workflows without a database.
+    """
+
+    _lock = threading.Lock()
+    _datasets: Dict[str, List[Dict]] = {}
+    _jobs: Dict[int, Dict] = {}
+    _next_version_id = 1
+
+    def __init__(self, stats: ConnectionStats, latency_seconds: float = 0.002):
+        self.stats = stats
+        self.latency_seconds = latency_seconds
+        self.conn_details = {"type": "memory"}
+        self.connection_key = "memory://load_test/"
+        self._closed = False
+        stats.connected()
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.stats.closed()
+
+    def __del__(self):
+        self.close()
+
+    def _round_trip(self):
+        time.sleep(self.latency_seconds)
+
+    def get_all_datasets(self):
+        self._round_trip()
+        with self._lock:
+            return [(d_name, "Load test dataset") for d_name in self._datasets]
+
+    def get_all_versions_info(self, d_name: str) -> List[Dict]:
+        self._round_trip()
+        with self._lock:
+            return [
+                {
+                    "version_id": version["version_id"],
+                    "version_name": version_name,
+                    "row_count": len(version["data"]),
+                    "column_count": len(version["data"].columns),
+                }
+                for version_name, version in enumerate(self._datasets.get(d_name, []), 1)
+            ]
+
+    def _version(self, version_id: int) -> pd.DataFrame:
+        with self._lock:
+            for versions in self._datasets.values():
+                for version in versions:
+                    if version["version_id"] == version_id:
+                        return version["data"]
+        raise ValueError(f"Version {version_id} does not exist")
+
+    def get_version_columns(self, version_id: int) -> List[str]:
+        self._round_trip()
+        return list(self._version(version_id).columns)
+
+    def get_version_head(self, d_name: str, version_id: int, rows: int) -> pd.DataFrame:
+        self._round_trip()
+        return self._version(version_id).head(rows)
+
+    def insert_new_version(
+        self,
+        d_name: str,
+        df: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+        description=None,
+        progress: Optional[Callable[[str, int], None]] = None,
+        row_index=None,
+        branch=None,
+    ):
+        if not isinstance(df, pd.DataFrame):
+            df = pd.concat(list(df), ignore_index=True)
+        if progress:
+            progress("stage", len(df))
+        self._round_trip()
+        if progress:
+            progress("publish", len(df))
+        with self._lock:
+            version_id = InMemoryBackend._next_version_id
+            InMemoryBackend._next_version_id += 1
+            self._datasets[d_name].append({"version_id": version_id, "data": df})
+        if progress:
+            progress("done", len(df))
+        return version_id
+
+    def insert_dataset_in_database(self, d_name: str, df: pd.DataFrame, description=None):
+        with self._lock:
+            self._datasets.setdefault(d_name, [])
+            if self._datasets[d_name]:
+                return self._datasets[d_name][-1]["version_id"]
+            self._datasets[d_name].append({"version_id": 0, "data": df.iloc[:0]})
+        return self.insert_new_version(d_name, df, description)
+
+    def create_upload_job(self, d_name: str, file_name: str, description=None, branch=None):
+        self._round_trip()
+        with self._lock:
+            job_id = len(self._jobs) + 1
+            self._jobs[job_id] = {"job_id": job_id, "dataset": d_name, "status": "queued"}
+        return job_id
+
+    def update_upload_job(self, job_id: int, status=None, **fields):
+        self._round_trip()
+        with self._lock:
+            if status is not None:
+                self._jobs[job_id]["status"] = status
+        return True
+
+    def touch_upload_jobs(self, job_ids: List[int]):
+        self._round_trip()
+        return True
+
+    def get_upload_jobs(self, d_name: Optional[str] = None, limit: int = 10, **kwargs):
+        self._round_trip()
+        with self._lock:
+            jobs = [
+                dict(job)
+                for job in reversed(list(self._jobs.values()))
+                if d_name is None or job["dataset"] == d_name
+            ]
+        return jobs[:limit]
+
+
+def _database_backend(conn_details: Dict, stats: ConnectionStats) -> Callable:
+    """
+    Factory of ``DatabaseConnection`` objects whose pooled connections are
+    counted, so the report shows the connections the workflows open on the server.
+    """
+    from sqlalchemy import event
+    from database_connection import DatabaseConnection
+
+    class CountingConnection(DatabaseConnection):
+        def _create_engine(self):
+            engine = super()._create_engine()
+            event.listen(engine, "checkout", lambda *args: stats.connected())
+            event.listen(engine, "checkin", lambda *args: stats.closed())
+            return engine
+
+    return lambda: CountingConnection(conn_details)
+
+
+def generate_data(rows: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "transaction_id": np.arange(1, rows + 1),
+            "customer_id": rng.integers(1000, 5000, rows),
+            "region": rng.choice(["North", "South", "East", "West"], rows),
+            "quantity": rng.integers(1, 10, rows),
+            "price": rng.integers(100, 50000, rows) / 100,
+        }
+    )
+
+
+def next_version_data(base: pd.DataFrame, rng: random.Random) -> pd.DataFrame:
+    """Changes ~5% of the prices and appends ~2% new rows, like a daily refresh."""
+    df = base.copy()
+    changed = df.sample(frac=0.05, random_state=rng.randrange(2**32)).index
+    df.loc[changed, "price"] = (df.loc[changed, "price"] * 1.1).round(2)
+    added = generate_data(max(1, len(df) // 50), rng.randrange(2**32))
+    added["transaction_id"] += int(df["transaction_id"].max())
+    return pd.concat([df, added], ignore_index=True)
+
+
+class LoadTest:
+    """
+    Simulates concurrent app sessions. Every session is a thread, like sessions
+    of a Streamlit server, and loops over the Datasets page workflows:
+
+        list_datasets: a rerun opens a new connection and lists the datasets
+        open_versions: the version tabs of a dataset load its versions
+        preview:       a version tab loads its columns and preview rows
+        upload:        with probability ``upload_ratio``, a new version is submitted
+                       to the app's ``UploadJobQueue``; the latency is the time
+                       until the job is queued, like in a session
+
+    Queued uploads run on the queue's threads and are drained after the sessions
+    end; the report counts their outcomes. Nothing is cached between reruns, so
+    the numbers are those of cache misses.
+    """
+
+    def __init__(
+        self,
+        connect: Callable,
+        stats: ConnectionStats,
+        datasets: List[str],
+        rows: int,
+        upload_ratio: float = 0.1,
+        think_seconds: float = 0.1,
+    ):
+        self.connect = connect
+        self.stats = stats
+        self.datasets = datasets
+        self.rows = rows
+        self.upload_ratio = upload_ratio
+        self.think_seconds = think_seconds
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, List[float]] = defaultdict(list)
+        self._errors: Dict[str, List[str]] = defaultdict(list)
+        self._job_ids: Dict[str, List[int]] = defaultdict(list)
+        self._uploads = UploadJobQueue(connect=lambda conn_details: connect())
+        self._data = {d_name: generate_data(rows, seed) for seed, d_name in enumerate(datasets)}
+
+    def setup(self):
+        """Creates the load test datasets that do not exist yet."""
+        db_conn = self.connect()
+        existing = {d_name for d_name, _ in db_conn.get_all_datasets()}
+        for d_name in self.datasets:
+            if d_name not in existing:
+                if not db_conn.insert_dataset_in_database(
+                    d_name, self._data[d_name], "Load test dataset"
+                ):
+                    raise RuntimeError(f"Could not create dataset '{d_name}'")
+
+    def _timed(self, operation: str, call: Callable):
+        started = time.perf_counter()
+        try:
+            result = call()
+            # The app methods report failures by returning None
+            if result is None:
+                raise RuntimeError("returned no result")
+            return result
+        except Exception as e:
+            with self._lock:
+                self._errors[operation].append(str(e))
+            return None
+        finally:
+            with self._lock:
+                self._latencies[operation].append(time.perf_counter() - started)
+
+    def _session(self, session_id: int, deadline: float):
+        rng = random.Random(session_id)
+        while time.perf_counter() < deadline:
+            db_conn = self.connect()
+            d_name = rng.choice(self.datasets)
+            versions = None
+            if self._timed("list_datasets", db_conn.get_all_datasets):
+                versions = self._timed(
+                    "open_versions", lambda: db_conn.get_all_versions_info(d_name) or None
+                )
+            if versions:
+                version_id = rng.choice(versions)["version_id"]
+                self._timed(
+                    "preview",
+                    lambda: db_conn.get_version_columns(version_id)
+                    and db_conn.get_version_head(d_name, version_id, Config.PREVIEW_ROWS),
+                )
+            if versions and rng.random() < self.upload_ratio:
+                uploaded_file = io.BytesIO(
+                    next_version_data(self._data[d_name], rng).to_csv(index=False).encode()
+                )
+                uploaded_file.name = f"{d_name}.csv"
+                job_id = self._timed(
+                    "upload",
+                    lambda: self._uploads.submit(
+                        db_conn, d_name, uploaded_file, "Load test version"
+                    ),
+                )
+                if job_id is not None:
+                    with self._lock:
+                        self._job_ids[d_name].append(job_id)
+            # The rerun ends and its connection is released
+            del db_conn
+            time.sleep(rng.uniform(0, 2 * self.think_seconds))
+
+    @staticmethod
+    def _percentile(samples: List[float], percent: float) -> float:
+        """Nearest-rank percentile, in milliseconds."""
+        ordered = sorted(samples)
+        rank = max(1, int(np.ceil(percent / 100 * len(ordered))))
+        return round(ordered[rank - 1] * 1000, 1)
+
+    def _operation_report(self, latencies: List[float], errors: List[str], seconds: float) -> Dict:
+        report = {
+            "count": len(latencies),
+            "errors": len(errors),
+            "error_rate": round(len(errors) / len(latencies), 4) if latencies else 0.0,
+            "throughput_per_sec": round(len(latencies) / seconds, 2),
+        }
+        if latencies:
+            report.update(
+                {
+                    f"p{percent}_ms": self._percentile(latencies, percent)
+                    for percent in (50, 95, 99)
+                }
+            )
+            report["max_ms"] = round(max(latencies) * 1000, 1)
+        if errors:
+            report["first_error"] = errors[0]
+        return report
+
+    def _upload_jobs_report(self, drain_seconds: float) -> Dict:
+        db_conn = self.connect()
+        statuses = defaultdict(int)
+        for d_name, job_ids in self._job_ids.items():
+            for job in db_conn.get_upload_jobs(d_name, limit=len(job_ids)):
+                if job["job_id"] in job_ids:
+                    statuses[job["status"]] += 1
+        return {
+            "submitted": sum(len(job_ids) for job_ids in self._job_ids.values()),
+            **statuses,
+            "drain_seconds": round(drain_seconds, 3),
+        }
+
+    def run(self, sessions: int, duration_seconds: float) -> Dict:
+        """
+        Runs ``sessions`` concurrent sessions for ``duration_seconds``.
+
+        Returns:
+            Dict: Latency percentiles, throughput and error rate per operation and
+                  in total, the outcome of the queued uploads, and the connections
+                  opened and open at once
+        """
+        started = time.perf_counter()
+        deadline = started + duration_seconds
+        threads = [
+            threading.Thread(target=self._session, args=(session_id, deadline))
+            for session_id in range(sessions)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - started
+        self._uploads.shutdown(wait=True)
+        drain_seconds = time.perf_counter() - started - seconds
+
+        return {
+            "sessions": sessions,
+            "seconds": round(seconds, 3),
+            "operations": {
+                operation: self._operation_report(
+                    self._latencies[operation], self._errors[operation], seconds
+                )
+                for operation in OPERATIONS
+                if operation in self._latencies
+            },
+            "total": self._operation_report(
+                [value for values in self._latencies.values() for value in values],
+                [value for values in self._errors.values() for value in values],
+                seconds,
+            ),
+            "upload_jobs": self._upload_jobs_report(drain_seconds),
+            "connections": {
+                "opened": self.stats.opened,
+                "peak_open": self.stats.peak_open,
+                "opened_per_sec": round(self.stats.opened / seconds, 2),
+            },
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Load test of the Datasets page workflows with concurrent sessions."
+    )
+    backend = parser.add_mutually_exclusive_group(required=True)
+    backend.add_argument(
+        "--connection",
+        help="Connection name from connections.yaml, e.g. a LocalDB instance "
+        r"such as (localdb)\MSSQLLocalDB",
+    )
+    backend.add_argument(
+        "--in-memory",
+        action="store_true",
+        help="Run against an in-process stand-in database",
+    )
+    parser.add_argument("--sessions", type=int, default=50, help="Concurrent sessions")
+    parser.add_argument(
+        "--duration", type=float, default=60, help="Seconds the sessions run"
+    )
+    parser.add_argument(
+        "--datasets", type=int, default=3, help="Datasets the sessions work on"
+    )
+    parser.add_argument("--rows", type=int, default=10000, help="Rows per dataset")
+    parser.add_argument(
+        "--upload-ratio",
+        type=float,
+        default=0.1,
+        help="Share of session iterations that upload a new version",
+    )
+    parser.add_argument(
+        "--think-ms", type=float, default=100, help="Mean pause between iterations"
+    )
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=2,
+        help="Simulated round trip per query of the in-memory backend",
+    )
+    parser.add_argument(
+        "--history",
+        type=Path,
+        help="Append the result as a JSON line to this file to track changes",
+    )
+    args = parser.parse_args()
+
+    stats = ConnectionStats()
+    if args.in_memory:
+        connect = lambda: InMemoryBackend(stats, args.latency_ms / 1000)
+    else:
+        from connection_manager import ConnectionManager
+
+        connections = ConnectionManager().connections
+        if args.connection not in connections:
+            parser.error(f"Unknown connection '{args.connection}'")
+        connect = _database_backend(connections[args.connection], stats)
+
+    load_test = LoadTest(
+        connect,
+        stats,
+        [f"load_test_{i}" for i in range(1, args.datasets + 1)],
+        args.rows,
+        args.upload_ratio,
+        args.think_ms / 1000,
+    )
+    # The app methods print their errors; keep them out of the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        load_test.setup()
+        stats.opened = stats.peak_open = 0
+        report = load_test.run(args.sessions, args.duration)
+
+    from benchmark import _git_commit
+
+    result = {
+        "benchmark": "load",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "backend": "memory" if args.in_memory else args.connection,
+        **report,
+    }
+    print(json.dumps(result, indent=2))
+    if args.history:
+        with open(args.history, "a") as f:
+            f.write(json.dumps(result) + "\n")
+    failed_uploads = report["upload_jobs"]["submitted"] - report["upload_jobs"].get(
+        "succeeded", 0
+    )
+    return 1 if report["total"]["errors"] or failed_uploads else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,29 @@
 import streamlit as st
 from connection_manager import ConnectionManager
 from dataset_manager import DatasetManager
+from retention import RetentionWorker
+
+
+@st.cache_resource
+def start_retention_worker() -> RetentionWorker:
+    worker = RetentionWorker()
+    worker.start()
+    return worker
 
 def main():
     st.title("Dataset Manager")
     st.sidebar.title("Navigation")
+    start_retention_worker()
 
     conn_manager = ConnectionManager()
     dataset_manager = DatasetManager(conn_manager)
 
-    page = st.sidebar.radio("Go to", ["Connections", "Datasets"])
+    page = st.sidebar.radio("Go to", ["Connections", "Datasets", "Catalog"])
 
     if page == "Connections":
         dataset_manager.render_connections_page()
+    elif page == "Catalog":
+        dataset_manager.render_catalog_page()
     else:
         dataset_manager.render_datasets_page()
 
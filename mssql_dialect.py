@@ -6,9 +6,17 @@ from typing import List, Optional, Dict
 class MSSQLDialect(SQLInterface):
     """MSSQL implementation of SQL interface."""
 
+    MAX_COLUMNS = 1024
+    MAX_SPARSE_COLUMNS = 30000
+
+    @staticmethod
+    def _literal(value: str) -> str:
+        """Quotes a name as a string literal for catalog lookups."""
+        return "'" + str(value).replace("'", "''") + "'"
+
     def create_database_if_not_exists(self, database_name: str) -> str:
         return f"""
-            IF NOT EXISTS(SELECT * FROM sys.databases WHERE name = '{database_name}')
+            IF NOT EXISTS(SELECT * FROM sys.databases WHERE name = {self._literal(database_name)})
             BEGIN
                 CREATE DATABASE [{database_name}]
             END
@@ -45,21 +53,27 @@ class MSSQLDialect(SQLInterface):
         columns_sql = ",\n                ".join(column_defs)
 
         return f"""
-            IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = '{table_name}')
+            IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = {self._literal(table_name)})
             CREATE TABLE [{table_name}] (
                 {columns_sql}
             )
         """
 
     def alter_table_add_columns(
-        self, table_name: str, columns: List[Dict[str, str]]
+        self, table_name: str, columns: List[Dict[str, str]], sparse: bool = False
     ) -> str:
-        columns_sql = ", ".join([f"[{col['name']}] {col['type']}" for col in columns])
+        suffix = " SPARSE NULL" if sparse else ""
+        columns_sql = ", ".join(
+            [f"[{col['name']}] {col['type']}{suffix}" for col in columns]
+        )
         return f"""
             ALTER TABLE [{table_name}]
             ADD {columns_sql}
         """
 
+    def sparse_column_set(self) -> Dict[str, str]:
+        return {"name": "sparse_columns", "type": "xml COLUMN_SET FOR ALL_SPARSE_COLUMNS"}
+
     def create_foreign_key_table(
         self, table_name: str, references: Dict[str, str]
     ) -> str:
@@ -76,7 +90,7 @@ class MSSQLDialect(SQLInterface):
         constraints_sql = ", ".join(constraints)
 
         return f"""
-            IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = '{table_name}')
+            IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = {self._literal(table_name)})
             CREATE TABLE [{table_name}] (
                 {columns_sql},
                 PRIMARY KEY ({', '.join(references.keys())}),
@@ -101,3 +115,233 @@ class MSSQLDialect(SQLInterface):
                 {columns_sql}
             )
         """
+
+    def alter_column_type(self, table_name: str, column: Dict[str, str]) -> str:
+        return f"ALTER TABLE [{table_name}] ALTER COLUMN [{column['name']}] {column['type']}"
+
+    def get_table_columns(self, table_name: str) -> str:
+        return f"""
+            SELECT name
+            FROM sys.columns
+            WHERE object_id = OBJECT_ID({self._literal(table_name)}) AND is_column_set = 0
+            ORDER BY column_id
+        """
+
+    def get_table_column_types(self, table_name: str) -> str:
+        return f"""
+            SELECT c.name, t.name
+            FROM sys.columns c
+            JOIN sys.types t ON c.user_type_id = t.user_type_id
+            WHERE c.object_id = OBJECT_ID({self._literal(table_name)}) AND c.is_column_set = 0
+            ORDER BY c.column_id
+        """
+
+    def random_sample_filter(self, key: str, percent: float) -> str:
+        # NEWID() is evaluated per row when combined with a column in CHECKSUM
+        return f"ABS(CHECKSUM({key}, NEWID())) % 1000000 < {int(percent * 10000)}"
+
+    def random_order(self) -> str:
+        return "NEWID()"
+
+    def drop_table_if_exists(self, table_name: str) -> str:
+        return f"""
+            IF OBJECT_ID({self._literal(table_name)}) IS NOT NULL
+            DROP TABLE [{table_name}]
+        """
+
+    def drop_columns(self, table_name: str, columns: List[str]) -> str:
+        columns_sql = ", ".join(f"[{col}]" for col in columns)
+        return f"""
+            ALTER TABLE [{table_name}]
+            DROP COLUMN {columns_sql}
+        """
+
+    def delete_batch(self, table_name: str, where_clause: str, batch_size: int) -> str:
+        return f"""
+            DELETE TOP ({batch_size}) t
+            FROM [{table_name}] t
+            WHERE {where_clause}
+        """
+
+    def table_size_kb(self, table_name: str) -> str:
+        return f"""
+            SELECT COALESCE(SUM(a.total_pages), 0) * 8
+            FROM sys.partitions p
+            JOIN sys.allocation_units a ON p.partition_id = a.container_id
+            WHERE p.object_id = OBJECT_ID({self._literal(table_name)})
+        """
+
+    def rebuild_table(self, table_name: str) -> str:
+        return f"ALTER TABLE [{table_name}] REBUILD"
+
+    def add_column_if_not_exists(self, table_name: str, column: Dict[str, str]) -> str:
+        return f"""
+            IF COL_LENGTH({self._literal(table_name)}, {self._literal(column['name'])}) IS NULL
+            ALTER TABLE [{table_name}] ADD [{column['name']}] {column['type']}
+        """
+
+    def add_foreign_key_if_not_exists(
+        self, table_name: str, foreign_key: Dict[str, str]
+    ) -> str:
+        # WITH NOCHECK: existing rows are not validated, so the migration cannot
+        # fail on references left behind before the constraint existed
+        return f"""
+            IF OBJECT_ID({self._literal(foreign_key['constraint_name'])}, 'F') IS NULL
+            ALTER TABLE [{table_name}] WITH NOCHECK
+            ADD CONSTRAINT [{foreign_key['constraint_name']}]
+            FOREIGN KEY ([{foreign_key['column']}])
+            REFERENCES [{foreign_key['reference_table']}]([{foreign_key['reference_column']}])
+        """
+
+    def set_table_compression(
+        self,
+        table_name: str,
+        compression: str,
+        primary_key: List[str],
+        referencing_foreign_keys: Optional[List[Dict[str, str]]] = None,
+        online: bool = False,
+    ) -> str:
+        # A clustered columnstore index replaces the clustered primary key, which
+        # becomes nonclustered; foreign keys referencing it are dropped meanwhile.
+        # The swap runs in one transaction, so a failure leaves the table as it was.
+        online_sql = "ON" if online else "OFF"
+        pk_columns = ", ".join(f"[{col}]" for col in primary_key)
+        foreign_keys = referencing_foreign_keys or []
+        drop_foreign_keys = "\n".join(
+            f"ALTER TABLE [{fk['table']}] DROP CONSTRAINT [{fk['constraint_name']}];"
+            for fk in foreign_keys
+        )
+        add_foreign_keys = "\n".join(
+            f"ALTER TABLE [{fk['table']}] ADD CONSTRAINT [{fk['constraint_name']}] "
+            f"FOREIGN KEY ([{fk['column']}]) "
+            f"REFERENCES [{table_name}]([{fk['reference_column']}]);"
+            for fk in foreign_keys
+        )
+        if compression == "columnstore":
+            # Only the clustered primary key can be dropped online
+            swap_primary_key = f"""
+                {drop_foreign_keys}
+                EXEC('ALTER TABLE [{table_name}] DROP CONSTRAINT [' + @pk + '] WITH (ONLINE = {online_sql})');
+            """
+            return f"""
+            DECLARE @pk sysname = (
+                SELECT name FROM sys.key_constraints
+                WHERE parent_object_id = OBJECT_ID({self._literal(table_name)}) AND type = 'PK'
+            );
+            IF NOT EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE object_id = OBJECT_ID({self._literal(table_name)}) AND type = 5
+            )
+            BEGIN
+                SET XACT_ABORT ON;
+                BEGIN TRANSACTION;
+                {swap_primary_key}
+                CREATE CLUSTERED COLUMNSTORE INDEX [CCI_{table_name}] ON [{table_name}]
+                    WITH (ONLINE = {online_sql});
+                ALTER TABLE [{table_name}] ADD CONSTRAINT [PK_{table_name}]
+                    PRIMARY KEY NONCLUSTERED ({pk_columns});
+                {add_foreign_keys}
+                COMMIT TRANSACTION;
+            END
+        """
+        swap_primary_key = f"""
+                {drop_foreign_keys}
+                EXEC('ALTER TABLE [{table_name}] DROP CONSTRAINT [' + @pk + ']');
+        """
+        return f"""
+            DECLARE @pk sysname = (
+                SELECT name FROM sys.key_constraints
+                WHERE parent_object_id = OBJECT_ID({self._literal(table_name)}) AND type = 'PK'
+            );
+            IF EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE object_id = OBJECT_ID({self._literal(table_name)}) AND type = 5
+            )
+            BEGIN
+                SET XACT_ABORT ON;
+                BEGIN TRANSACTION;
+                {swap_primary_key}
+                DROP INDEX [CCI_{table_name}] ON [{table_name}];
+                ALTER TABLE [{table_name}] ADD CONSTRAINT [PK_{table_name}]
+                    PRIMARY KEY CLUSTERED ({pk_columns})
+                    WITH (DATA_COMPRESSION = {compression.upper()}, ONLINE = {online_sql});
+                {add_foreign_keys}
+                COMMIT TRANSACTION;
+            END
+            ELSE
+                ALTER INDEX ALL ON [{table_name}]
+                    REBUILD WITH (DATA_COMPRESSION = {compression.upper()}, ONLINE = {online_sql});
+        """
+
+    def partition_table(
+        self,
+        table_name: str,
+        column: str,
+        primary_key: List[str],
+        boundaries: List[int],
+        compression: str = "none",
+        online: bool = False,
+    ) -> str:
+        # Ranges are RANGE RIGHT: each boundary starts a partition. Recreating the
+        # clustered primary key on the partition scheme moves the rows once.
+        values = ", ".join(str(int(boundary)) for boundary in sorted(set(boundaries)))
+        pk_columns = ", ".join(f"[{col}]" for col in primary_key)
+        return f"""
+            IF NOT EXISTS (SELECT 1 FROM sys.partition_functions WHERE name = {self._literal(f"PF_{table_name}")})
+                CREATE PARTITION FUNCTION [PF_{table_name}] (int)
+                    AS RANGE RIGHT FOR VALUES ({values});
+            IF NOT EXISTS (SELECT 1 FROM sys.partition_schemes WHERE name = {self._literal(f"PS_{table_name}")})
+                CREATE PARTITION SCHEME [PS_{table_name}]
+                    AS PARTITION [PF_{table_name}] ALL TO ([PRIMARY]);
+            DECLARE @pk sysname = (
+                SELECT name FROM sys.key_constraints
+                WHERE parent_object_id = OBJECT_ID({self._literal(table_name)}) AND type = 'PK'
+            );
+            EXEC('ALTER TABLE [{table_name}] DROP CONSTRAINT [' + @pk + ']');
+            ALTER TABLE [{table_name}] ADD CONSTRAINT [PK_{table_name}]
+                PRIMARY KEY CLUSTERED ({pk_columns})
+                WITH (DATA_COMPRESSION = {compression.upper()}, ONLINE = {"ON" if online else "OFF"})
+                ON [PS_{table_name}]([{column}]);
+        """
+
+    def split_partition(self, table_name: str, boundary: int) -> str:
+        # Splitting the empty last partition only changes metadata
+        return f"""
+            IF NOT EXISTS (
+                SELECT 1
+                FROM sys.partition_range_values prv
+                JOIN sys.partition_functions pf ON pf.function_id = prv.function_id
+                WHERE pf.name = {self._literal(f"PF_{table_name}")}
+                    AND CAST(prv.value AS int) = {int(boundary)}
+            )
+            BEGIN
+                ALTER PARTITION SCHEME [PS_{table_name}] NEXT USED [PRIMARY];
+                ALTER PARTITION FUNCTION [PF_{table_name}]() SPLIT RANGE ({int(boundary)});
+            END
+        """
+
+    def partition_range(self, table_name: str) -> str:
+        boundary = f"""
+            SELECT CAST(prv.value AS int)
+            FROM sys.partition_range_values prv
+            JOIN sys.partition_functions pf ON pf.function_id = prv.function_id
+            WHERE pf.name = {self._literal(f"PF_{table_name}")} AND prv.boundary_id = """
+        partition = f"$PARTITION.[PF_{table_name}](:value)"
+        return f"""
+            SELECT {partition},
+                   ({boundary}{partition} - 1),
+                   ({boundary}{partition})
+        """
+
+    def truncate_partition(
+        self, table_name: str, partition_number: int, lower_boundary: Optional[int]
+    ) -> str:
+        merge = (
+            f"ALTER PARTITION FUNCTION [PF_{table_name}]() MERGE RANGE ({int(lower_boundary)});"
+            if lower_boundary is not None
+            else ""
+        )
+        return f"""
+            TRUNCATE TABLE [{table_name}] WITH (PARTITIONS ({int(partition_number)}));
+            {merge}
+        """
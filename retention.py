@@ -0,0 +1,225 @@
+import argparse
+import threading
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional
+from config import Config
+from connection_manager import ConnectionManager
+
+if TYPE_CHECKING:
+    from database_connection import DatabaseConnection
+
+
+class RetentionPolicy:
+    """
+    Per-dataset retention rules, stored as JSON in ``Datasets.d_retention_policy``.
+
+    Supported keys (a version is kept if any rule keeps it):
+        keep_last: Keep the N most recent versions
+        keep_monthly_months: Keep the latest version of each month for N months
+        keep_tagged: Keep every version that has a tag
+        archive_after_days: Move kept versions older than N days to the archive
+                            tier (see ``DatabaseConnection.archive_version``)
+
+    Versions are only pruned when at least one keep rule is set. Rules apply to
+    each branch of a dataset separately. The latest version of every branch, the
+    versions branches were created from and the versions whose rows alias
+    versions read are always kept, and the latest versions are never archived.
+    """
+
+    @staticmethod
+    def versions_to_prune(
+        versions: List[Dict], policy: Dict, now: Optional[datetime] = None
+    ) -> List[Dict]:
+        """
+        Selects the versions a policy does not keep.
+
+        Args:
+            versions: Versions as returned by ``get_all_versions_info``
+            policy: Retention policy of the dataset
+            now: Reference time for age based rules
+
+        Returns:
+            List[Dict]: Versions to delete, oldest first
+        """
+        if not versions or not any(
+            policy.get(rule) for rule in ("keep_last", "keep_monthly_months", "keep_tagged")
+        ):
+            return []
+
+        lineages: Dict[Optional[str], List[Dict]] = {}
+        for version in versions:
+            lineages.setdefault(version.get("branch"), []).append(version)
+        if len(lineages) > 1:
+            # Aliases may read a version of another lineage
+            alias_targets = {v["alias_of"] for v in versions if v.get("alias_of")}
+            pruned = [
+                version
+                for lineage in lineages.values()
+                for version in RetentionPolicy.versions_to_prune(lineage, policy, now)
+                if version["version_id"] not in alias_targets
+            ]
+            return sorted(pruned, key=lambda v: v["created_at"])
+
+        now = now or datetime.now()
+        ordered = sorted(versions, key=lambda v: v["created_at"])
+        keep = {ordered[-1]["version_id"]}
+        keep.update(v["version_id"] for v in ordered if v.get("is_branch_base"))
+        keep.update(v["alias_of"] for v in ordered if v.get("alias_of"))
+
+        keep_last = policy.get("keep_last") or 0
+        if keep_last > 0:
+            keep.update(v["version_id"] for v in ordered[-keep_last:])
+
+        keep_months = policy.get("keep_monthly_months") or 0
+        if keep_months > 0:
+            oldest_month = now.year * 12 + now.month - keep_months
+            latest_per_month = {}
+            for version in ordered:
+                created = version["created_at"]
+                month = created.year * 12 + created.month
+                if month > oldest_month:
+                    latest_per_month[month] = version["version_id"]
+            keep.update(latest_per_month.values())
+
+        if policy.get("keep_tagged"):
+            keep.update(v["version_id"] for v in ordered if v.get("tag"))
+
+        return [v for v in ordered if v["version_id"] not in keep]
+
+    @staticmethod
+    def versions_to_archive(
+        versions: List[Dict], policy: Dict, now: Optional[datetime] = None
+    ) -> List[Dict]:
+        """
+        Selects the versions the ``archive_after_days`` rule moves to the archive
+        tier: versions older than that which are not archived yet, except the
+        latest version of every branch and alias versions, which have no rows of
+        their own.
+
+        Args:
+            versions: Versions as returned by ``get_all_versions_info``
+            policy: Retention policy of the dataset
+            now: Reference time for the age of versions
+
+        Returns:
+            List[Dict]: Versions to archive, oldest first
+        """
+        archive_after_days = policy.get("archive_after_days") or 0
+        if archive_after_days <= 0:
+            return []
+
+        now = now or datetime.now()
+        ordered = sorted(versions, key=lambda v: v["created_at"])
+        latest = {v.get("branch"): v["version_id"] for v in ordered}
+        return [
+            v
+            for v in ordered
+            if v["version_id"] not in latest.values()
+            and not v.get("archived")
+            and not v.get("alias_of")
+            and (now - v["created_at"]).days >= archive_after_days
+        ]
+
+
+class RetentionWorker(threading.Thread):
+    """
+    Background worker that periodically enforces the retention policies of every
+    dataset on every configured connection.
+
+    Each run deletes or archives at most ``max_deletes_per_run`` versions per
+    connection and compacts the datasets it changed, so storage is reclaimed
+    incrementally without long-running cleanup transactions.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: int = Config.RETENTION_INTERVAL_SECONDS,
+        max_deletes_per_run: int = Config.RETENTION_MAX_DELETES_PER_RUN,
+    ):
+        super().__init__(name="retention-worker", daemon=True)
+        self.interval_seconds = interval_seconds
+        self.max_deletes_per_run = max_deletes_per_run
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.run_once()
+            self._stop_event.wait(self.interval_seconds)
+
+    def run_once(self) -> Dict[str, int]:
+        """
+        Enforces retention on all configured connections once.
+
+        Returns:
+            Dict[str, int]: Number of deleted or archived versions per connection name
+        """
+        # Imported here so starting the worker does not slow down app startup
+        from database_connection import DatabaseConnection
+
+        deleted = {}
+        for name, details in ConnectionManager().connections.items():
+            try:
+                deleted[name] = self._enforce(DatabaseConnection(details))
+            except Exception as e:
+                print(f"Error enforcing retention on {name}: {str(e)}")
+        return deleted
+
+    def _enforce(self, db_conn: "DatabaseConnection") -> int:
+        from ui_cache import UICache
+
+        budget = self.max_deletes_per_run
+        for d_name, policy in db_conn.get_retention_policies().items():
+            if budget <= 0:
+                break
+
+            versions = db_conn.get_all_versions_info(d_name)
+            pruned = 0
+            for version in RetentionPolicy.versions_to_prune(versions, policy)[:budget]:
+                if db_conn.delete_version(d_name, version["version_id"]):
+                    pruned += 1
+            budget -= pruned
+
+            archived = 0
+            if budget > 0 and policy.get("archive_after_days"):
+                versions = db_conn.get_all_versions_info(d_name)
+                for version in RetentionPolicy.versions_to_archive(versions, policy)[
+                    :budget
+                ]:
+                    if db_conn.archive_version(
+                        d_name, version["version_id"], Config.ARCHIVE_DIR, compact=False
+                    ):
+                        archived += 1
+                budget -= archived
+
+            if pruned or archived:
+                # Sessions must not keep showing the removed or archived versions
+                UICache.invalidate(db_conn, d_name)
+                db_conn.compact_dataset(d_name)
+                print(
+                    f"Retention removed {pruned} and archived {archived} versions of {d_name}"
+                )
+
+        return self.max_deletes_per_run - budget
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enforce dataset retention policies.")
+    parser.add_argument(
+        "--once", action="store_true", help="Run a single pass and exit"
+    )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=Config.RETENTION_INTERVAL_SECONDS,
+        help="Seconds between passes",
+    )
+    args = parser.parse_args()
+
+    worker = RetentionWorker(interval_seconds=args.interval)
+    if args.once:
+        print(worker.run_once())
+    else:
+        worker.run()
@@ -0,0 +1,214 @@
+import json
+import os
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from database_connection import DatabaseConnection
+
+
+class RowHashIndex:
+    """
+    Client-side, memory-mapped index of row fingerprints to ``data_id`` for one
+    dataset. It lets uploads drop rows the server already stores and send only
+    their ``data_id`` instead.
+
+    Fingerprints only depend on the non-null values of a row and their column
+    names, matching how rows are deduplicated on the server: a stored row that is
+    NULL in columns an upload does not have still matches the uploaded row.
+
+    The index remembers the row count and highest ``data_id`` of the dataset table
+    it was built against. ``sync`` catches up on rows added by other clients and
+    rebuilds the index from the server when rows were deleted, so a lookup never
+    returns a ``data_id`` that no longer exists.
+    """
+
+    ROW_HASH_COLUMN = "__row_hash"
+    ENTRY_DTYPE = np.dtype([("hash", "<u8"), ("data_id", "<i8")])
+    WRITE_BUFFER_ROWS = 5_000_000
+
+    def __init__(self, directory: str, conn_key: str, d_name: str):
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{conn_key}__{d_name}")
+        self.directory = Path(directory)
+        self.entries_path = self.directory / f"{safe_name}.npy"
+        self.state_path = self.directory / f"{safe_name}.json"
+        self._entries = None
+
+    @staticmethod
+    def _normalize(series: pd.Series) -> pd.Series:
+        """Renders values as text the same way for uploaded and server-side data."""
+        if pd.api.types.is_bool_dtype(series):
+            return series.astype(int).astype(str)
+        if pd.api.types.is_integer_dtype(series):
+            return series.astype(str)
+        if pd.api.types.is_float_dtype(series):
+            integral = np.isfinite(series) & (np.mod(series, 1) == 0)
+            return series.astype(str).where(
+                ~integral, series.where(integral, 0).astype(np.int64).astype(str)
+            )
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series.dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+        return series.astype(str)
+
+    @staticmethod
+    def _mix(values: np.ndarray) -> np.ndarray:
+        """splitmix64 finalizer, spreads the bits of combined hashes."""
+        values = values ^ (values >> np.uint64(30))
+        values = values * np.uint64(0xBF58476D1CE4E5B9)
+        values = values ^ (values >> np.uint64(27))
+        values = values * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+    @classmethod
+    def hash_rows(cls, df: pd.DataFrame) -> np.ndarray:
+        """
+        Computes a 64-bit fingerprint per row, independent of column order.
+
+        Returns:
+            np.ndarray: uint64 fingerprints, one per row of ``df``
+        """
+        row_hashes = np.zeros(len(df), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for column_name in df.columns:
+                if column_name == cls.ROW_HASH_COLUMN:
+                    continue
+                series = df[column_name]
+                present = series.notna().to_numpy()
+                if not present.any():
+                    continue
+                name_hash = pd.util.hash_array(np.array([str(column_name)], dtype=object))[0]
+                cell_hashes = pd.util.hash_array(
+                    cls._normalize(series[present]).to_numpy(dtype=object)
+                )
+                row_hashes[present] += cls._mix(cell_hashes ^ name_hash)
+        return row_hashes
+
+    def _load(self) -> np.ndarray:
+        if self._entries is None:
+            if self.entries_path.exists():
+                self._entries = np.load(self.entries_path, mmap_mode="r")
+            else:
+                self._entries = np.empty(0, dtype=self.ENTRY_DTYPE)
+        return self._entries
+
+    def _read_state(self) -> Optional[Dict]:
+        if not self.state_path.exists():
+            return None
+        return json.loads(self.state_path.read_text())
+
+    def save_state(self, state: Dict):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.state_path.write_text(json.dumps(state))
+
+    def lookup(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: int64 data_id per fingerprint, -1 where the row is unknown
+        """
+        entries = self._load()
+        if len(entries) == 0:
+            return np.full(len(hashes), -1, dtype=np.int64)
+        indexed = entries["hash"]
+        positions = np.searchsorted(indexed, hashes).clip(max=len(indexed) - 1)
+        found = indexed[positions] == hashes
+        return np.where(found, entries["data_id"][positions], -1)
+
+    def add(self, hashes: np.ndarray, data_ids: np.ndarray):
+        """Adds fingerprints and rewrites the index file atomically."""
+        if len(hashes) == 0:
+            return
+        new_entries = np.empty(len(hashes), dtype=self.ENTRY_DTYPE)
+        new_entries["hash"] = hashes
+        new_entries["data_id"] = data_ids
+        merged = np.concatenate([np.asarray(self._load()), new_entries])
+        merged = merged[np.argsort(merged["hash"], kind="stable")]
+        _, first = np.unique(merged["hash"], return_index=True)
+        merged = merged[first]
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temp_path = self.entries_path.with_suffix(".tmp.npy")
+        np.save(temp_path, merged)
+        # Release the memory map before replacing the file it maps
+        self._entries = None
+        os.replace(temp_path, self.entries_path)
+
+    def reset(self):
+        self._entries = None
+        for path in (self.entries_path, self.state_path):
+            if path.exists():
+                path.unlink()
+
+    def _index_server_rows(self, db_conn: "DatabaseConnection", d_name: str, since_data_id: int):
+        # Rewriting the index costs O(index size), so buffer chunks between writes
+        hashes, data_ids, buffered = [], [], 0
+        for chunk in db_conn.iter_dataset_rows(d_name, since_data_id):
+            data_ids.append(chunk.pop("data_id").to_numpy(dtype=np.int64))
+            hashes.append(self.hash_rows(chunk))
+            buffered += len(chunk)
+            if buffered >= self.WRITE_BUFFER_ROWS:
+                self.add(np.concatenate(hashes), np.concatenate(data_ids))
+                hashes, data_ids, buffered = [], [], 0
+        if buffered:
+            self.add(np.concatenate(hashes), np.concatenate(data_ids))
+
+    def add_uploaded_rows(
+        self,
+        db_conn: "DatabaseConnection",
+        d_name: str,
+        hashes: np.ndarray,
+        data_ids: np.ndarray,
+        inserted_rows: int,
+    ):
+        """
+        Adds the rows of a published upload. If the upload's inserts were the only
+        change to the dataset table since the last sync, the index is marked as in
+        sync without reading anything back; otherwise it syncs with the server.
+        """
+        state = self._read_state()
+        self.add(hashes, data_ids)
+        if state is None:
+            self.sync(db_conn, d_name)
+            return
+
+        server_state = db_conn.get_dataset_row_state(d_name, state["max_data_id"])
+        if (
+            server_state["row_count"] == state["row_count"] + inserted_rows
+            and server_state["rows_since"] == inserted_rows
+        ):
+            self.save_state(
+                {
+                    "row_count": server_state["row_count"],
+                    "max_data_id": server_state["max_data_id"],
+                }
+            )
+        else:
+            self.sync(db_conn, d_name)
+
+    def sync(self, db_conn: "DatabaseConnection", d_name: str):
+        """Brings the index in line with the dataset table on the server."""
+        state = self._read_state()
+        since_data_id = state["max_data_id"] if state else 0
+        server_state = db_conn.get_dataset_row_state(d_name, since_data_id)
+        if state and (
+            server_state["row_count"] == state["row_count"]
+            and server_state["max_data_id"] == state["max_data_id"]
+        ):
+            return
+
+        # Only appended rows since the last sync: index just those. Otherwise rows
+        # were deleted and the index has to be rebuilt.
+        if state and server_state["row_count"] - state["row_count"] == server_state["rows_since"]:
+            self._index_server_rows(db_conn, d_name, since_data_id)
+        else:
+            self.reset()
+            self._index_server_rows(db_conn, d_name, 0)
+
+        self.save_state(
+            {
+                "row_count": server_state["row_count"],
+                "max_data_id": server_state["max_data_id"],
+            }
+        )
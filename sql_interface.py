@@ -4,6 +4,12 @@ from typing import List, Optional, Dict
 class SQLInterface(ABC):
     """Abstract interface for SQL operations across different database systems."""
 
+    # Maximum number of columns of a table, with and without sparse storage
+    MAX_COLUMNS = 1024
+    MAX_SPARSE_COLUMNS = 1024
+    # Isolation level of explicit transactions; connections autocommit otherwise
+    TRANSACTION_ISOLATION_LEVEL = "READ COMMITTED"
+
     @abstractmethod
     def create_database_if_not_exists(self, database_name: str) -> str:
         """Returns SQL to create database if it doesn't exist."""
@@ -39,9 +45,20 @@ class SQLInterface(ABC):
 
     @abstractmethod
     def alter_table_add_columns(
-        self, table_name: str, columns: List[Dict[str, str]]
+        self, table_name: str, columns: List[Dict[str, str]], sparse: bool = False
     ) -> str:
-        """Returns SQL to add new columns to existing table."""
+        """
+        Returns SQL to add new columns to existing table. Sparse columns take no
+        space in rows where they are NULL.
+        """
+        pass
+
+    @abstractmethod
+    def sparse_column_set(self) -> Dict[str, str]:
+        """
+        Returns the column definition that enables wide sparse tables, to be
+        included when the table is created.
+        """
         pass
 
     @abstractmethod
@@ -62,3 +79,135 @@ class SQLInterface(ABC):
     ) -> str:
         """Returns SQL to create a temporary table."""
         pass
+
+    @abstractmethod
+    def alter_column_type(self, table_name: str, column: Dict[str, str]) -> str:
+        """Returns SQL to change the type of an existing column."""
+        pass
+
+    @abstractmethod
+    def get_table_columns(self, table_name: str) -> str:
+        """Returns SQL listing the data column names of a table."""
+        pass
+
+    @abstractmethod
+    def get_table_column_types(self, table_name: str) -> str:
+        """Returns SQL listing (name, type name) of the data columns of a table."""
+        pass
+
+    @abstractmethod
+    def random_sample_filter(self, key: str, percent: float) -> str:
+        """
+        Returns a condition keeping each row independently with a probability of
+        ``percent`` percent, evaluated per row on the ``key`` column expression.
+        """
+        pass
+
+    @abstractmethod
+    def random_order(self) -> str:
+        """Returns an expression to ORDER BY for a random row order."""
+        pass
+
+    @abstractmethod
+    def drop_table_if_exists(self, table_name: str) -> str:
+        """Returns SQL to drop a table unless it does not exist."""
+        pass
+
+    @abstractmethod
+    def drop_columns(self, table_name: str, columns: List[str]) -> str:
+        """Returns SQL to drop columns from an existing table."""
+        pass
+
+    @abstractmethod
+    def delete_batch(self, table_name: str, where_clause: str, batch_size: int) -> str:
+        """
+        Returns SQL deleting at most ``batch_size`` rows of ``table_name`` matching
+        ``where_clause``. The table is aliased as ``t`` inside the clause.
+        """
+        pass
+
+    @abstractmethod
+    def table_size_kb(self, table_name: str) -> str:
+        """Returns SQL selecting the space reserved by a table, in kilobytes."""
+        pass
+
+    @abstractmethod
+    def rebuild_table(self, table_name: str) -> str:
+        """Returns SQL to rebuild a table so space freed by dropped columns is released."""
+        pass
+
+    @abstractmethod
+    def add_column_if_not_exists(self, table_name: str, column: Dict[str, str]) -> str:
+        """Returns SQL to add a column to an existing table unless it is already present."""
+        pass
+
+    @abstractmethod
+    def add_foreign_key_if_not_exists(
+        self, table_name: str, foreign_key: Dict[str, str]
+    ) -> str:
+        """
+        Returns SQL to add a foreign key constraint to an existing table unless a
+        constraint of that name is already present.
+        """
+        pass
+
+    @abstractmethod
+    def set_table_compression(
+        self,
+        table_name: str,
+        compression: str,
+        primary_key: List[str],
+        referencing_foreign_keys: Optional[List[Dict[str, str]]] = None,
+        online: bool = False,
+    ) -> str:
+        """
+        Returns SQL converting an existing table to a storage format: "none", "row"
+        or "page" compressed rowstore, or "columnstore", the backend's native
+        columnar format. ``referencing_foreign_keys`` (with the referencing
+        ``table``) are recreated if the primary key must be rebuilt; ``online``
+        keeps the table readable and writable during the conversion.
+        """
+        pass
+
+    @abstractmethod
+    def partition_table(
+        self,
+        table_name: str,
+        column: str,
+        primary_key: List[str],
+        boundaries: List[int],
+        compression: str = "none",
+        online: bool = False,
+    ) -> str:
+        """
+        Returns SQL partitioning an existing rowstore table on ranges of an integer
+        ``column``, one range starting at each of ``boundaries``. Backends without
+        native partitioning can segment the table per range instead.
+        """
+        pass
+
+    @abstractmethod
+    def split_partition(self, table_name: str, boundary: int) -> str:
+        """
+        Returns SQL starting a new partition of a partitioned table at ``boundary``,
+        unless one already starts there.
+        """
+        pass
+
+    @abstractmethod
+    def partition_range(self, table_name: str) -> str:
+        """
+        Returns SQL selecting (partition number, lower boundary, upper boundary)
+        of the partition holding the value bound to ``:value``. Open ends are NULL.
+        """
+        pass
+
+    @abstractmethod
+    def truncate_partition(
+        self, table_name: str, partition_number: int, lower_boundary: Optional[int]
+    ) -> str:
+        """
+        Returns SQL emptying one partition without touching its rows one by one,
+        then merging it into the previous partition if ``lower_boundary`` is given.
+        """
+        pass
@@ -0,0 +1,70 @@
+import time
+import pytest
+from catalog import CatalogAggregator
+
+
+def entry(connection, d_name, description=None, columns=()):
+    return {
+        "connection": connection,
+        "d_name": d_name,
+        "description": description,
+        "columns": list(columns),
+    }
+
+
+@pytest.fixture
+def catalog():
+    return {
+        "datasets": [
+            entry("prod", "sales", "Daily sales", ["customer_id", "amount"]),
+            entry("dev", "customers", None, ["Customer_Name", "city"]),
+            entry("dev", "events", "Click stream", ["ts"]),
+        ]
+    }
+
+
+def names(results):
+    return [(result["connection"], result["d_name"]) for result in results]
+
+
+def test_empty_search_returns_everything(catalog):
+    results = CatalogAggregator.search(catalog, "  ")
+    assert len(results) == 3
+    assert all(result["matched_columns"] == [] for result in results)
+
+
+def test_search_matches_columns_case_insensitively(catalog):
+    results = CatalogAggregator.search(catalog, "CUSTOMER")
+    assert names(results) == [("prod", "sales"), ("dev", "customers")]
+    assert results[0]["matched_columns"] == ["customer_id"]
+    assert results[1]["matched_columns"] == ["Customer_Name"]
+
+
+def test_search_matches_description_and_connection(catalog):
+    assert names(CatalogAggregator.search(catalog, "click")) == [("dev", "events")]
+    assert names(CatalogAggregator.search(catalog, "prod")) == [("prod", "sales")]
+
+
+def test_search_without_matches(catalog):
+    assert CatalogAggregator.search(catalog, "nothing") == []
+
+
+def test_collect_reports_failed_and_slow_connections(monkeypatch):
+    def query(self, name, conn_details):
+        if name == "broken":
+            raise RuntimeError("login failed")
+        if name == "slow":
+            time.sleep(2)
+        return [entry(name, f"{name}_data")]
+
+    monkeypatch.setattr(CatalogAggregator, "_query", query)
+    aggregator = CatalogAggregator(
+        {"ok": {}, "broken": {}, "slow": {}}, timeout_seconds=0.5
+    )
+    catalog = aggregator.collect()
+
+    assert names(catalog["datasets"]) == [("ok", "ok_data")]
+    assert catalog["partial"]
+    statuses = {name: status["status"] for name, status in catalog["connections"].items()}
+    assert statuses == {"ok": "ok", "broken": "failed", "slow": "timeout"}
+    assert catalog["connections"]["broken"]["error"] == "login failed"
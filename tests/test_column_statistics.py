@@ -0,0 +1,106 @@
+import datetime
+import decimal
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+from column_statistics import ColumnStatistics, HyperLogLog
+
+
+def test_hyperloglog_estimate_is_within_a_few_percent():
+    sketch = HyperLogLog()
+    sketch.add(pd.Series(np.arange(100000)))
+    assert abs(sketch.estimate() - 100000) / 100000 < 0.05
+
+
+def test_hyperloglog_counts_small_sets_closely():
+    sketch = HyperLogLog()
+    sketch.add(pd.Series(["a", "b", "c", "a", None]))
+    assert sketch.estimate() == 3
+
+
+def test_hyperloglog_merge_matches_a_single_sketch():
+    whole, left, right = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    values = pd.Series(np.arange(20000))
+    whole.add(values)
+    left.add(values[:12000])
+    right.add(values[8000:])
+    left.merge(right)
+    assert left.estimate() == whole.estimate()
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame(
+        {
+            "id": [1, 2, 3, 4, 5],
+            "city": ["Cairo", "Giza", "Cairo", None, "Cairo"],
+            "price": [1.5, None, 3.0, 0.5, 2.0],
+            "created": pd.to_datetime(
+                ["2024-01-02", "2024-01-01", None, "2024-03-01", "2024-02-01"]
+            ),
+        }
+    )
+
+
+def by_column(statistics):
+    return {result["column_name"]: result for result in statistics.results()}
+
+
+def test_results(df):
+    statistics = ColumnStatistics()
+    statistics.update(df)
+    results = by_column(statistics)
+
+    assert results["id"]["row_count"] == 5
+    assert results["id"]["distinct_estimate"] == 5
+    assert (results["price"]["min_value"], results["price"]["max_value"]) == ("0.5", "3.0")
+    assert results["price"]["null_count"] == 1
+    assert results["city"]["top_values"][0] == ["Cairo", 3]
+    assert results["city"]["min_value"] == "Cairo"
+    assert results["created"]["min_value"].startswith("2024-01-01")
+
+
+def test_chunks_give_the_same_results(df):
+    whole, chunked = ColumnStatistics(), ColumnStatistics()
+    whole.update(df)
+    chunked.update(df.iloc[:2])
+    chunked.update(df.iloc[2:])
+    assert whole.results() == chunked.results()
+
+
+def test_json_round_trip_resumes_accumulation(df):
+    uninterrupted = ColumnStatistics()
+    uninterrupted.update(df)
+
+    checkpointed = ColumnStatistics()
+    checkpointed.update(df.iloc[:3])
+    restored = ColumnStatistics.from_json(checkpointed.to_json())
+    restored.update(df.iloc[3:])
+
+    assert restored.results() == uninterrupted.results()
+
+
+def test_json_keeps_dates_and_decimals():
+    df = pd.DataFrame(
+        {
+            "day": [datetime.date(2024, 1, 2), datetime.date(2023, 5, 6)],
+            "amount": [decimal.Decimal("1.10"), decimal.Decimal("20.05")],
+        }
+    )
+    statistics = ColumnStatistics()
+    statistics.update(df)
+    restored = ColumnStatistics.from_json(statistics.to_json())
+
+    assert decimal.Decimal("20.05") in restored.columns["amount"]["counts"].index
+    assert datetime.date(2024, 1, 2) in restored.columns["day"]["counts"].index
+    assert restored.results() == statistics.results()
+
+
+def test_pickled_checkpoint_state_is_rejected(df):
+    # Checkpoints used to store the statistics pickled; the checkpoint reader
+    # turns this ValueError into a request to restart the ingest
+    statistics = ColumnStatistics()
+    statistics.update(df)
+    with pytest.raises(ValueError):
+        ColumnStatistics.from_json(pickle.dumps(statistics).decode("latin-1"))
@@ -0,0 +1,70 @@
+import pandas as pd
+from compact_dtypes import CompactDtypes
+
+
+def stats(column_name, min_value=None, max_value=None, null_count=0, distinct=0):
+    return {
+        "column_name": column_name,
+        "min_value": min_value,
+        "max_value": max_value,
+        "null_count": null_count,
+        "distinct_estimate": distinct,
+    }
+
+
+def test_integers_fit_their_range():
+    plan = CompactDtypes.plan(
+        {"small": "int", "unsigned": "tinyint", "nullable": "bigint", "unknown": "int"},
+        [
+            stats("small", "-5", "100"),
+            stats("unsigned", "0", "200"),
+            stats("nullable", "0", "70000", null_count=3),
+        ],
+    )
+    assert plan == {
+        "small": "int8",
+        "unsigned": "int16",
+        "nullable": "Int32",
+        # Without statistics the column may hold NULLs
+        "unknown": "Int32",
+    }
+
+
+def test_real_bit_and_float():
+    plan = CompactDtypes.plan(
+        {"r": "real", "f": "float", "flag": "bit", "maybe": "bit"},
+        [stats("flag"), stats("maybe", null_count=1)],
+    )
+    assert plan == {"r": "float32", "flag": "bool", "maybe": "boolean"}
+
+
+def test_strings_become_categories_when_few_values_are_distinct():
+    plan = CompactDtypes.plan(
+        {"city": "varchar", "comment": "NVARCHAR", "other": "varchar"},
+        [stats("city", distinct=3), stats("comment", distinct=90, null_count=5)],
+        row_count=100,
+    )
+    assert plan["city"] == "category"
+    assert plan["comment"] == CompactDtypes._string_dtype()
+    assert plan["other"] == CompactDtypes._string_dtype()
+
+
+def test_chunks_share_categories_after_finalize():
+    plan = {"city": "category", "n": "int8"}
+    chunks = [
+        CompactDtypes.apply(pd.DataFrame({"city": ["a", "b"], "n": [1, 2]}), plan),
+        CompactDtypes.apply(pd.DataFrame({"city": ["c"], "n": [3]}), plan),
+    ]
+    df = CompactDtypes.finalize(pd.concat(chunks, ignore_index=True), plan)
+
+    assert str(df["n"].dtype) == "int8"
+    assert list(df["city"].cat.categories) == ["a", "b", "c"]
+
+
+def test_memory_report():
+    df = pd.DataFrame({"n": pd.Series([1, 2, 3], dtype="int8")})
+    report = CompactDtypes.memory_report(pd.Series({"n": 24}), df)
+    assert report["rows"] == 3
+    assert report["bytes_before"] == 24
+    assert report["ratio"] == 8.0
+    assert report["columns"]["n"]["dtype"] == "int8"
@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+from content_fingerprint import ContentFingerprint
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame(
+        {"id": [1, 2, 3, 4], "name": ["a", "b", None, "d"], "price": [1.5, 2.0, 3.25, None]}
+    )
+
+
+def test_row_and_column_order_do_not_matter(df):
+    shuffled = df.sample(frac=1, random_state=0)[["price", "id", "name"]]
+    assert ContentFingerprint.of([df]) == ContentFingerprint.of([shuffled])
+
+
+def test_chunks_match_the_whole_frame(df):
+    assert ContentFingerprint.of([df]) == ContentFingerprint.of([df.iloc[:1], df.iloc[1:]])
+
+
+def test_content_changes_the_fingerprint(df):
+    changed = df.copy()
+    changed.loc[0, "price"] = 9.0
+    assert ContentFingerprint.of([df]) != ContentFingerprint.of([changed])
+    assert ContentFingerprint.of([df]) != ContentFingerprint.of([pd.concat([df, df.iloc[:1]])])
+
+
+def test_column_type_changes_the_fingerprint():
+    as_text = pd.DataFrame({"x": ["1", "2"]})
+    as_int = pd.DataFrame({"x": [1, 2]})
+    assert ContentFingerprint.of([as_text]) != ContentFingerprint.of([as_int])
+
+
+def test_types_widen_across_chunks():
+    ints = pd.DataFrame({"x": [1, 2]})
+    floats = pd.DataFrame({"x": [1.5, 2.5]})
+    fingerprint = ContentFingerprint()
+    fingerprint.update(ints)
+    fingerprint.update(floats)
+    assert fingerprint.columns == {"x": "float"}
+
+
+def test_row_count_is_encoded(df):
+    assert ContentFingerprint.digest_row_count(ContentFingerprint.of([df])) == len(df)
+
+
+def test_json_round_trip(df):
+    fingerprint = ContentFingerprint()
+    fingerprint.update(df.iloc[:2])
+    restored = ContentFingerprint.from_json(fingerprint.to_json())
+    restored.update(df.iloc[2:])
+    assert restored.hexdigest() == ContentFingerprint.of([df])
+
+
+def test_state_without_column_types_is_rejected():
+    with pytest.raises(ValueError):
+        ContentFingerprint.from_json('{"row_sum": 0, "row_count": 0, "columns": ["x"]}')
@@ -0,0 +1,72 @@
+import gzip
+import io
+import pandas as pd
+import pytest
+from file_readers import FileReaders
+
+pytest.importorskip("pyarrow")
+
+CSV = """id,name,price,created,day,flag
+1,alpha,1.5,2024-01-01T10:00:00,2024-01-01,true
+2,,2.25,2024-01-01 10:00,2024-01-02,false
+3,gamma,,2024-01-02 08:30:15.5,,true
+4,delta,4.0,,2024-01-04,false
+"""
+
+
+def read(data: bytes, name: str, **kwargs) -> pd.DataFrame:
+    chunks = list(FileReaders.read_chunks(io.BytesIO(data), name=name, **kwargs))
+    return pd.concat(chunks, ignore_index=True)
+
+
+def test_csv_matches_pandas():
+    expected = pd.read_csv(io.StringIO(CSV))
+    pd.testing.assert_frame_equal(read(CSV.encode(), "data.csv"), expected)
+
+
+def test_timestamps_keep_their_text():
+    df = read(CSV.encode(), "data.csv")
+    assert df["created"].tolist()[:3] == [
+        "2024-01-01T10:00:00",
+        "2024-01-01 10:00",
+        "2024-01-02 08:30:15.5",
+    ]
+
+
+def test_chunks_and_projection():
+    chunks = list(
+        FileReaders.read_chunks(
+            io.BytesIO(CSV.encode()), name="data.csv", chunksize=3, columns=["id", "name"]
+        )
+    )
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+    assert list(chunks[0].columns) == ["id", "name"]
+
+
+def test_compressed_csv():
+    df = read(gzip.compress(CSV.encode()), "data.csv.gz")
+    pd.testing.assert_frame_equal(df, pd.read_csv(io.StringIO(CSV)))
+
+
+def test_types_changing_after_the_first_block_fall_back_to_pandas(monkeypatch):
+    import file_readers
+
+    monkeypatch.setattr(file_readers, "CSV_BLOCK_BYTES", 64)
+    rows = "\n".join(str(i) for i in range(50))
+    data = f"value\n{rows}\ntext\n"
+    df = read(data.encode(), "data.csv", chunksize=10)
+    assert len(df) == 51
+    assert df["value"].astype(str).tolist()[-2:] == ["49", "text"]
+
+
+def test_parquet_round_trip(tmp_path):
+    expected = pd.read_csv(io.StringIO(CSV))
+    path = tmp_path / "data.parquet"
+    expected.to_parquet(path)
+    df = pd.concat(FileReaders.read_chunks(path, chunksize=2), ignore_index=True)
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_unsupported_type():
+    with pytest.raises(ValueError):
+        FileReaders.read_chunks(io.BytesIO(b""), name="data.xlsx")
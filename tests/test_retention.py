@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+from retention import RetentionPolicy
+
+NOW = datetime(2024, 6, 15, 12, 0)
+
+
+def version(version_id, days_ago, **fields):
+    return {
+        "version_id": version_id,
+        "created_at": NOW - timedelta(days=days_ago),
+        "branch": None,
+        **fields,
+    }
+
+
+def ids(versions):
+    return [v["version_id"] for v in versions]
+
+
+def test_nothing_is_pruned_without_a_keep_rule():
+    versions = [version(i, 10 - i) for i in range(1, 6)]
+    assert RetentionPolicy.versions_to_prune(versions, {}, NOW) == []
+    assert RetentionPolicy.versions_to_prune(versions, {"archive_after_days": 1}, NOW) == []
+
+
+def test_keep_last():
+    versions = [version(i, 10 - i) for i in range(1, 6)]
+    pruned = RetentionPolicy.versions_to_prune(versions, {"keep_last": 2}, NOW)
+    assert ids(pruned) == [1, 2, 3]
+
+
+def test_keep_tagged_and_monthly():
+    versions = [
+        version(1, 200, tag="release"),
+        version(2, 70),
+        version(3, 65),
+        version(4, 40),
+        version(5, 1),
+    ]
+    policy = {"keep_tagged": True, "keep_monthly_months": 3}
+    pruned = RetentionPolicy.versions_to_prune(versions, policy, NOW)
+    # April keeps version 3 over 2, May keeps 4, June keeps 5
+    assert ids(pruned) == [2]
+
+
+def test_branch_bases_and_alias_targets_are_kept():
+    versions = [
+        version(1, 9, is_branch_base=True),
+        version(2, 8),
+        version(3, 7),
+        version(4, 6, branch="dev"),
+        version(5, 5, branch="dev", alias_of=2),
+        version(6, 4),
+    ]
+    pruned = RetentionPolicy.versions_to_prune(versions, {"keep_last": 1}, NOW)
+    # Version 5 is the latest of its branch; version 2 holds its rows
+    assert ids(pruned) == [3, 4]
+
+
+def test_each_branch_keeps_its_latest_version():
+    versions = [version(1, 5), version(2, 4, branch="dev"), version(3, 3)]
+    pruned = RetentionPolicy.versions_to_prune(versions, {"keep_last": 1}, NOW)
+    assert ids(pruned) == [1]
+
+
+def test_versions_to_archive():
+    versions = [
+        version(1, 90, archived=True),
+        version(2, 60),
+        version(3, 45, alias_of=2),
+        version(4, 40, branch="dev"),
+        version(5, 10),
+        version(6, 50),
+        version(7, 1),
+    ]
+    archived = RetentionPolicy.versions_to_archive(
+        versions, {"archive_after_days": 30}, NOW
+    )
+    assert ids(archived) == [2, 6]
+
+
+def test_nothing_is_archived_without_the_rule():
+    versions = [version(1, 90), version(2, 1)]
+    assert RetentionPolicy.versions_to_archive(versions, {"keep_last": 1}, NOW) == []
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+from row_hash_index import RowHashIndex
+
+
+class FakeServer:
+    """Serves a dataset table the way DatabaseConnection reads it for the index."""
+
+    def __init__(self, rows: pd.DataFrame):
+        self.rows = rows
+        self.reads = 0
+
+    def get_dataset_row_state(self, d_name, since_data_id):
+        return {
+            "row_count": len(self.rows),
+            "max_data_id": int(self.rows["data_id"].max()) if len(self.rows) else 0,
+            "rows_since": int((self.rows["data_id"] > since_data_id).sum()),
+        }
+
+    def iter_dataset_rows(self, d_name, since_data_id):
+        self.reads += 1
+        new_rows = self.rows[self.rows["data_id"] > since_data_id]
+        for start in range(0, len(new_rows), 2):
+            yield new_rows.iloc[start : start + 2].reset_index(drop=True)
+
+
+@pytest.fixture
+def rows():
+    return pd.DataFrame(
+        {
+            "data_id": [1, 2, 3],
+            "name": ["a", "b", None],
+            "amount": [1.0, 2.5, 3.0],
+        }
+    )
+
+
+@pytest.fixture
+def index(tmp_path):
+    return RowHashIndex(str(tmp_path), "conn", "sales")
+
+
+def test_hashes_ignore_column_order_and_missing_columns():
+    df = pd.DataFrame({"name": ["a", None], "amount": [1.0, 3.0]})
+    reordered = df[["amount", "name"]]
+    # An upload without the column matches stored rows that are NULL in it
+    without_name = pd.DataFrame({"amount": [3]})
+
+    hashes = RowHashIndex.hash_rows(df)
+    assert (RowHashIndex.hash_rows(reordered) == hashes).all()
+    assert RowHashIndex.hash_rows(without_name)[0] == hashes[1]
+    assert hashes[0] != hashes[1]
+
+
+def test_add_and_lookup(index):
+    df = pd.DataFrame({"name": ["a", "b", "c"]})
+    hashes = RowHashIndex.hash_rows(df)
+    assert (index.lookup(hashes) == -1).all()
+
+    index.add(hashes[:2], np.array([10, 20]))
+    index.add(hashes[:1], np.array([99]))
+    assert index.lookup(hashes).tolist() == [10, 20, -1]
+
+
+def test_sync_indexes_server_rows(index, rows):
+    server = FakeServer(rows)
+    index.sync(server, "sales")
+
+    uploaded = pd.DataFrame({"amount": [2.5, 3.0, 4.0], "name": ["b", None, "d"]})
+    assert index.lookup(RowHashIndex.hash_rows(uploaded)).tolist() == [2, 3, -1]
+
+    # Nothing changed on the server: no rows are read again
+    index.sync(server, "sales")
+    assert server.reads == 1
+
+
+def test_sync_appends_rows_added_by_other_clients(index, rows):
+    server = FakeServer(rows)
+    index.sync(server, "sales")
+    server.rows = pd.concat(
+        [rows, pd.DataFrame({"data_id": [4], "name": ["d"], "amount": [4.0]})],
+        ignore_index=True,
+    )
+    index.sync(server, "sales")
+
+    uploaded = pd.DataFrame({"name": ["a", "d"], "amount": [1.0, 4.0]})
+    assert index.lookup(RowHashIndex.hash_rows(uploaded)).tolist() == [1, 4]
+
+
+def test_sync_rebuilds_after_deletes(index, rows):
+    server = FakeServer(rows)
+    index.sync(server, "sales")
+    server.rows = rows[rows["data_id"] != 1].reset_index(drop=True)
+    index.sync(server, "sales")
+
+    uploaded = pd.DataFrame({"name": ["a", "b"], "amount": [1.0, 2.5]})
+    assert index.lookup(RowHashIndex.hash_rows(uploaded)).tolist() == [-1, 2]
+
+
+def test_uploaded_rows_skip_the_sync(index, rows):
+    server = FakeServer(rows)
+    index.sync(server, "sales")
+
+    uploaded = pd.DataFrame({"name": ["d"], "amount": [4.0]})
+    server.rows = pd.concat([rows, uploaded.assign(data_id=[4])], ignore_index=True)
+    hashes = RowHashIndex.hash_rows(uploaded)
+    index.add_uploaded_rows(server, "sales", hashes, np.array([4]), inserted_rows=1)
+
+    assert server.reads == 1
+    assert index.lookup(hashes).tolist() == [4]
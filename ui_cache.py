@@ -0,0 +1,234 @@
+import threading
+import streamlit as st
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+from config import Config
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from database_connection import DatabaseConnection
+
+
+@st.cache_data(
+    ttl=Config.CACHE_TTL_SECONDS,
+    max_entries=Config.CACHE_MAX_ENTRIES,
+    show_spinner=False,
+)
+def _cached_datasets(
+    _db_conn: "DatabaseConnection", conn_key: str, generation: int
+) -> List[Tuple[str, str]]:
+    with _db_conn.raising_errors():
+        return _db_conn.get_all_datasets()
+
+
+@st.cache_data(
+    ttl=Config.CACHE_TTL_SECONDS,
+    max_entries=Config.CACHE_MAX_ENTRIES,
+    show_spinner=False,
+)
+def _cached_versions_info(
+    _db_conn: "DatabaseConnection", conn_key: str, d_name: str, generation: int
+) -> List[Dict]:
+    with _db_conn.raising_errors():
+        return _db_conn.get_all_versions_info(d_name)
+
+
+@st.cache_data(
+    ttl=Config.CACHE_TTL_SECONDS,
+    max_entries=Config.CACHE_MAX_ENTRIES,
+    show_spinner=False,
+)
+def _cached_branches(
+    _db_conn: "DatabaseConnection", conn_key: str, d_name: str, generation: int
+) -> List[Dict]:
+    with _db_conn.raising_errors():
+        return _db_conn.get_branches(d_name)
+
+
+@st.cache_data(
+    ttl=Config.CACHE_TTL_SECONDS,
+    max_entries=Config.CACHE_MAX_ENTRIES,
+    show_spinner=False,
+)
+def _cached_version_columns(
+    _db_conn: "DatabaseConnection",
+    conn_key: str,
+    d_name: str,
+    version_id: int,
+    generation: int,
+) -> List[str]:
+    with _db_conn.raising_errors():
+        return _db_conn.get_version_columns(version_id)
+
+
+@st.cache_data(
+    ttl=Config.CACHE_TTL_SECONDS,
+    max_entries=Config.CACHE_MAX_ENTRIES,
+    show_spinner=False,
+)
+def _cached_version_statistics(
+    _db_conn: "DatabaseConnection",
+    conn_key: str,
+    d_name: str,
+    version_id: int,
+    generation: int,
+) -> List[Dict]:
+    with _db_conn.raising_errors():
+        return _db_conn.get_version_statistics(version_id)
+
+
+@st.cache_data(
+    ttl=Config.CACHE_TTL_SECONDS,
+    max_entries=Config.CACHE_MAX_ENTRIES,
+    show_spinner=False,
+)
+def _cached_version_preview(
+    _db_conn: "DatabaseConnection",
+    conn_key: str,
+    d_name: str,
+    version_id: int,
+    rows: int,
+    generation: int,
+) -> Optional["pd.DataFrame"]:
+    with _db_conn.raising_errors():
+        return _db_conn.get_version_head(d_name, version_id, rows)
+
+
+@st.cache_data(
+    ttl=Config.CATALOG_TTL_SECONDS,
+    max_entries=Config.CACHE_MAX_ENTRIES,
+    show_spinner=False,
+)
+def _cached_catalog(connections: Dict[str, Dict], generation: int) -> Dict:
+    from catalog import CatalogAggregator
+
+    return CatalogAggregator(connections).collect()
+
+
+class UICache:
+    """
+    Caches dataset listings, version metadata, schemas and previews across
+    Streamlit reruns.
+
+    Entries are keyed by connection + dataset + version. Every key also carries
+    a generation counter that is bumped by ``invalidate``; bumping it makes the
+    next lookup miss so stale entries simply age out of the cache.
+    """
+
+    _generations: Dict[Tuple[str, Optional[str]], int] = {}
+    _lock = threading.Lock()
+    # Generation of the cross-connection catalog, bumped with any dataset listing
+    CATALOG_KEY = ("*", None)
+
+    @staticmethod
+    def connection_key(db_conn: "DatabaseConnection") -> str:
+        return db_conn.connection_key
+
+    @staticmethod
+    def _lookup(cached: Callable, fallback, *args):
+        """
+        Calls a cached function. The cached functions raise on errors, so a
+        failure is never cached; it gives ``fallback`` for this rerun only.
+        """
+        try:
+            return cached(*args)
+        except Exception as e:
+            print(f"Error loading {cached.__name__.replace('_cached_', '')}: {str(e)}")
+            return fallback
+
+    @classmethod
+    def _generation(cls, conn_key: str, d_name: Optional[str] = None) -> int:
+        with cls._lock:
+            return cls._generations.get((conn_key, d_name), 0)
+
+    @classmethod
+    def invalidate(cls, db_conn: "DatabaseConnection", d_name: Optional[str] = None):
+        """
+        Invalidates cached entries of one dataset, or the dataset listing of the
+        connection when ``d_name`` is None.
+        """
+        key = (cls.connection_key(db_conn), d_name)
+        with cls._lock:
+            cls._generations[key] = cls._generations.get(key, 0) + 1
+        if d_name is None:
+            cls.invalidate_catalog()
+
+    @classmethod
+    def invalidate_catalog(cls):
+        with cls._lock:
+            cls._generations[cls.CATALOG_KEY] = cls._generations.get(cls.CATALOG_KEY, 0) + 1
+
+    @classmethod
+    def get_catalog(cls, connections: Dict[str, Dict]) -> Dict:
+        """Cross-connection catalog, see ``CatalogAggregator.collect``."""
+        with cls._lock:
+            generation = cls._generations.get(cls.CATALOG_KEY, 0)
+        return _cached_catalog(connections, generation)
+
+    @classmethod
+    def get_datasets(cls, db_conn: "DatabaseConnection") -> List[Tuple[str, str]]:
+        conn_key = cls.connection_key(db_conn)
+        return cls._lookup(_cached_datasets, [], db_conn, conn_key, cls._generation(conn_key))
+
+    @classmethod
+    def get_versions_info(cls, db_conn: "DatabaseConnection", d_name: str) -> List[Dict]:
+        conn_key = cls.connection_key(db_conn)
+        return cls._lookup(
+            _cached_versions_info, [], db_conn, conn_key, d_name, cls._generation(conn_key, d_name)
+        )
+
+    @classmethod
+    def get_branches(cls, db_conn: "DatabaseConnection", d_name: str) -> List[Dict]:
+        conn_key = cls.connection_key(db_conn)
+        return cls._lookup(
+            _cached_branches, [], db_conn, conn_key, d_name, cls._generation(conn_key, d_name)
+        )
+
+    @classmethod
+    def get_version_columns(
+        cls, db_conn: "DatabaseConnection", d_name: str, version_id: int
+    ) -> List[str]:
+        conn_key = cls.connection_key(db_conn)
+        return cls._lookup(
+            _cached_version_columns,
+            [],
+            db_conn,
+            conn_key,
+            d_name,
+            version_id,
+            cls._generation(conn_key, d_name),
+        )
+
+    @classmethod
+    def get_version_statistics(
+        cls, db_conn: "DatabaseConnection", d_name: str, version_id: int
+    ) -> List[Dict]:
+        conn_key = cls.connection_key(db_conn)
+        return cls._lookup(
+            _cached_version_statistics,
+            [],
+            db_conn,
+            conn_key,
+            d_name,
+            version_id,
+            cls._generation(conn_key, d_name),
+        )
+
+    @classmethod
+    def get_version_preview(
+        cls,
+        db_conn: "DatabaseConnection",
+        d_name: str,
+        version_id: int,
+        rows: int = Config.PREVIEW_ROWS,
+    ) -> Optional["pd.DataFrame"]:
+        conn_key = cls.connection_key(db_conn)
+        return cls._lookup(
+            _cached_version_preview,
+            None,
+            db_conn,
+            conn_key,
+            d_name,
+            version_id,
+            rows,
+            cls._generation(conn_key, d_name),
+        )
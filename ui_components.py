@@ -1,8 +1,10 @@
 import streamlit as st
-import pandas as pd
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, Optional
 from config import Config
-from database_connection import DatabaseConnection
+from ui_cache import UICache
+
+if TYPE_CHECKING:
+    from database_connection import DatabaseConnection
 
 class UIComponents:
     @staticmethod
@@ -32,13 +34,15 @@ class UIComponents:
 
     @staticmethod
     def display_version_schema(
-        db_conn: DatabaseConnection,
+        db_conn: "DatabaseConnection",
         dataset_name: str,
         version_id: int,
         version_name: int,
     ):
+        import pandas as pd
+
         st.subheader(f"Schema for Version {version_name}")
-        columns = db_conn.get_version_columns(version_id)
+        columns = UICache.get_version_columns(db_conn, dataset_name, version_id)
 
         if columns:
             df = pd.DataFrame(columns, columns=["Column Name"])
@@ -49,3 +53,70 @@ class UIComponents:
             )
         else:
             st.warning("No schema information available for this version.")
+
+    @staticmethod
+    def create_retention_policy_form(
+        dataset_name: str, current: Optional[Dict]
+    ) -> Optional[Dict]:
+        current = current or {}
+        with st.form(f"retention_form_{dataset_name}"):
+            keep_last = st.number_input(
+                "Keep last N versions (0 = off)",
+                min_value=0,
+                value=current.get("keep_last", 0),
+            )
+            keep_monthly_months = st.number_input(
+                "Keep monthly snapshots for N months (0 = off)",
+                min_value=0,
+                value=current.get("keep_monthly_months", 0),
+            )
+            keep_tagged = st.checkbox(
+                "Keep tagged versions", value=current.get("keep_tagged", False)
+            )
+            archive_after_days = st.number_input(
+                "Archive versions older than N days (0 = off)",
+                min_value=0,
+                value=current.get("archive_after_days", 0),
+            )
+
+            submitted = st.form_submit_button("Save Retention Policy")
+            if submitted:
+                return {
+                    "keep_last": int(keep_last),
+                    "keep_monthly_months": int(keep_monthly_months),
+                    "keep_tagged": keep_tagged,
+                    "archive_after_days": int(archive_after_days),
+                }
+        return None
+
+    @staticmethod
+    def display_version_statistics(
+        db_conn: "DatabaseConnection",
+        dataset_name: str,
+        version_id: int,
+        version_name: int,
+    ):
+        import pandas as pd
+
+        st.subheader(f"Statistics for Version {version_name}")
+        statistics = UICache.get_version_statistics(db_conn, dataset_name, version_id)
+
+        if statistics:
+            df = pd.DataFrame(
+                [
+                    {
+                        "Column Name": stats["column_name"],
+                        "Nulls": stats["null_count"],
+                        "Distinct (est.)": stats["distinct_estimate"],
+                        "Min": stats["min_value"],
+                        "Max": stats["max_value"],
+                        "Top Values": ", ".join(
+                            f"{value} ({count})" for value, count in stats["top_values"]
+                        ),
+                    }
+                    for stats in statistics
+                ]
+            )
+            st.dataframe(df)
+        else:
+            st.warning("No statistics available for this version.")
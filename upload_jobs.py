@@ -0,0 +1,245 @@
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from config import Config
+from file_readers import FileReaders
+from row_hash_index import RowHashIndex
+from ui_cache import UICache
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from database_connection import DatabaseConnection
+
+
+class UploadJobQueue:
+    """
+    Runs uploads on background threads so the Streamlit script thread never blocks
+    on them. Jobs are recorded in the Upload_Jobs table with their status, phase,
+    processed rows and errors, so every session can follow them and they survive
+    browser disconnects.
+
+    Jobs of different datasets run in parallel on ``max_workers`` threads; jobs of
+    the same dataset run one after the other. A heartbeat thread refreshes the
+    update time of unfinished jobs, so jobs of a stopped app are reported as
+    interrupted instead of staying queued forever.
+
+    Each job runs its upload transaction on its own connection, closed when the
+    job ends. Progress updates must be visible while the upload is uncommitted, so
+    they go through one status connection per server, shared by all jobs and the
+    heartbeat.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = Config.UPLOAD_WORKERS,
+        heartbeat_seconds: int = Config.UPLOAD_HEARTBEAT_SECONDS,
+        connect: Optional[Callable[[Dict], "DatabaseConnection"]] = None,
+    ):
+        """
+        Args:
+            max_workers: Uploads running at once
+            heartbeat_seconds: Seconds between refreshes of unfinished jobs
+            connect: Creates the connections of the jobs from connection details,
+                     ``DatabaseConnection`` by default
+        """
+        self._connect = connect
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="upload")
+        self._heartbeat_seconds = heartbeat_seconds
+        self._lock = threading.Lock()
+        self._dataset_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        # Unfinished job IDs per connection key, with the connection details
+        self._active: Dict[str, Tuple[Dict, List[int]]] = {}
+        # Status connection per connection key, with the lock serializing its use
+        self._status: Dict[str, Tuple["DatabaseConnection", threading.Lock]] = {}
+        self._heartbeat = threading.Thread(
+            target=self._send_heartbeats, name="upload-heartbeat", daemon=True
+        )
+        self._heartbeat.start()
+
+    def submit(
+        self,
+        db_conn: "DatabaseConnection",
+        d_name: str,
+        uploaded_file,
+        description: Optional[str] = None,
+        branch: Optional[str] = None,
+        storage_layout: Optional[str] = None,
+        compression: str = "none",
+        partitioned: bool = False,
+    ) -> Optional[int]:
+        """
+        Queues an upload.
+
+        Args:
+            db_conn: Connection of the session submitting the upload
+            d_name: Name of the dataset
+            uploaded_file: Streamlit upload (or any file-like object with a name).
+                           Its content is copied, so the session may end.
+            description: Description of the new dataset or version
+            branch: Branch to add the version to, None for the main lineage
+            storage_layout: Create the dataset with this layout instead of adding a
+                            version to an existing one
+            compression: Storage format of a created dataset
+            partitioned: Partition the connection table of a created dataset by version
+
+        Returns:
+            Optional[int]: Job ID, None if the job could not be recorded
+        """
+        job_id = db_conn.create_upload_job(
+            d_name, uploaded_file.name, description, branch
+        )
+        if job_id is None:
+            return None
+
+        data = io.BytesIO(uploaded_file.getvalue())
+        with self._lock:
+            self._active.setdefault(
+                db_conn.connection_key, (db_conn.conn_details, [])
+            )[1].append(job_id)
+        self._executor.submit(
+            self._run,
+            db_conn.conn_details,
+            job_id,
+            d_name,
+            data,
+            uploaded_file.name,
+            description,
+            branch,
+            storage_layout,
+            compression,
+            partitioned,
+        )
+        return job_id
+
+    def shutdown(self, wait: bool = True):
+        """Stops accepting jobs; with ``wait``, returns once the queued jobs have run."""
+        self._executor.shutdown(wait=wait)
+
+    def _new_connection(self, conn_details: Dict) -> "DatabaseConnection":
+        if self._connect is not None:
+            return self._connect(conn_details)
+        from database_connection import DatabaseConnection
+
+        return DatabaseConnection(conn_details)
+
+    def _dataset_lock(self, conn_key: str, d_name: str) -> threading.Lock:
+        with self._lock:
+            return self._dataset_locks.setdefault((conn_key, d_name), threading.Lock())
+
+    def _status_connection(
+        self, conn_key: str, conn_details: Dict
+    ) -> Tuple["DatabaseConnection", threading.Lock]:
+        with self._lock:
+            if conn_key not in self._status:
+                self._status[conn_key] = (self._new_connection(conn_details), threading.Lock())
+            return self._status[conn_key]
+
+    def _update_job(self, conn_key: str, conn_details: Dict, job_id: int, **fields):
+        status_conn, lock = self._status_connection(conn_key, conn_details)
+        with lock:
+            status_conn.update_upload_job(job_id, **fields)
+
+    @staticmethod
+    def _recording_errors(
+        chunks: Iterable["pd.DataFrame"], errors: List[str]
+    ) -> Iterator["pd.DataFrame"]:
+        """Passes chunks through, keeping the message of a read error for the job."""
+        try:
+            yield from chunks
+        except Exception as e:
+            errors.append(str(e))
+            raise
+
+    def _run(
+        self,
+        conn_details: Dict,
+        job_id: int,
+        d_name: str,
+        data: io.BytesIO,
+        file_name: str,
+        description: Optional[str],
+        branch: Optional[str],
+        storage_layout: Optional[str],
+        compression: str,
+        partitioned: bool,
+    ):
+        db_conn = self._new_connection(conn_details)
+        conn_key = db_conn.connection_key
+        try:
+            with self._dataset_lock(conn_key, d_name):
+                self._update_job(
+                    conn_key, conn_details, job_id, status="running", phase="stage"
+                )
+
+                def progress(phase: str, rows: int):
+                    self._update_job(conn_key, conn_details, job_id, phase=phase, rows=rows)
+
+                errors = []
+                chunks = self._recording_errors(
+                    FileReaders.read_chunks(data, name=file_name), errors
+                )
+                row_index = None
+                if Config.ROW_INDEX_ENABLED:
+                    row_index = RowHashIndex(Config.ROW_INDEX_DIR, conn_key, d_name)
+                if storage_layout is not None:
+                    version_id = db_conn.insert_dataset_in_database(
+                        d_name,
+                        chunks,
+                        description,
+                        storage_layout,
+                        progress=progress,
+                        row_index=row_index,
+                        compression=compression,
+                        partitioned=partitioned,
+                    )
+                else:
+                    version_id = db_conn.insert_new_version(
+                        d_name,
+                        chunks,
+                        description,
+                        progress,
+                        row_index,
+                        branch,
+                    )
+
+            if version_id:
+                self._update_job(
+                    conn_key,
+                    conn_details,
+                    job_id,
+                    status="succeeded",
+                    phase="done",
+                    version_id=version_id,
+                )
+                UICache.invalidate(db_conn)
+                UICache.invalidate(db_conn, d_name)
+            else:
+                self._update_job(
+                    conn_key,
+                    conn_details,
+                    job_id,
+                    status="failed",
+                    error=errors[0] if errors else "Upload failed, see the app log",
+                )
+        except Exception as e:
+            self._update_job(conn_key, conn_details, job_id, status="failed", error=str(e))
+        finally:
+            db_conn.close()
+            with self._lock:
+                self._active[conn_key][1].remove(job_id)
+
+    def _send_heartbeats(self):
+        while True:
+            time.sleep(self._heartbeat_seconds)
+            with self._lock:
+                active = {
+                    conn_key: (conn_details, list(job_ids))
+                    for conn_key, (conn_details, job_ids) in self._active.items()
+                    if job_ids
+                }
+            for conn_key, (conn_details, job_ids) in active.items():
+                status_conn, lock = self._status_connection(conn_key, conn_details)
+                with lock:
+                    status_conn.touch_upload_jobs(job_ids)